@@ -0,0 +1,5 @@
+"""
+Benchmarks - Reproducible performance scenarios for the engine.
+
+Run ``python -m benchmarks --help`` from the repository root.
+"""
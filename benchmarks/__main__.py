@@ -0,0 +1,81 @@
+"""
+Benchmarks CLI - Run scenarios, save baselines and compare against them.
+"""
+from typing import Dict, Any, List
+import argparse
+import fnmatch
+import sys
+
+from benchmarks import scenarios  # noqa: F401  (registers scenarios)
+from benchmarks.harness import (
+    SCENARIOS, run_scenarios, save_baseline, load_baseline, compare
+)
+
+def _select(patterns: List[str]) -> List[str]:
+    if not patterns:
+        return list(SCENARIOS)
+    names = [n for n in SCENARIOS if any(fnmatch.fnmatch(n, p) for p in patterns)]
+    if not names:
+        raise SystemExit(f"No scenario matches {patterns}. Available: {list(SCENARIOS)}")
+    return names
+
+def _print_result(result: Dict[str, Any]) -> None:
+    print(
+        f"{result['scenario']:<16} {result['iterations']:>6} ops "
+        f"{result['throughput_per_second']:>11.2f}/s "
+        f"p50 {result['p50_ms']:>10.3f} ms  p99 {result['p99_ms']:>10.3f} ms  "
+        f"rss {result['peak_rss_mb']:>8.1f} MiB",
+        flush=True
+    )
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="QuantumFlow engine benchmarks"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="List scenarios")
+    run = sub.add_parser("run", help="Run scenarios")
+    run.add_argument("-s", "--scenario", action="append", default=[],
+                     help="Scenario name or glob (repeatable; default: all)")
+    run.add_argument("-n", "--iterations", type=int, default=None,
+                     help="Override each scenario's iteration count")
+    run.add_argument("--in-process", action="store_true",
+                     help="Run in this process instead of one process per scenario")
+    run.add_argument("--save", metavar="PATH", help="Write results as a JSON baseline")
+    run.add_argument("--compare", metavar="PATH", help="Compare with a JSON baseline")
+    run.add_argument("--tolerance", type=float, default=0.10,
+                     help="Allowed fractional slowdown before flagging (default 0.10)")
+    args = parser.parse_args(argv)
+    
+    if args.command == "list":
+        for name, bench in SCENARIOS.items():
+            print(f"{name:<16} {bench.description}")
+        return 0
+    
+    names = _select(args.scenario)
+    baseline = load_baseline(args.compare) if args.compare else None
+    results = run_scenarios(
+        names, args.iterations, isolated=not args.in_process, report=_print_result
+    )
+    if args.save:
+        save_baseline(args.save, results)
+        print(f"✓ Baseline saved to {args.save}")
+    
+    if baseline is not None:
+        rows, regressions = compare(baseline, results, args.tolerance)
+        for row in rows:
+            flag = "✗ REGRESSION" if row["regressed"] else ""
+            print(
+                f"{row['scenario']:<16} {row['metric']:<22} "
+                f"{row['baseline']:>12} -> {row['current']:>12} "
+                f"({row['change']:+.1%}) {flag}"
+            )
+        if regressions:
+            print(f"✗ {len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            return 1
+        print("✓ No regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+Harness - Scenario registry, measurement, baselines and comparison.
+"""
+from typing import Dict, Any, Optional, Callable, Awaitable, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import AsyncExitStack
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+# An operation takes its op number. A builder prepares one scenario for
+# ``count`` ops (numbered from 0, warmup included), registers teardown on
+# the stack and returns its operation.
+Operation = Callable[[int], Awaitable[Any]]
+Builder = Callable[[AsyncExitStack, int], Awaitable[Operation]]
+
+class Scenario:
+    """A named benchmark: how to build it and how hard to drive it."""
+    __slots__ = ("name", "build", "iterations", "warmup", "concurrency", "description")
+    
+    def __init__(
+        self,
+        name: str,
+        build: Builder,
+        iterations: int,
+        warmup: int = 3,
+        concurrency: int = 1,
+        description: str = ""
+    ):
+        self.name = name
+        self.build = build
+        self.iterations = iterations
+        self.warmup = warmup
+        self.concurrency = concurrency
+        self.description = description
+
+SCENARIOS: Dict[str, Scenario] = {}
+
+def scenario(
+    name: str,
+    iterations: int,
+    warmup: int = 3,
+    concurrency: int = 1
+) -> Callable[[Builder], Builder]:
+    """Register a scenario builder under ``name``."""
+    def decorator(build: Builder) -> Builder:
+        if name in SCENARIOS:
+            raise ValueError(f"Scenario '{name}' already registered")
+        doc = (build.__doc__ or "").strip().splitlines()
+        SCENARIOS[name] = Scenario(
+            name, build, iterations, warmup, concurrency, doc[0] if doc else ""
+        )
+        return build
+    return decorator
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+async def measure(bench: Scenario, iterations: Optional[int] = None) -> Dict[str, Any]:
+    """Build a scenario, warm it up, then time ``iterations`` operations."""
+    iterations = iterations or bench.iterations
+    async with AsyncExitStack() as stack:
+        op = await bench.build(stack, bench.warmup + iterations)
+        for i in range(bench.warmup):
+            await op(i)
+        
+        latencies: List[float] = []
+        counter = iter(range(bench.warmup, bench.warmup + iterations))
+        
+        async def worker():
+            for i in counter:
+                started = time.perf_counter()
+                await op(i)
+                latencies.append(time.perf_counter() - started)
+        
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(bench.concurrency)))
+        elapsed = time.perf_counter() - started
+    
+    latencies.sort()
+    return {
+        "scenario": bench.name,
+        "iterations": iterations,
+        "concurrency": bench.concurrency,
+        "elapsed_seconds": round(elapsed, 6),
+        "throughput_per_second": round(iterations / elapsed, 3) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+        "max_ms": round(latencies[-1] * 1000, 4) if latencies else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 2)
+    }
+
+def _run_isolated(name: str, iterations: Optional[int]) -> Dict[str, Any]:
+    """Child-process entry point: run one scenario."""
+    from benchmarks import scenarios  # noqa: F401  (registers scenarios)
+    return asyncio.run(measure(SCENARIOS[name], iterations))
+
+def run_scenarios(
+    names: List[str],
+    iterations: Optional[int] = None,
+    isolated: bool = True,
+    report: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Run scenarios in order. ``isolated`` runs each in a fresh spawned
+    process, so peak RSS and caches are per scenario.
+    """
+    results = []
+    for name in names:
+        if isolated:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(_run_isolated, name, iterations).result()
+        else:
+            result = asyncio.run(measure(SCENARIOS[name], iterations))
+        results.append(result)
+        if report is not None:
+            report(result)
+    return results
+
+def environment() -> Dict[str, Any]:
+    """Where a baseline was recorded."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": commit,
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    }
+
+def save_baseline(path: str, results: List[Dict[str, Any]]) -> None:
+    """Write results and environment as a JSON baseline."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "environment": environment(),
+            "results": {r["scenario"]: r for r in results}
+        }, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+# metric -> True when higher is better
+COMPARED_METRICS = {
+    "throughput_per_second": True,
+    "p50_ms": False,
+    "p99_ms": False,
+    "peak_rss_mb": False,
+}
+
+def compare(
+    baseline: Dict[str, Any],
+    results: List[Dict[str, Any]],
+    tolerance: float = 0.10
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Compare results with a baseline. Returns ``(rows, regressions)``;
+    a metric regresses when it is worse than the baseline by more than
+    ``tolerance`` (a fraction).
+    """
+    rows, regressions = [], []
+    recorded = baseline.get("results", {})
+    for result in results:
+        base = recorded.get(result["scenario"])
+        if base is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            row = {
+                "scenario": result["scenario"],
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "change": round(change, 4),
+                "regressed": worse > tolerance
+            }
+            rows.append(row)
+            if row["regressed"]:
+                regressions.append(row)
+    return rows, regressions
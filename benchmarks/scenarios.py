@@ -0,0 +1,227 @@
+"""
+Scenarios - Executor, state, CodePrism and API benchmark scenarios.
+"""
+from typing import Dict, Any, Optional, Tuple
+from contextlib import AsyncExitStack
+import random
+
+from nexus_api.schemas.flow_models import Graph, NodeConfig
+from nexus_api.pulse_engine.executor import GraphExecutor
+from nexus_api.pulse_engine.tool_hub import ToolRegistry
+from nexus_api.pulse_engine.memory_core import StateManager
+from nexus_api.pulse_engine.checkpoint import CheckpointWriter
+from nexus_api.agents.code_prism import register_prism_tools, build_prism_graph
+from nexus_api.settings import settings
+
+from benchmarks.harness import scenario, Operation
+
+def bench_step(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Benchmark tool: bump a counter."""
+    return {"value": state.get("value", 0) + 1}
+
+def _engine(
+    stack: AsyncExitStack,
+    checkpoint_every: Optional[int] = None
+) -> Tuple[ToolRegistry, GraphExecutor]:
+    """
+    A private registry, store and executor configured like the server
+    (log verbosity, log cap, checkpointing), torn down with the stack.
+    ``checkpoint_every`` overrides the configured checkpoint interval.
+    """
+    if checkpoint_every is None:
+        checkpoint_every = settings.checkpoint_every
+    registry = ToolRegistry(
+        thread_workers=settings.thread_pool_workers,
+        process_workers=settings.process_pool_workers
+    )
+    registry.register("bench_step", bench_step)
+    stack.callback(registry.shutdown, False)
+    store = StateManager(max_runs=1000)
+    writer = None
+    if checkpoint_every:
+        writer = CheckpointWriter(store, every=checkpoint_every)
+        stack.callback(writer.close)
+    executor = GraphExecutor(
+        registry, store,
+        log_verbosity=settings.run_log_verbosity,
+        log_cap=settings.run_log_cap,
+        checkpoints=writer
+    )
+    return registry, executor
+
+def linear_graph(size: int) -> Graph:
+    """``size`` bench_step nodes in a chain."""
+    names = [f"n{i}" for i in range(size)]
+    return Graph(
+        name=f"linear-{size}",
+        nodes={name: NodeConfig(type="function", function="bench_step") for name in names},
+        edges={names[i]: names[i + 1] for i in range(size - 1)},
+        start_node=names[0]
+    )
+
+def _linear(size: int, checkpoint_every: Optional[int] = None):
+    async def build(stack: AsyncExitStack, count: int) -> Operation:
+        _, executor = _engine(stack, checkpoint_every)
+        executor.max_steps = max(executor.max_steps, size)
+        graph_id = executor.register_graph(linear_graph(size))
+        
+        async def op(i: int):
+            run = await executor.execute(graph_id, {"value": 0})
+            assert run.status == "completed", run.error
+        return op
+    build.__doc__ = f"Linear graph of {size} nodes"
+    if checkpoint_every is not None:
+        build.__doc__ += f", checkpoint every {checkpoint_every or 'never'}"
+    return build
+
+scenario("linear_10", iterations=2000)(_linear(10))
+scenario("linear_100", iterations=300)(_linear(100))
+scenario("linear_1000", iterations=30)(_linear(1000))
+# Checkpoint overhead: compare with linear_100 at the configured interval
+scenario("linear_100_checkpoint_off", iterations=300)(_linear(100, 0))
+scenario("linear_100_checkpoint_1", iterations=300)(_linear(100, 1))
+
+@scenario("loop_max_steps", iterations=500)
+async def loop_max_steps(stack: AsyncExitStack, count: int) -> Operation:
+    """Conditional self-loop running exactly max_steps steps"""
+    _, executor = _engine(stack)
+    graph_id = executor.register_graph(Graph(
+        name="loop",
+        nodes={"inc": NodeConfig(type="function", function="bench_step")},
+        edges={"inc": {
+            "type": "conditional",
+            "condition": f"value < {executor.max_steps}",
+            "if_true": "inc",
+            "if_false": "end"
+        }},
+        start_node="inc"
+    ))
+    
+    async def op(i: int):
+        run = await executor.execute(graph_id, {"value": 0})
+        assert run.status == "completed", run.error
+    return op
+
+@scenario("large_state", iterations=200)
+async def large_state(stack: AsyncExitStack, count: int) -> Operation:
+    """20-node chain carrying a 1 MB blob and 10,000 keys it never touches"""
+    _, executor = _engine(stack)
+    graph_id = executor.register_graph(linear_graph(20))
+    items = {f"k{i}": i for i in range(10000)}
+    blob = "x" * (1024 * 1024)
+    
+    async def op(i: int):
+        run = await executor.execute(graph_id, {"value": 0, "blob": blob, "items": items})
+        assert run.status == "completed", run.error
+    return op
+
+# Synthetic source for CodePrism: a deterministic mix of simple and
+# branchy functions, unique per seed so no cache layer can serve it
+_TEMPLATES = (
+    "def {name}(a, b):\n"
+    "    \"\"\"Add two values.\"\"\"\n"
+    "    return a + b + {n}\n",
+    
+    "def {name}(items, limit, flag):\n"
+    "    total = 0\n"
+    "    for item in items:\n"
+    "        if item > limit and flag:\n"
+    "            total += item * {n}\n"
+    "        elif item < 0:\n"
+    "            total -= item\n"
+    "        else:\n"
+    "            while total > limit:\n"
+    "                total //= 2\n"
+    "    return total\n",
+    
+    "class {cls}:\n"
+    "    \"\"\"Holder {n}.\"\"\"\n"
+    "    def __init__(self, value):\n"
+    "        self.value = value\n"
+    "\n"
+    "    def {name}(self, other, *args, **kwargs):\n"
+    "        try:\n"
+    "            return [x for x in args if x and x != other] or self.value\n"
+    "        except (TypeError, ValueError):\n"
+    "            return None\n",
+)
+
+def synthetic_module(size: int, seed: int) -> str:
+    """Python source of roughly ``size`` bytes."""
+    rng = random.Random(seed)
+    parts = [f"# synthetic module {seed}\nimport os\n\n"]
+    length = len(parts[0])
+    n = 0
+    while length < size:
+        template = rng.choice(_TEMPLATES)
+        part = template.format(name=f"func_{seed & 0xffff}_{n}", cls=f"Holder{n}", n=n) + "\n\n"
+        parts.append(part)
+        length += len(part)
+        n += 1
+    return "".join(parts)
+
+def _prism(size: int, label: str):
+    async def build(stack: AsyncExitStack, count: int) -> Operation:
+        registry, executor = _engine(stack)
+        register_prism_tools(registry, mode=settings.prism_tool_mode)
+        graph_id = executor.register_graph(build_prism_graph())
+        # Sources are generated up front so generation is not timed
+        codes = [synthetic_module(size, seed=size * 1000 + i) for i in range(count)]
+        
+        async def op(i: int):
+            run = await executor.execute(graph_id, {
+                "code": codes[i], "threshold": 70, "max_iterations": 3, "iteration": 0
+            })
+            assert run.status == "completed", run.error
+            codes[i] = None
+        return op
+    build.__doc__ = f"CodePrism review of a {label} synthetic module"
+    return build
+
+scenario("prism_1kb", iterations=300)(_prism(1024, "1 KB"))
+scenario("prism_64kb", iterations=30, warmup=1)(_prism(64 * 1024, "64 KB"))
+scenario("prism_1mb", iterations=5, warmup=1)(_prism(1024 * 1024, "1 MB"))
+scenario("prism_5mb", iterations=2, warmup=1)(_prism(5 * 1024 * 1024, "5 MB"))
+
+async def _api_client(stack: AsyncExitStack):
+    """In-process ASGI client for the app, with its lifespan running."""
+    import httpx
+    from nexus_api.main import app, tool_hub
+    
+    if tool_hub.get_tool("bench_step") is None:
+        tool_hub.register("bench_step", bench_step)
+    await stack.enter_async_context(app.router.lifespan_context(app))
+    return await stack.enter_async_context(httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    ))
+
+@scenario("api_graph_run", iterations=2000, warmup=5, concurrency=32)
+async def api_graph_run(stack: AsyncExitStack, count: int) -> Operation:
+    """POST /graph/run of a 10-node graph from 32 concurrent clients"""
+    client = await _api_client(stack)
+    graph = linear_graph(10)
+    response = await client.post("/graph/create", json={
+        "name": graph.name,
+        "nodes": {name: node.model_dump() for name, node in graph.nodes.items()},
+        "edges": graph.edges,
+        "start_node": graph.start_node
+    })
+    graph_id = response.json()["graph_id"]
+    
+    async def op(i: int):
+        response = await client.post("/graph/run", json={
+            "graph_id": graph_id, "initial_state": {"value": i}
+        })
+        assert response.status_code == 200, response.text
+    return op
+
+@scenario("api_prism_run", iterations=200, warmup=2, concurrency=16)
+async def api_prism_run(stack: AsyncExitStack, count: int) -> Operation:
+    """POST /prism/run of unique 2 KB modules from 16 concurrent clients"""
+    client = await _api_client(stack)
+    codes = [synthetic_module(2048, seed=10**6 + i) for i in range(count)]
+    
+    async def op(i: int):
+        response = await client.post("/prism/run", json={"code": codes[i]})
+        assert response.status_code == 200, response.text
+    return op
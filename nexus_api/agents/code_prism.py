@@ -1,151 +1,508 @@
 """
 Code Prism Agent - Code Review Workflow Implementation.
 """
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+from functools import lru_cache
+import ast
+import hashlib
 import re
 from nexus_api.pulse_engine.tool_hub import ToolRegistry
+from nexus_api.pulse_engine.result_cache import ResultCache, is_miss
+from nexus_api.agents.prism_metrics import (
+    LIMITS, function_metrics, function_issues, param_count, score_function
+)
+from nexus_api.schemas.flow_models import Graph, NodeConfig
+
+_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+# Trees (and offset tables) of large modules are big, so only the
+# latest couple are kept
+@lru_cache(maxsize=2)
+def parse_source(code: str) -> Tuple[Optional[ast.Module], Optional[str]]:
+    """
+    Parse source once; repeat calls with the same code (later loop
+    iterations, other Prism tools) reuse the cached tree.
+    Returns ``(tree, None)`` or ``(None, syntax_error)``.
+    """
+    try:
+        return ast.parse(code), None
+    except SyntaxError as e:
+        return None, f"Syntax error at line {e.lineno}: {e.msg}"
+
+@lru_cache(maxsize=2)
+def line_offsets(code: str) -> Tuple[int, ...]:
+    """Character offset of the start of each line (1-based via index - 1)."""
+    offsets = [0]
+    offsets.extend(m.end() for m in _LINE_BREAK.finditer(code))
+    offsets.append(len(code))
+    return tuple(offsets)
+
+def _has_return(node: ast.AST) -> bool:
+    """True if the function itself (not a nested def) returns or yields."""
+    stack = list(node.body)
+    while stack:
+        child = stack.pop()
+        if isinstance(child, (ast.Return, ast.Yield, ast.YieldFrom)):
+            return True
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef,
+                              ast.ClassDef, ast.Lambda)):
+            continue
+        stack.extend(ast.iter_child_nodes(child))
+    return False
+
+# Nodes whose bodies can hold function definitions
+_BLOCKS = (ast.stmt, ast.excepthandler, ast.match_case)
+
+def iter_functions(tree: ast.Module):
+    """
+    Yield ``(node, qualname, depth, is_method, top)`` for every function
+    in a single traversal. ``depth`` counts enclosing class/function
+    scopes and ``top`` is the enclosing module-level statement.
+    Functions inside ``except`` and ``case`` blocks are included.
+    """
+    stack = [(child, "", 0, False, child) for child in reversed(tree.body)]
+    while stack:
+        node, prefix, depth, in_class, top = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            qualname = f"{prefix}{node.name}"
+            yield node, qualname, depth, in_class, top
+            scope = (f"{qualname}.<locals>.", depth + 1, False)
+        elif isinstance(node, ast.ClassDef):
+            scope = (f"{prefix}{node.name}.", depth + 1, True)
+        else:
+            scope = (prefix, depth, in_class)
+        stack.extend(
+            (child, *scope, top) for child in reversed(list(ast.iter_child_nodes(node)))
+            if isinstance(child, _BLOCKS)
+        )
+
+def _first_line(node: ast.stmt) -> int:
+    """First line of a statement, including its decorators."""
+    return min([d.lineno for d in getattr(node, "decorator_list", ())] + [node.lineno])
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+@lru_cache(maxsize=2)
+def revision_id(code: str) -> str:
+    """Content hash identifying one revision of reviewed code."""
+    return _digest(code)
+
+def _function_entries(
+    code: str,
+    tree: ast.Module,
+    char_base: int = 0,
+    line_base: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Describe every function in ``tree``, parsed from ``code``.
+    
+    ``code`` may be a slice of a larger source starting at character
+    ``char_base`` after ``line_base`` lines; offsets and line numbers
+    are reported relative to the full source.
+    """
+    offsets = line_offsets(code)
+    entries = []
+    for node, qualname, depth, is_method, top in iter_functions(tree):
+        first_line = _first_line(node)
+        end_line = node.end_lineno
+        start, end = offsets[first_line - 1], offsets[end_line]
+        source_hash = _digest(code[start:end])
+        function_nodes.put(source_hash, node)
+        entries.append({
+            "name": node.name,
+            "qualname": qualname,
+            "lineno": first_line + line_base,
+            "end_lineno": end_line + line_base,
+            "lines": end_line - first_line + 1,
+            "args": param_count(node.args),
+            "decorators": [ast.unparse(d) for d in node.decorator_list],
+            "depth": depth,
+            "is_method": is_method,
+            "is_async": isinstance(node, ast.AsyncFunctionDef),
+            "has_docstring": ast.get_docstring(node, clean=False) is not None,
+            "has_return": _has_return(node),
+            "hash": source_hash,
+            "start": start + char_base,
+            "body_start": offsets[node.body[0].lineno - 1] + char_base,
+            "end": end + char_base,
+            "top": [
+                offsets[_first_line(top) - 1] + char_base,
+                offsets[top.end_lineno] + char_base
+            ]
+        })
+    return entries
+
+def _statement_spans(
+    code: str,
+    tree: ast.Module,
+    char_base: int = 0
+) -> List[Tuple[int, int]]:
+    """Character span of the whole lines of each module-level statement."""
+    offsets = line_offsets(code)
+    return [
+        (offsets[_first_line(node) - 1] + char_base, offsets[node.end_lineno] + char_base)
+        for node in tree.body
+    ]
+
+def _common_prefix(a: str, b: str, limit: int) -> int:
+    """Length of the common prefix, compared in shrinking blocks."""
+    i, step = 0, 4096
+    while step:
+        while i + step <= limit and a[i:i + step] == b[i:i + step]:
+            i += step
+        step //= 2
+    return i
+
+def _common_suffix(a: str, b: str, limit: int) -> int:
+    """Length of the common suffix, compared in shrinking blocks."""
+    i, step = 0, 4096
+    la, lb = len(a), len(b)
+    while step:
+        while i + step <= limit and a[la - i - step:la - i] == b[lb - i - step:lb - i]:
+            i += step
+        step //= 2
+    return i
+
+def _shifted(entry: Dict[str, Any], chars: int, lines: int) -> Dict[str, Any]:
+    moved = dict(entry)
+    moved["start"] += chars
+    moved["body_start"] += chars
+    moved["end"] += chars
+    moved["top"] = [entry["top"][0] + chars, entry["top"][1] + chars]
+    moved["lineno"] += lines
+    moved["end_lineno"] += lines
+    return moved
+
+def _extract_incremental(
+    base_code: str,
+    base_functions: List[Dict[str, Any]],
+    base_spans: List[Tuple[int, int]],
+    code: str
+) -> Optional[Tuple[List[Dict[str, Any]], List[str], List[Tuple[int, int]]]]:
+    """
+    Re-extract only the module-level statements touched by an edit.
+    
+    The edited span is the region between the common prefix and suffix
+    of the two revisions, widened to every module-level statement of
+    the base overlapping it (so an edit inside a multi-line string is
+    reparsed as part of its assignment). Only that slice is parsed; the
+    other functions are reused with shifted offsets. Returns
+    ``(functions, changed_qualnames, statement_spans)``, or None when
+    the slice cannot be parsed on its own and a full extraction is
+    needed.
+    """
+    if code == base_code:
+        return list(base_functions), [], base_spans
+    
+    limit = min(len(base_code), len(code))
+    prefix = _common_prefix(base_code, code, limit)
+    suffix = _common_suffix(base_code, code, limit - prefix)
+    edit_lo, edit_hi = prefix, len(base_code) - suffix
+    
+    # Statements can share a line, so widen until no overlap is left
+    lo, hi = edit_lo, edit_hi
+    widened = True
+    while widened:
+        widened = False
+        for top_start, top_end in base_spans:
+            if top_start <= hi and top_end >= lo and (top_start < lo or top_end > hi):
+                lo, hi = min(lo, top_start), max(hi, top_end)
+                widened = True
+    
+    # Widen to whole lines; the slice must start and end at module level
+    lo = base_code.rfind("\n", 0, lo) + 1
+    if 0 < hi < len(base_code) and base_code[hi - 1] != "\n":
+        newline = base_code.find("\n", hi)
+        hi = len(base_code) if newline < 0 else newline + 1
+    shift = len(code) - len(base_code)
+    if code[lo:lo + 1] in (" ", "\t") or base_code[hi:hi + 1] in (" ", "\t"):
+        return None
+    
+    segment = code[lo:hi + shift]
+    try:
+        tree = ast.parse(segment)
+    except SyntaxError:
+        return None
+    
+    line_base = base_code.count("\n", 0, lo)
+    line_shift = segment.count("\n") - base_code.count("\n", lo, hi)
+    region = _function_entries(segment, tree, lo, line_base)
+    spans = (
+        [span for span in base_spans if span[1] <= lo]
+        + _statement_spans(segment, tree, lo)
+        + [(start + shift, end + shift) for start, end in base_spans if start >= hi]
+    )
+    
+    before, after, replaced = [], [], set()
+    for func in base_functions:
+        if func["top"][1] <= lo:
+            before.append(func)
+        elif func["top"][0] >= hi:
+            after.append(_shifted(func, shift, line_shift))
+        else:
+            replaced.add((func["qualname"], func["hash"]))
+    
+    changed = [
+        func["qualname"] for func in region
+        if (func["qualname"], func["hash"]) not in replaced
+    ]
+    return before + region + after, changed, spans
+
+def _nodes_by_line(code: str) -> Dict[int, ast.AST]:
+    """Function nodes of the (cached) module tree by first line."""
+    tree, _ = parse_source(code)
+    if tree is None:
+        return {}
+    return {_first_line(node): node for node, *_ in iter_functions(tree)}
+
+# (code, functions, statement spans) of recent revisions, the bases
+# for incremental review
+revisions = ResultCache(maxsize=16)
+
+# Per-function metrics keyed by the function's source hash
+metrics_cache = ResultCache(maxsize=4096)
+
+# AST nodes from the extraction pass keyed by the function's source
+# hash, so the analyzer measures them without parsing again
+function_nodes = ResultCache(maxsize=4096)
 
 def function_extractor(state: Dict[str, Any]) -> Dict[str, Any]:
-    """Extract functions from source code."""
+    """
+    Extract functions from source code in one AST pass.
+    
+    Each entry records the span as line numbers and character offsets
+    into ``code`` rather than a copy of the body, plus a hash of the
+    function's source. With ``base_revision`` set, only the part of
+    the code that differs from that revision is re-parsed.
+    
+    Recent revisions are kept in a process-local cache, so the result
+    (``changed_functions`` in particular) depends on what this process
+    has seen; the tool is therefore not registered as pure.
+    """
     code = state.get("code", "")
+    revision = revision_id(code)
     
-    # Find function definitions
-    func_pattern = r'def\s+(\w+)\s*\([^)]*\):'
-    functions = re.findall(func_pattern, code)
-    
-    function_details = []
-    for func_name in functions:
-        func_start = code.find(f"def {func_name}")
-        if func_start != -1:
-            remaining = code[func_start:]
-            lines = remaining.split('\n')
-            
-            # Count function lines
-            func_lines = [lines[0]]
-            for i in range(1, len(lines)):
-                if lines[i] and not lines[i].startswith((' ', '\t')):
-                    break
-                func_lines.append(lines[i])
-            
-            function_details.append({
-                "name": func_name,
-                "lines": len(func_lines),
-                "body": '\n'.join(func_lines)
-            })
+    functions = changed = spans = None
+    base_revision = state.get("base_revision")
+    if base_revision:
+        base = revisions.get(base_revision)
+        if not is_miss(base):
+            incremental = _extract_incremental(*base, code)
+            if incremental is not None:
+                functions, changed, spans = incremental
+    else:
+        # Later loop iterations see the same code again
+        current = revisions.get(revision)
+        if not is_miss(current):
+            functions, spans = current[1], current[2]
+            changed = [func["qualname"] for func in functions]
     
+    if functions is None:
+        tree, error = parse_source(code)
+        if tree is None:
+            return {
+                "functions": [],
+                "function_count": 0,
+                "revision": revision,
+                "syntax_error": error,
+                "extraction_complete": True
+            }
+        functions = _function_entries(code, tree)
+        changed = [func["qualname"] for func in functions]
+        spans = _statement_spans(code, tree)
+    
+    revisions.put(revision, (code, functions, spans))
     return {
-        "functions": function_details,
+        "functions": functions,
         "function_count": len(functions),
+        "revision": revision,
+        "changed_functions": changed,
+        "reused_functions": len(functions) - len(changed),
         "extraction_complete": True
     }
 
 def complexity_analyzer(state: Dict[str, Any]) -> Dict[str, Any]:
-    """Analyze code complexity and quality."""
-    functions = state.get("functions", [])
+    """
+    Analyze code complexity and quality.
+    
+    Scores each function from its cyclomatic complexity, nesting depth,
+    parameter count, length and Halstead difficulty. Metrics are cached
+    by function source hash, so only new or edited functions are
+    measured, on the nodes kept from extraction. In a process that did
+    not extract the code itself, the module is parsed once instead.
+    """
     code = state.get("code", "")
+    functions = state.get("functions", [])
+    error = state.get("syntax_error")
+    if error:
+        return {
+            "quality_score": 0,
+            "issues": [error],
+            "metrics": [],
+            "reanalyzed_functions": 0,
+            "complexity_check_complete": True
+        }
     
-    score = 50  # Base score
     issues = []
-    
-    # Analyze function count
-    func_count = len(functions)
-    if func_count == 0:
-        score -= 20
-        issues.append("No functions detected")
-    elif func_count > 5:
-        score -= 5
-        issues.append(f"Too many functions ({func_count})")
-    elif 2 <= func_count <= 5:
-        score += 20
-    
-    # Analyze individual functions
+    metrics = []
+    reanalyzed = 0
+    by_line = None
     for func in functions:
-        lines = func.get("lines", 0)
-        if lines > 20:
-            score -= 10
-            issues.append(f"Function '{func['name']}' exceeds 20 lines")
-        elif lines < 10:
-            score += 10
-    
-    # Check code length
-    if len(code) > 500:
-        score -= 10
-        issues.append("Code is excessively long")
+        # Everything but the qualname follows from the function's source
+        measured = metrics_cache.get(func["hash"])
+        if is_miss(measured):
+            node = function_nodes.get(func["hash"])
+            if is_miss(node):
+                if by_line is None:
+                    by_line = _nodes_by_line(code)
+                node = by_line[func["lineno"]]
+            measured = {
+                "lines": func["lines"],
+                "has_docstring": func["has_docstring"],
+                **function_metrics(node)
+            }
+            measured["score"] = score_function(measured)
+            metrics_cache.put(func["hash"], measured)
+            reanalyzed += 1
+        entry = {"qualname": func["qualname"], **measured}
+        issues.extend(function_issues(func["qualname"], entry))
+        metrics.append(entry)
     
-    # Clamp score
-    score = max(0, min(100, score))
+    if metrics:
+        score = round(sum(m["score"] for m in metrics) / len(metrics))
+    else:
+        score = 50
+        issues.append("No functions detected")
     
     return {
         "quality_score": score,
         "issues": issues,
+        "metrics": metrics,
+        "reanalyzed_functions": reanalyzed,
         "complexity_check_complete": True
     }
 
 def improvement_suggester(state: Dict[str, Any]) -> Dict[str, Any]:
-    """Generate code improvement suggestions."""
+    """Generate code improvement suggestions from the analysis metrics."""
     issues = state.get("issues", [])
     functions = state.get("functions", [])
-    quality_score = state.get("quality_score", 0)
+    metrics = state.get("metrics", [])
     
     suggestions = []
     
     # Issue-based suggestions
-    if "No functions detected" in str(issues):
+    if "No functions detected" in issues:
         suggestions.append("Refactor code into modular functions")
     
-    for issue in issues:
-        if "exceeds" in str(issue).lower():
-            suggestions.append("Break down large functions into smaller units")
-        if "Too many functions" in str(issue):
-            suggestions.append("Consider class-based organization")
-    
     # Function-specific suggestions
+    for entry in metrics:
+        name = entry["qualname"]
+        if entry["cyclomatic"] > LIMITS["cyclomatic"][0]:
+            suggestions.append(f"Split branching logic in '{name}' into helpers")
+        if entry["max_nesting"] > LIMITS["max_nesting"][0]:
+            suggestions.append(f"Flatten nested blocks in '{name}' with early returns")
+        if entry["params"] > LIMITS["params"][0]:
+            suggestions.append(f"Group parameters of '{name}' into an object")
+        if entry["lines"] > LIMITS["lines"][0]:
+            suggestions.append(f"Break '{name}' down into smaller units")
+        if not entry["has_docstring"]:
+            suggestions.append(f"Add a docstring to '{name}'")
+    
     for func in functions:
-        if "return" not in func.get("body", "").lower():
+        if not func.get("has_return"):
             suggestions.append(
                 f"Add explicit return statement to '{func['name']}'"
             )
     
-    # General improvements
-    if quality_score < 70:
-        suggestions.extend([
-            "Add comprehensive docstrings",
-            "Implement type hints for parameters",
-            "Review variable naming conventions"
-        ])
-    
-    # Simulate improvement
-    iteration = state.get("iteration", 0) + 1
-    improved_score = min(quality_score + 15, 100)
-    
     return {
         "suggestions": suggestions,
-        "iteration": iteration,
-        "quality_score": improved_score,
+        "iteration": state.get("iteration", 0) + 1,
         "suggestion_complete": True
     }
 
 def quality_checkpoint(state: Dict[str, Any]) -> Dict[str, Any]:
-    """Decide whether to continue or stop the loop."""
+    """
+    Decide whether to continue or stop the loop.
+    
+    Besides the threshold and iteration cap, the loop stops once the
+    score has converged: when the code is still the revision this pass
+    reviewed, another pass would score it the same, so it stops on the
+    first pass. Only a node that rewrites ``code`` makes the loop go on,
+    and then until the score stops improving.
+    """
     quality_score = state.get("quality_score", 0)
+    previous_score = state.get("previous_score")
     threshold = state.get("threshold", 70)
     iteration = state.get("iteration", 0)
     max_iterations = state.get("max_iterations", 3)
     
+    unchanged = state.get("revision") == revision_id(state.get("code", ""))
+    converged = unchanged or (
+        previous_score is not None and quality_score <= previous_score
+    )
+    
     # Stop conditions
     stop = (
         quality_score >= threshold or 
-        iteration >= max_iterations
+        iteration >= max_iterations or
+        converged
     )
     
     return {
         "stop": stop,
+        "converged": converged,
+        "previous_score": quality_score,
         "checkpoint_passed": stop
     }
 
-def register_prism_tools(registry: ToolRegistry) -> None:
-    """Register all Code Prism tools."""
-    registry.register("function_extractor", function_extractor)
-    registry.register("complexity_analyzer", complexity_analyzer)
+def build_prism_graph() -> Graph:
+    """Build the Code Prism review loop graph."""
+    return Graph(
+        name="CodePrism",
+        nodes={
+            "extract": NodeConfig(
+                type="function", 
+                function="function_extractor"
+            ),
+            "analyze": NodeConfig(
+                type="function",
+                function="complexity_analyzer"
+            ),
+            "suggest": NodeConfig(
+                type="function",
+                function="improvement_suggester"
+            ),
+            "checkpoint": NodeConfig(
+                type="function",
+                function="quality_checkpoint"
+            )
+        },
+        edges={
+            "extract": "analyze",
+            "analyze": "suggest",
+            "suggest": "checkpoint",
+            "checkpoint": {
+                "type": "conditional",
+                "condition": "stop == True",
+                "if_true": "end",
+                "if_false": "extract"
+            }
+        },
+        start_node="extract"
+    )
+
+def register_prism_tools(registry: ToolRegistry, mode: str = "inline") -> None:
+    """
+    Register all Code Prism tools.
+    
+    ``mode`` applies to the heavy analysis tools (extraction and
+    complexity); the cheap bookkeeping tools always run inline.
+    """
+    registry.register("function_extractor", function_extractor, mode=mode)
+    registry.register(
+        "complexity_analyzer", complexity_analyzer,
+        mode=mode, pure=True, reads=("code", "functions", "syntax_error")
+    )
     registry.register("improvement_suggester", improvement_suggester)
     registry.register("quality_checkpoint", quality_checkpoint)
\ No newline at end of file
@@ -0,0 +1,164 @@
+"""
+Prism Metrics - Per-function complexity metrics from a parsed AST.
+"""
+from typing import Dict, Any, List
+import ast
+import math
+
+_FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)
+
+# Nodes that add an independent path through the function
+_BRANCH_NODES = (
+    ast.If, ast.IfExp, ast.For, ast.AsyncFor, ast.While,
+    ast.ExceptHandler, ast.Assert, ast.comprehension, ast.match_case
+)
+
+# Nodes that open a nested block
+_BLOCK_NODES = (
+    ast.If, ast.For, ast.AsyncFor, ast.While, ast.With, ast.AsyncWith,
+    ast.Try, ast.Match
+) + ((ast.TryStar,) if hasattr(ast, "TryStar") else ())
+
+# Nodes counted as Halstead operators by their own type
+_OPERATOR_NODES = (
+    ast.operator, ast.unaryop, ast.boolop, ast.cmpop,
+    ast.Call, ast.Attribute, ast.Subscript, ast.Assign, ast.AugAssign,
+    ast.AnnAssign, ast.Return, ast.Yield, ast.YieldFrom, ast.Await,
+    ast.If, ast.IfExp, ast.For, ast.AsyncFor, ast.While, ast.With,
+    ast.AsyncWith, ast.Try, ast.Raise, ast.Assert, ast.Delete,
+    ast.Break, ast.Continue, ast.comprehension
+)
+
+def param_count(args: ast.arguments) -> int:
+    """Number of parameters, counting *args and **kwargs."""
+    return (
+        len(args.posonlyargs) + len(args.args) + len(args.kwonlyargs)
+        + (args.vararg is not None) + (args.kwarg is not None)
+    )
+
+def _halstead(operators: Dict[str, int], operands: Dict[str, int]) -> Dict[str, Any]:
+    n1, n2 = len(operators), len(operands)
+    N1, N2 = sum(operators.values()), sum(operands.values())
+    vocabulary = n1 + n2
+    length = N1 + N2
+    volume = length * math.log2(vocabulary) if vocabulary > 1 else 0.0
+    difficulty = (n1 / 2) * (N2 / n2) if n2 else 0.0
+    return {
+        "distinct_operators": n1,
+        "distinct_operands": n2,
+        "total_operators": N1,
+        "total_operands": N2,
+        "volume": round(volume, 2),
+        "difficulty": round(difficulty, 2),
+        "effort": round(volume * difficulty, 2)
+    }
+
+def function_metrics(func: ast.AST) -> Dict[str, Any]:
+    """
+    Compute metrics for one function in a single walk of its body.
+    
+    Nested functions and classes are skipped; they are measured on
+    their own, so every AST node is visited once per module.
+    """
+    cyclomatic = 1
+    max_nesting = 0
+    operators: Dict[str, int] = {}
+    operands: Dict[str, int] = {}
+    
+    for arg in ast.walk(func.args):
+        if isinstance(arg, ast.arg):
+            operands[arg.arg] = operands.get(arg.arg, 0) + 1
+    
+    stack = [(child, 0) for child in func.body]
+    while stack:
+        node, depth = stack.pop()
+        if isinstance(node, _FUNCTION_NODES):
+            continue
+        
+        if isinstance(node, _BRANCH_NODES):
+            cyclomatic += 1
+            if isinstance(node, ast.comprehension):
+                cyclomatic += len(node.ifs)
+        elif isinstance(node, ast.BoolOp):
+            cyclomatic += len(node.values) - 1
+        
+        if isinstance(node, _OPERATOR_NODES):
+            key = type(node).__name__
+            operators[key] = operators.get(key, 0) + 1
+        elif isinstance(node, ast.Name):
+            operands[node.id] = operands.get(node.id, 0) + 1
+        elif isinstance(node, ast.Constant):
+            key = repr(node.value)
+            operands[key] = operands.get(key, 0) + 1
+        
+        child_depth = depth
+        if isinstance(node, _BLOCK_NODES):
+            child_depth = depth + 1
+            if child_depth > max_nesting:
+                max_nesting = child_depth
+        # elif chains are nested Ifs in the AST but read as one level
+        if isinstance(node, ast.If) and len(node.orelse) == 1 \
+                and isinstance(node.orelse[0], ast.If):
+            stack.append((node.orelse[0], depth))
+            stack.extend((child, child_depth) for child in ast.iter_child_nodes(node)
+                         if child is not node.orelse[0])
+            continue
+        stack.extend((child, child_depth) for child in ast.iter_child_nodes(node))
+    
+    return {
+        "cyclomatic": cyclomatic,
+        "max_nesting": max_nesting,
+        "params": param_count(func.args),
+        "halstead": _halstead(operators, operands)
+    }
+
+# Thresholds and per-violation penalties for the function score
+LIMITS = {
+    "cyclomatic": (10, 5),
+    "max_nesting": (4, 5),
+    "params": (5, 3),
+    "lines": (50, 2)
+}
+HALSTEAD_DIFFICULTY_LIMIT = 30
+
+def score_function(metrics: Dict[str, Any]) -> int:
+    """Score a function 0-100 from its metrics; higher is better."""
+    score = 100
+    for key, (limit, penalty) in LIMITS.items():
+        excess = metrics.get(key, 0) - limit
+        if excess > 0:
+            score -= 10 + penalty * excess
+    if metrics["halstead"]["difficulty"] > HALSTEAD_DIFFICULTY_LIMIT:
+        score -= 10
+    if not metrics.get("has_docstring", True):
+        score -= 5
+    return max(0, min(100, score))
+
+def function_issues(name: str, metrics: Dict[str, Any]) -> List[str]:
+    """Human-readable issues for a function's metrics."""
+    issues = []
+    if metrics["cyclomatic"] > LIMITS["cyclomatic"][0]:
+        issues.append(
+            f"Function '{name}' cyclomatic complexity {metrics['cyclomatic']} "
+            f"exceeds {LIMITS['cyclomatic'][0]}"
+        )
+    if metrics["max_nesting"] > LIMITS["max_nesting"][0]:
+        issues.append(
+            f"Function '{name}' nesting depth {metrics['max_nesting']} "
+            f"exceeds {LIMITS['max_nesting'][0]}"
+        )
+    if metrics["params"] > LIMITS["params"][0]:
+        issues.append(
+            f"Function '{name}' takes {metrics['params']} parameters, "
+            f"exceeds {LIMITS['params'][0]}"
+        )
+    if metrics.get("lines", 0) > LIMITS["lines"][0]:
+        issues.append(
+            f"Function '{name}' exceeds {LIMITS['lines'][0]} lines"
+        )
+    if metrics["halstead"]["difficulty"] > HALSTEAD_DIFFICULTY_LIMIT:
+        issues.append(
+            f"Function '{name}' Halstead difficulty "
+            f"{metrics['halstead']['difficulty']} exceeds {HALSTEAD_DIFFICULTY_LIMIT}"
+        )
+    return issues
\ No newline at end of file
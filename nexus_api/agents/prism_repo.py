@@ -0,0 +1,312 @@
+"""
+Prism Repo - Repository-scale Code Prism reviews.
+"""
+from typing import Dict, Any, Optional, Iterator, Tuple, Callable, BinaryIO, AsyncIterator, List
+from collections import OrderedDict
+from concurrent.futures import Executor
+import asyncio
+import heapq
+import os
+import posixpath
+import tarfile
+import threading
+import zipfile
+
+from nexus_api.agents.code_prism import (
+    function_extractor, complexity_analyzer, revision_id
+)
+from nexus_api.pulse_engine.result_cache import ResultCache, is_miss
+from nexus_api.settings import settings
+
+SOURCE_SUFFIXES = (".py",)
+SKIP_DIRS = {
+    ".git", ".hg", ".svn", "__pycache__", ".venv", "venv",
+    ".tox", ".mypy_cache", ".pytest_cache", "node_modules"
+}
+
+class RepoReviewError(ValueError):
+    """Raised for a review source that cannot be used."""
+
+# (path, index key, (mtime_ns, size) stamp, reader)
+SourceFile = Tuple[str, Optional[str], Optional[Tuple[int, int]], Callable[[], bytes]]
+
+def review_source(code: str) -> Dict[str, Any]:
+    """Extract and score one file. Runs in a pool worker."""
+    state = {"code": code}
+    state.update(function_extractor(state))
+    analysis = complexity_analyzer(state)
+    return {
+        "function_count": state["function_count"],
+        "quality_score": analysis["quality_score"],
+        "issues": analysis["issues"],
+        "syntax_error": state.get("syntax_error"),
+        "functions": [
+            {
+                "qualname": m["qualname"],
+                "score": m["score"],
+                "cyclomatic": m["cyclomatic"],
+                "max_nesting": m["max_nesting"],
+                "lines": m["lines"]
+            }
+            for m in analysis["metrics"]
+        ]
+    }
+
+def safe_member_path(name: str) -> str:
+    """Normalize an archive member name, rejecting ones that escape the root."""
+    path = name.replace("\\", "/")
+    if path.startswith("/") or (len(path) > 1 and path[1] == ":"):
+        raise RepoReviewError(f"Absolute path in archive: '{name}'")
+    path = posixpath.normpath(path)
+    if path == ".." or path.startswith("../"):
+        raise RepoReviewError(f"Path escapes archive root: '{name}'")
+    return path
+
+def directory_sources(path: str, root: str, max_file_bytes: int) -> Iterator[SourceFile]:
+    """
+    Source files under a local directory inside ``root``.
+    
+    Symlinks are resolved and must stay inside ``root``.
+    """
+    root = os.path.realpath(root)
+    target = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, target]) != root:
+        raise RepoReviewError(f"Path '{path}' is outside the review root")
+    if not os.path.isdir(target):
+        raise RepoReviewError(f"Directory '{path}' not found")
+    
+    def walk():
+        for dirpath, dirnames, filenames in os.walk(target):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+            for filename in sorted(filenames):
+                if not filename.endswith(SOURCE_SUFFIXES):
+                    continue
+                full = os.path.join(dirpath, filename)
+                real = os.path.realpath(full)
+                if os.path.commonpath([root, real]) != root:
+                    continue
+                try:
+                    stat = os.stat(real)
+                except OSError:
+                    continue
+                if stat.st_size > max_file_bytes:
+                    continue
+                relative = os.path.relpath(full, target).replace(os.sep, "/")
+                yield (
+                    relative, real, (stat.st_mtime_ns, stat.st_size),
+                    lambda real=real: _read_file(real)
+                )
+    
+    return walk()
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+def archive_sources(fileobj: BinaryIO, max_file_bytes: int) -> Iterator[SourceFile]:
+    """
+    Source files inside a zip or tar archive, read member by member.
+    
+    Nothing is extracted to disk. Links, devices and oversized members
+    are skipped; a member path that escapes the root rejects the archive.
+    """
+    if zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        archive = zipfile.ZipFile(fileobj)
+        members = [
+            (info.filename, info.file_size, lambda info=info: archive.read(info))
+            for info in archive.infolist() if not info.is_dir()
+        ]
+    else:
+        fileobj.seek(0)
+        try:
+            archive = tarfile.open(fileobj=fileobj, mode="r:*")
+        except tarfile.TarError:
+            raise RepoReviewError("Upload is not a zip or tar archive")
+        members = [
+            (info.name, info.size, lambda info=info: archive.extractfile(info).read())
+            for info in archive.getmembers() if info.isfile()
+        ]
+    
+    try:
+        for name, _, _ in members:
+            safe_member_path(name)
+    except RepoReviewError:
+        archive.close()
+        raise
+    
+    def read():
+        try:
+            for name, size, reader in members:
+                if not name.endswith(SOURCE_SUFFIXES) or size > max_file_bytes:
+                    continue
+                yield safe_member_path(name), None, None, reader
+        finally:
+            archive.close()
+    
+    return read()
+
+class RepoReport:
+    """Running aggregate of per-file results."""
+    
+    def __init__(self, worst: int = 10):
+        self.worst = worst
+        self.files = 0
+        self.analyzed = 0
+        self.skipped = 0
+        self.errors = 0
+        self.functions = 0
+        self._weighted_score = 0
+        self._weight = 0
+        self._worst: List[Tuple[int, int, str, Dict[str, Any]]] = []
+        self._seq = 0
+        self.module_scores: Dict[str, int] = {}
+    
+    def add(self, entry: Dict[str, Any]) -> None:
+        """Fold one file's result into the report."""
+        self.files += 1
+        if entry.get("error") or entry.get("syntax_error"):
+            self.errors += 1
+        if "quality_score" not in entry:
+            return
+        if entry["skipped"]:
+            self.skipped += 1
+        else:
+            self.analyzed += 1
+        
+        path = entry["path"]
+        count = entry["function_count"]
+        self.module_scores[path] = entry["quality_score"]
+        self.functions += count
+        self._weighted_score += entry["quality_score"] * max(count, 1)
+        self._weight += max(count, 1)
+        
+        # Bounded max-heap on score (negated) keeps the N worst functions
+        for func in entry["functions"]:
+            self._seq += 1
+            item = (-func["score"], -self._seq, path, func)
+            if len(self._worst) < self.worst:
+                heapq.heappush(self._worst, item)
+            elif item > self._worst[0]:
+                heapq.heapreplace(self._worst, item)
+    
+    def summary(self) -> Dict[str, Any]:
+        """Overall and per-module scores plus the worst functions."""
+        return {
+            "files": self.files,
+            "analyzed": self.analyzed,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "functions": self.functions,
+            "quality_score": (
+                round(self._weighted_score / self._weight) if self._weight else None
+            ),
+            "module_scores": self.module_scores,
+            "worst_functions": [
+                {"path": path, **func}
+                for _, _, path, func in sorted(self._worst, reverse=True)
+            ]
+        }
+
+class RepoReviewer:
+    """
+    Streams a tree of source files through a worker pool.
+    
+    At most ``window`` files are read and in flight at a time, so memory
+    stays bounded regardless of repository size. Files whose mtime and
+    size match the previous scan, or whose content hash matches any
+    earlier review, reuse the cached result. The tree is walked and
+    files are read in threads, off the event loop.
+    """
+    
+    def __init__(self, max_index: int = 100000, max_results: int = 10000):
+        self.max_index = max_index
+        self.results = ResultCache(maxsize=max_results)
+        self._index: "OrderedDict[str, Tuple[Tuple[int, int], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _lookup(self, key: Optional[str], stamp: Optional[Tuple[int, int]]) -> Optional[str]:
+        if key is None or stamp is None:
+            return None
+        with self._lock:
+            known = self._index.get(key)
+            if known is None or known[0] != stamp:
+                return None
+            self._index.move_to_end(key)
+            return known[1]
+    
+    def _remember(self, key: Optional[str], stamp: Optional[Tuple[int, int]], digest: str) -> None:
+        if key is None or stamp is None:
+            return
+        with self._lock:
+            self._index[key] = (stamp, digest)
+            self._index.move_to_end(key)
+            while len(self._index) > self.max_index:
+                self._index.popitem(last=False)
+    
+    async def review(
+        self,
+        sources: Iterator[SourceFile],
+        pool: Executor,
+        window: int
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield one result per source file, in completion order."""
+        loop = asyncio.get_running_loop()
+        pending: Dict[asyncio.Future, Tuple[str, str, Optional[str], Any]] = {}
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < window:
+                    source = await asyncio.to_thread(next, sources, None)
+                    if source is None:
+                        exhausted = True
+                        break
+                    path, key, stamp, read = source
+                    
+                    # Unchanged since the last scan: skip without reading
+                    digest = self._lookup(key, stamp)
+                    if digest is not None:
+                        cached = self.results.get(digest)
+                        if not is_miss(cached):
+                            yield {"path": path, "revision": digest, "skipped": True, **cached}
+                            continue
+                    
+                    try:
+                        data = await asyncio.to_thread(read)
+                    except (OSError, tarfile.TarError, zipfile.BadZipFile) as e:
+                        yield {"path": path, "error": str(e)}
+                        continue
+                    code = data.decode("utf-8", errors="replace")
+                    digest = revision_id(code)
+                    cached = self.results.get(digest)
+                    if not is_miss(cached):
+                        self._remember(key, stamp, digest)
+                        yield {"path": path, "revision": digest, "skipped": True, **cached}
+                        continue
+                    
+                    future = loop.run_in_executor(pool, review_source, code)
+                    pending[future] = (path, digest, key, stamp)
+                
+                if not pending:
+                    return
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    path, digest, key, stamp = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        yield {"path": path, "error": str(e)}
+                        continue
+                    self.results.put(digest, result)
+                    self._remember(key, stamp, digest)
+                    yield {"path": path, "revision": digest, "skipped": False, **result}
+        finally:
+            for future in pending:
+                future.cancel()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Index and result cache occupancy."""
+        return {"indexed_files": len(self._index), "results": self.results.stats()}
+
+# Global repository reviewer (keeps the scan index across requests)
+repo_reviewer = RepoReviewer(max_index=settings.repo_index_size)
\ No newline at end of file
@@ -1,24 +1,63 @@
 """
 QuantumFlow Engine - FastAPI Application.
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, Any
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, Iterator, AsyncIterator, BinaryIO, List
+import asyncio
+import json
+import shutil
+import tempfile
+import time
+import weakref
 
 from nexus_api.pulse_engine.executor import GraphExecutor
-from nexus_api.pulse_engine.tool_hub import tool_hub
-from nexus_api.pulse_engine.memory_core import state_manager
+from nexus_api.pulse_engine.tool_hub import tool_hub, load_tool_modules
+from nexus_api.pulse_engine.storage import create_storage
+from nexus_api.pulse_engine.run_scheduler import RunScheduler, QueueFullError
+from nexus_api.pulse_engine.event_bus import event_bus, END_EVENT
+from nexus_api.pulse_engine import telemetry
+from nexus_api.pulse_engine.profiler import profiler
+from nexus_api.pulse_engine.checkpoint import CheckpointWriter, ResumeError
+from nexus_api.pulse_engine.admission import AdmissionController, AdmissionRejected, Ticket
+from nexus_api.pulse_engine.memory_core import estimate_size
+from nexus_api.pulse_engine.single_flight import SingleFlight, state_key
+from nexus_api.pulse_engine.work_queue import WorkQueue
+from nexus_api.pulse_engine.cluster import ClusterDispatcher
 from nexus_api.schemas.flow_models import (
     CreateGraphRequest, RunGraphRequest, PrismRunRequest,
-    Graph, NodeConfig
+    BatchRunRequest, PrismBatchRequest, PrismRepoRequest,
+    ResumeRequest, ResponseOptions, LogDetail, Graph, NodeConfig
 )
-from nexus_api.agents.code_prism import register_prism_tools
+from nexus_api.responses import (
+    FastJSONResponse, dumps, shape_state, shape_logs, log_page
+)
+from nexus_api.agents.code_prism import register_prism_tools, build_prism_graph
+from nexus_api.agents.prism_repo import (
+    RepoReport, RepoReviewError, repo_reviewer, directory_sources, archive_sources
+)
+from nexus_api.settings import settings
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop engine resources with the app."""
+    await scheduler.start()
+    yield
+    await scheduler.stop()
+    tool_hub.shutdown(wait=False)
+    if checkpoint_writer is not None:
+        checkpoint_writer.close()
+    state_manager.close()
 
 # Initialize FastAPI
 app = FastAPI(
     title="QuantumFlow Engine",
     description="Modular workflow orchestration system",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -30,11 +69,382 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Register workflow tools
-register_prism_tools(tool_hub)
+# Configure tool pools and register workflow tools
+tool_hub.configure_pools(
+    thread_workers=settings.thread_pool_workers,
+    process_workers=settings.process_pool_workers
+)
+tool_hub.configure_cache(
+    maxsize=settings.result_cache_size,
+    spill_dir=settings.result_cache_dir,
+    max_spill_bytes=settings.result_cache_dir_bytes
+)
+register_prism_tools(tool_hub, mode=settings.prism_tool_mode)
+load_tool_modules(settings.tool_modules)
+PRISM_GRAPH = build_prism_graph()
+
+# Initialize storage and executor
+state_manager = create_storage(settings)
+checkpoint_writer = None
+if settings.checkpoint_every:
+    checkpoint_writer = CheckpointWriter(
+        state_manager,
+        every=settings.checkpoint_every,
+        flush_interval=settings.checkpoint_flush_ms / 1000,
+        batch_size=settings.checkpoint_batch_size
+    )
+executor = GraphExecutor(
+    tool_hub, state_manager, event_bus, profiler,
+    log_verbosity=settings.run_log_verbosity,
+    log_cap=settings.run_log_cap,
+    checkpoints=checkpoint_writer
+)
+# Graph IDs are content-addressed, so the Prism graph's ID never changes
+PRISM_GRAPH_ID = executor.register_graph(PRISM_GRAPH)
+
+# Runs execute through ``runner``: the executor in this process, or in
+# cluster mode a dispatcher queueing them for worker processes
+if settings.execution == "cluster":
+    if settings.storage != "sqlite":
+        raise ValueError("Cluster execution needs QFLOW_STORAGE=sqlite")
+    scheduler = ClusterDispatcher(
+        executor,
+        WorkQueue(
+            settings.queue_path,
+            visibility_timeout=settings.queue_visibility_seconds,
+            max_attempts=settings.queue_max_attempts
+        ),
+        poll_interval=settings.queue_poll_ms / 1000
+    )
+    runner = scheduler
+elif settings.execution == "local":
+    scheduler = RunScheduler(
+        executor,
+        workers=settings.run_workers,
+        max_queue=settings.run_queue_size
+    )
+    runner = executor
+else:
+    raise ValueError(f"Unknown execution mode '{settings.execution}'")
+
+admission = AdmissionController(
+    max_concurrent=settings.max_concurrent_runs,
+    max_per_graph=settings.max_graph_concurrency,
+    max_state_bytes=settings.max_inflight_state_bytes,
+    max_wait=settings.admission_wait_ms / 1000,
+    max_waiting=settings.admission_queue_size
+)
+single_flight = SingleFlight(
+    state_manager,
+    ttl=settings.single_flight_ttl_seconds,
+    max_entries=settings.single_flight_cache_size
+)
 
-# Initialize executor
-executor = GraphExecutor(tool_hub, state_manager)
+def _store_runs() -> Optional[int]:
+    stats = state_manager.stats()
+    if "runs_by_status" in stats:
+        return sum(stats["runs_by_status"].values())
+    return stats.get("runs")
+
+# Scrape-time gauges for components owned by the app
+telemetry.metrics.gauge(
+    "qflow_queue_depth", "Submitted runs waiting to start",
+    collect=scheduler.queue_depth
+)
+telemetry.metrics.gauge(
+    "qflow_store_runs", "Runs held by the storage backend",
+    collect=_store_runs
+)
+telemetry.metrics.gauge(
+    "qflow_store_state_bytes", "Estimated bytes of run state held in memory",
+    collect=lambda: state_manager.stats().get("estimated_bytes")
+)
+telemetry.metrics.gauge(
+    "qflow_result_cache_entries", "Memoized tool results held in memory",
+    collect=lambda: tool_hub.result_cache.stats()["size"]
+)
+telemetry.metrics.gauge(
+    "qflow_admission_waiting", "Runs queued for admission",
+    collect=admission.waiting
+)
+telemetry.metrics.gauge(
+    "qflow_admission_active_runs", "Synchronous runs holding an admission slot",
+    collect=lambda: admission.active
+)
+telemetry.metrics.gauge(
+    "qflow_admission_state_bytes", "Estimated initial-state bytes of admitted runs",
+    collect=lambda: admission.state_bytes
+)
+
+def _get_run(run_id: str):
+    """A stored run; coalesced aliases resolve to their leader's result."""
+    return single_flight.resolve(state_manager.get_run(run_id))
+
+def _raise_missing_run(run_id: str):
+    """404 for unknown runs, 410 for runs that expired or were evicted."""
+    status = state_manager.run_status(run_id)
+    alias = None if status else state_manager.get_run(run_id)
+    if alias is not None and alias.alias_of:
+        # The alias outlived the run it points to
+        status = state_manager.run_status(alias.alias_of) or "evicted"
+    if status:
+        raise HTTPException(
+            status_code=410,
+            detail={"run_id": run_id, "status": status}
+        )
+    raise HTTPException(status_code=404, detail="Run not found")
+
+def _profile_mode(request) -> Optional[str]:
+    """
+    Profiler mode forced by a run request, or None. 409 for cProfile
+    while another run holds the process's cProfile session.
+    """
+    if not request.profile:
+        return None
+    if request.profile_mode is not None:
+        mode = request.profile_mode.value
+    else:
+        mode = settings.profile_mode
+    if mode == "cprofile" and runner is executor and profiler.cprofile_busy():
+        raise HTTPException(
+            status_code=409,
+            detail="Another run is being profiled with cProfile; retry later or use sampling"
+        )
+    return mode
+
+def _log_verbosity(request) -> Optional[str]:
+    """Run log verbosity requested, or None for the server default."""
+    return request.log_verbosity.value if request.log_verbosity else None
+
+def _log_fields(run, options: ResponseOptions, key: str = "logs") -> Dict[str, Any]:
+    """Response fields carrying a run's logs, shaped by ``options``."""
+    logs = shape_logs(
+        run.run_log, options.logs.value, options.log_offset, options.log_limit
+    )
+    if logs is None:
+        return {}
+    if options.logs == LogDetail.SUMMARY:
+        return {"log_summary": logs}
+    fields = {key: logs}
+    if options.log_offset or options.log_limit is not None:
+        fields["log_page"] = log_page(run.run_log, options.log_offset, options.log_limit)
+    return fields
+
+async def _admit(graph_id: str, state: Any, runs: int = 1) -> Ticket:
+    """
+    Admission ticket for up to ``runs`` concurrent runs holding
+    ``state``: 429 with Retry-After when the server is at its limits,
+    413 when the state can never fit.
+    """
+    try:
+        return await admission.acquire(graph_id, estimate_size(state), runs)
+    except AdmissionRejected as e:
+        headers = {"Retry-After": str(e.retry_after)} if e.status_code == 429 else None
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=headers)
+
+@asynccontextmanager
+async def _admitted(graph_id: str, initial_state: Dict[str, Any]):
+    """Hold an admission slot for a synchronous run."""
+    ticket = await _admit(graph_id, initial_state)
+    try:
+        yield
+    finally:
+        admission.release(ticket)
+
+def _admitted_stream(chunks: AsyncIterator, ticket: Ticket) -> StreamingResponse:
+    """
+    Stream NDJSON ``chunks`` while holding ``ticket``. It is released
+    when the stream ends, or if the response is dropped before it starts.
+    """
+    async def body():
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            admission.release(ticket)
+    
+    stream = body()
+    weakref.finalize(stream, admission.release, ticket)
+    return StreamingResponse(stream, media_type="application/x-ndjson")
+
+async def _execute(graph_id: str, initial_state: Dict[str, Any], request):
+    """
+    Run a graph synchronously under admission control. Opted-in runs
+    are coalesced with identical in-flight (or recently completed) runs;
+    profiled runs always execute on their own.
+    """
+    async def execute():
+        async with _admitted(graph_id, initial_state):
+            return await runner.execute(
+                graph_id,
+                initial_state,
+                deadline_seconds=request.deadline_seconds,
+                profile=_profile_mode(request),
+                log_verbosity=_log_verbosity(request)
+            )
+    
+    coalesce = settings.single_flight if request.coalesce is None else request.coalesce
+    if not coalesce or request.profile:
+        return await execute()
+    key = state_key(
+        graph_id, initial_state, request.deadline_seconds, _log_verbosity(request)
+    )
+    return await single_flight.run(key, execute)
+
+def _run_fields(run) -> Dict[str, Any]:
+    """Identity fields of a run response; aliases name the shared run."""
+    fields = {"run_id": run.run_id}
+    if run.alias_of:
+        fields["alias_of"] = run.alias_of
+    return fields
+
+def _check_code(code: str) -> None:
+    """413 for CodePrism sources over the configured size."""
+    limit = settings.max_code_bytes
+    if limit is None:
+        return
+    size = len(code)
+    if size <= limit < size * 4:  # characters undercount multi-byte text
+        size = len(code.encode("utf-8"))
+    if size > limit:
+        telemetry.admission_rejected.inc("code_too_large")
+        raise HTTPException(status_code=413, detail=f"Code exceeds {limit} bytes")
+
+async def _submit_run(graph_id: str, initial_state: Dict[str, Any], request) -> JSONResponse:
+    """Queue a run for background execution and answer 202."""
+    try:
+        run = await scheduler.submit(
+            graph_id,
+            initial_state,
+            priority=request.priority,
+            deadline_seconds=request.deadline_seconds,
+            profile=_profile_mode(request),
+            log_verbosity=_log_verbosity(request)
+        )
+    except QueueFullError as e:
+        telemetry.admission_rejected.inc("run_queue_full")
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    return JSONResponse(status_code=202, content={
+        "run_id": run.run_id,
+        "status": run.status,
+        "poll": f"/graph/state/{run.run_id}"
+    })
+
+def _prism_graph_id() -> str:
+    """The Prism graph's ID, registering the graph again if it was evicted."""
+    if executor.get_plan(PRISM_GRAPH_ID) is None:
+        executor.register_graph(PRISM_GRAPH)
+    return PRISM_GRAPH_ID
+
+def _prism_state(
+    code: str,
+    threshold: int,
+    max_iterations: int,
+    base_revision: Optional[str] = None
+) -> Dict[str, Any]:
+    """Initial state for a Code Prism review."""
+    state = {
+        "code": code,
+        "threshold": threshold,
+        "max_iterations": max_iterations,
+        "iteration": 0,
+        "quality_score": 0
+    }
+    if base_revision:
+        state["base_revision"] = base_revision
+    return state
+
+async def _batch_response(
+    graph_id: str,
+    initial_states: list,
+    concurrency: Optional[int],
+    deadline_seconds: Optional[float],
+    log_verbosity: Optional[str] = None
+) -> StreamingResponse:
+    """
+    Run a batch and stream one NDJSON result line per run, in completion
+    order, followed by a summary line. The batch is admitted as a whole,
+    holding a slot per concurrent run and the size of all its states.
+    """
+    if len(initial_states) > settings.max_batch_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {settings.max_batch_size} items"
+        )
+    if not executor.get_plan(graph_id):
+        raise HTTPException(status_code=404, detail=f"Graph '{graph_id}' not found")
+    limit = min(concurrency or settings.batch_concurrency, settings.batch_concurrency)
+    ticket = await _admit(graph_id, initial_states, min(limit, len(initial_states)) or 1)
+    
+    async def results():
+        started = time.perf_counter()
+        counts: Dict[str, int] = {}
+        async for index, run in runner.execute_batch(
+            graph_id, initial_states, limit, deadline_seconds, log_verbosity
+        ):
+            counts[run.status] = counts.get(run.status, 0) + 1
+            exec_time = None
+            if run.completed_at:
+                exec_time = (run.completed_at - run.started_at).total_seconds()
+            yield dumps({
+                "index": index,
+                "run_id": run.run_id,
+                "status": run.status,
+                "final_state": run.state,
+                "execution_time_seconds": exec_time,
+                "error": run.error
+            }) + b"\n"
+        yield dumps({
+            "summary": True,
+            "total": len(initial_states),
+            "by_status": counts,
+            "elapsed_seconds": time.perf_counter() - started
+        }) + b"\n"
+    
+    return _admitted_stream(results(), ticket)
+
+async def _repo_response(
+    sources: Iterator,
+    worst: int,
+    upload: Optional[BinaryIO] = None
+) -> StreamingResponse:
+    """
+    Review source files on the process pool and stream one NDJSON line
+    per file, in completion order, followed by the aggregate report.
+    The review is admitted as Prism runs, one per pool worker.
+    """
+    window = max(1, settings.process_pool_workers) * 2
+    try:
+        ticket = await _admit(PRISM_GRAPH_ID, None, max(1, settings.process_pool_workers))
+    except HTTPException:
+        if upload is not None:
+            upload.close()
+        raise
+    
+    async def results():
+        started = time.perf_counter()
+        report = RepoReport(worst=worst)
+        try:
+            async for entry in repo_reviewer.review(
+                sources, tool_hub.get_pool("process"), window
+            ):
+                report.add(entry)
+                yield json.dumps(entry) + "\n"
+            yield json.dumps({
+                "summary": True,
+                **report.summary(),
+                "elapsed_seconds": time.perf_counter() - started
+            }) + "\n"
+        finally:
+            if upload is not None:
+                upload.close()
+    
+    return _admitted_stream(results(), ticket)
 
 @app.get("/", tags=["system"])
 async def root():
@@ -53,9 +463,26 @@ async def health_check():
     return {
         "status": "QuantumFlow operational",
         "tools_registered": tool_hub.count(),
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "store": state_manager.stats(),
+        "scheduler": scheduler.stats(),
+        "admission": admission.stats(),
+        "single_flight": single_flight.stats()
     }
 
+@app.get("/metrics", tags=["system"], response_class=PlainTextResponse)
+async def metrics():
+    """Engine metrics in the Prometheus text exposition format."""
+    return PlainTextResponse(
+        telemetry.metrics.render(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+@app.get("/tools/cache", tags=["tools"])
+async def tool_cache_stats():
+    """Result cache hit/miss counters for pure tools."""
+    return tool_hub.result_cache.stats()
+
 @app.post("/graph/create", tags=["workflow"])
 async def create_graph(request: CreateGraphRequest):
     """Register a new workflow graph."""
@@ -70,7 +497,9 @@ async def create_graph(request: CreateGraphRequest):
             nodes=nodes,
             edges=request.edges,
             start_node=request.start_node,
-            description=request.description
+            description=request.description,
+            strict_conditions=request.strict_conditions,
+            max_concurrency=request.max_concurrency
         )
         
         graph_id = executor.register_graph(graph)
@@ -85,118 +514,328 @@ async def create_graph(request: CreateGraphRequest):
 
 @app.post("/graph/run", tags=["workflow"])
 async def run_graph(request: RunGraphRequest):
-    """Execute a workflow graph."""
+    """Execute a workflow graph (or queue it with ``submit``)."""
+    if request.submit:
+        return await _submit_run(request.graph_id, request.initial_state, request)
+    
     try:
-        run = await executor.execute(
-            request.graph_id,
-            request.initial_state
-        )
+        run = await _execute(request.graph_id, request.initial_state, request)
         
         exec_time = None
         if run.completed_at:
             exec_time = (run.completed_at - run.started_at).total_seconds()
         
-        return {
-            "run_id": run.run_id,
+        return FastJSONResponse({
+            **_run_fields(run),
             "status": run.status,
-            "final_state": run.state,
-            "logs": [
-                {
-                    "timestamp": log.timestamp.isoformat(),
-                    "level": log.level.value,
-                    "message": log.message
-                }
-                for log in run.logs
-            ],
+            "final_state": shape_state(
+                run.flow_state, request.include_state_keys, request.exclude_state_keys
+            ),
+            **_log_fields(run, request),
             "execution_time_seconds": exec_time,
             "error": run.error
-        }
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/graph/run/batch", tags=["workflow"])
+async def run_graph_batch(request: BatchRunRequest):
+    """Execute many initial states against one graph, streaming NDJSON results."""
+    return await _batch_response(
+        request.graph_id,
+        request.initial_states,
+        request.concurrency,
+        request.deadline_seconds,
+        _log_verbosity(request)
+    )
+
 @app.get("/graph/state/{run_id}", tags=["workflow"])
-async def get_run_state(run_id: str):
-    """Get workflow run status."""
-    run = state_manager.get_run(run_id)
+async def get_run_state(
+    run_id: str,
+    include_state_keys: Optional[List[str]] = Query(None),
+    exclude_state_keys: Optional[List[str]] = Query(None),
+    logs: LogDetail = LogDetail.NONE,
+    log_offset: int = Query(0, ge=0),
+    log_limit: Optional[int] = Query(None, ge=0)
+):
+    """Get workflow run status, optionally with a page of its logs."""
+    run = _get_run(run_id)
     
     if not run:
-        raise HTTPException(status_code=404, detail="Run not found")
+        _raise_missing_run(run_id)
     
     exec_time = None
     if run.completed_at:
         exec_time = (run.completed_at - run.started_at).total_seconds()
     
-    return {
+    options = ResponseOptions(logs=logs, log_offset=log_offset, log_limit=log_limit)
+    return FastJSONResponse({
+        **_run_fields(run),
+        "status": run.status,
+        "current_state": shape_state(run.flow_state, include_state_keys, exclude_state_keys),
+        **_log_fields(run, options),
+        "execution_time_seconds": exec_time,
+        "error": run.error
+    })
+
+@app.post("/graph/resume/{run_id}", tags=["workflow"])
+async def resume_run(run_id: str, request: Optional[ResumeRequest] = None):
+    """
+    Continue a failed, timed-out or cancelled run from its last
+    checkpoint. With ``from_step`` the run is replayed from that step
+    into a new run instead, for debugging.
+    """
+    request = request or ResumeRequest()
+    source = state_manager.get_run(run_id)
+    if source is None:
+        _raise_missing_run(run_id)
+    try:
+        async with _admitted(source.graph_id, source.state):
+            run = await runner.resume(
+                run_id,
+                request.from_step,
+                deadline_seconds=request.deadline_seconds,
+                profile=_profile_mode(request),
+                log_verbosity=_log_verbosity(request)
+            )
+    except ResumeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    exec_time = None
+    if run.completed_at:
+        exec_time = (run.completed_at - run.started_at).total_seconds()
+    
+    return FastJSONResponse({
         "run_id": run.run_id,
+        "source_run_id": run_id,
         "status": run.status,
-        "current_state": run.state,
-        "execution_time_seconds": exec_time
-    }
+        "final_state": shape_state(
+            run.flow_state, request.include_state_keys, request.exclude_state_keys
+        ),
+        **_log_fields(run, request),
+        "execution_time_seconds": exec_time,
+        "error": run.error
+    })
+
+@app.get("/graph/checkpoints/{run_id}", tags=["workflow"])
+async def list_checkpoints(run_id: str):
+    """A run's checkpoints: step, next node and the state keys changed."""
+    run = state_manager.get_run(run_id)
+    if not run:
+        _raise_missing_run(run_id)
+    if checkpoint_writer is None:
+        raise HTTPException(status_code=404, detail="Checkpointing is disabled")
+    plan = executor.get_plan(run.graph_id)
+    checkpoints = await run_in_threadpool(checkpoint_writer.load, run_id)
+    return FastJSONResponse({
+        "run_id": run_id,
+        "checkpoints": [
+            {
+                "step": c.step,
+                "next_node": plan.node_name(c.node) if plan else c.node,
+                "full": c.full,
+                "keys": sorted(c.delta)
+            }
+            for c in checkpoints
+        ]
+    })
+
+@app.get("/graph/stream/{run_id}", tags=["workflow"])
+async def stream_run(run_id: str, format: str = "sse"):
+    """
+    Stream a run's log and state-delta events as they happen.
+    
+    ``format=sse`` (default) sends Server-Sent Events; ``format=ndjson``
+    sends one JSON object per line. Logs recorded before the client
+    connected are replayed first; the stream ends with an ``end`` event.
+    """
+    if format not in ("sse", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'")
+    run = _get_run(run_id)
+    if not run:
+        _raise_missing_run(run_id)
+    
+    # Subscribe before snapshotting logs so no event falls in between.
+    # Cluster workers publish no events here, so their runs only replay.
+    active = run.status in ("queued", "running") and runner is executor
+    subscription = event_bus.subscribe(run_id) if active else None
+    backlog = [{"type": "log", **entry} for entry in run.run_log.render_all()]
+    
+    def encode(event: Dict[str, Any]) -> bytes:
+        data = dumps(event)
+        if format == "ndjson":
+            return data + b"\n"
+        return b"event: " + event["type"].encode() + b"\ndata: " + data + b"\n\n"
+    
+    async def events():
+        try:
+            for event in backlog:
+                yield encode(event)
+            if subscription is None:
+                yield encode({"type": END_EVENT, "status": run.status})
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), 15)
+                except asyncio.TimeoutError:
+                    if format == "sse":
+                        yield ": keep-alive\n\n"
+                    continue
+                yield encode(event)
+                if event["type"] == END_EVENT:
+                    return
+        finally:
+            if subscription is not None:
+                event_bus.unsubscribe(run_id, subscription)
+    
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/event-stream"
+    return StreamingResponse(
+        events(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/graph/profile/{run_id}", tags=["workflow"])
+async def get_run_profile(run_id: str, format: str = "json"):
+    """
+    Profile of a finished run: per-node breakdown as JSON, or with
+    ``format=collapsed`` the sampled stacks in collapsed (flamegraph) format.
+    """
+    if format not in ("json", "collapsed"):
+        raise HTTPException(status_code=400, detail="format must be 'json' or 'collapsed'")
+    run_profile = profiler.get(run_id)
+    if run_profile is None:
+        raise HTTPException(status_code=404, detail="No profile for this run")
+    if format == "collapsed":
+        return PlainTextResponse(run_profile.collapsed())
+    return run_profile.report()
+
+@app.post("/graph/cancel/{run_id}", tags=["workflow"])
+async def cancel_run(run_id: str):
+    """Cancel a queued or running submitted run."""
+    if not await scheduler.cancel(run_id):
+        run = state_manager.get_run(run_id)
+        if not run:
+            _raise_missing_run(run_id)
+        raise HTTPException(
+            status_code=409,
+            detail=f"Run '{run_id}' is not active (status: {run.status})"
+        )
+    return {"run_id": run_id, "cancelled": True}
+
+@app.post("/graph/state/{run_id}/pin", tags=["workflow"])
+async def pin_run(run_id: str):
+    """Exempt a run from eviction."""
+    if not state_manager.pin_run(run_id):
+        _raise_missing_run(run_id)
+    return {"run_id": run_id, "pinned": True}
+
+@app.delete("/graph/state/{run_id}/pin", tags=["workflow"])
+async def unpin_run(run_id: str):
+    """Allow a pinned run to be evicted again."""
+    state_manager.unpin_run(run_id)
+    return {"run_id": run_id, "pinned": False}
 
 @app.post("/prism/run", tags=["agents"])
 async def run_prism_agent(request: PrismRunRequest):
     """Execute the Code Review (Prism) workflow."""
-    # Build Prism graph
-    graph = Graph(
-        name="CodePrism",
-        nodes={
-            "extract": NodeConfig(
-                type="function", 
-                function="function_extractor"
-            ),
-            "analyze": NodeConfig(
-                type="function",
-                function="complexity_analyzer"
-            ),
-            "suggest": NodeConfig(
-                type="function",
-                function="improvement_suggester"
-            ),
-            "checkpoint": NodeConfig(
-                type="function",
-                function="quality_checkpoint"
-            )
-        },
-        edges={
-            "extract": "analyze",
-            "analyze": "suggest",
-            "suggest": "checkpoint",
-            "checkpoint": {
-                "type": "conditional",
-                "condition": "stop == True",
-                "if_true": "end",
-                "if_false": "extract"
-            }
-        },
-        start_node="extract"
-    )
+    graph_id = _prism_graph_id()
+    
+    _check_code(request.code)
     
-    graph_id = executor.register_graph(graph)
+    # Incremental review: re-analyze only what changed since the base
+    base_revision = request.base_revision
+    if request.base_run_id:
+        base_run = _get_run(request.base_run_id)
+        if not base_run:
+            _raise_missing_run(request.base_run_id)
+        base_revision = base_run.state.get("revision")
+    
+    initial_state = _prism_state(
+        request.code, request.threshold, request.max_iterations, base_revision
+    )
+    if request.submit:
+        return await _submit_run(graph_id, initial_state, request)
     
     # Execute workflow
-    run = await executor.execute(graph_id, {
-        "code": request.code,
-        "threshold": request.threshold,
-        "max_iterations": request.max_iterations,
-        "iteration": 0,
-        "quality_score": 0
-    })
+    run = await _execute(graph_id, initial_state, request)
     
     exec_time = None
     if run.completed_at:
         exec_time = (run.completed_at - run.started_at).total_seconds()
     
-    return {
-        "run_id": run.run_id,
-        "status": run.status,
-        "final_state": run.state,
-        "execution_log": [
+    log_fields = _log_fields(run, request, key="execution_log")
+    if "execution_log" in log_fields:
+        log_fields["execution_log"] = [
             {
-                "step": i + 1,
-                "timestamp": log.timestamp.isoformat(),
-                "message": log.message
+                "step": request.log_offset + i + 1,
+                "timestamp": entry["timestamp"],
+                "message": entry["message"]
             }
-            for i, log in enumerate(run.logs)
-        ],
+            for i, entry in enumerate(log_fields["execution_log"])
+        ]
+    
+    return FastJSONResponse({
+        **_run_fields(run),
+        "status": run.status,
+        "final_state": shape_state(
+            run.flow_state, request.include_state_keys, request.exclude_state_keys
+        ),
+        **log_fields,
         "execution_time_seconds": exec_time
-    }
\ No newline at end of file
+    })
+
+@app.post("/prism/run/batch", tags=["agents"])
+async def run_prism_batch(request: PrismBatchRequest):
+    """Review many code blobs in one request, streaming NDJSON results."""
+    for code in request.codes:
+        _check_code(code)
+    graph_id = _prism_graph_id()
+    initial_states = [
+        _prism_state(code, request.threshold, request.max_iterations)
+        for code in request.codes
+    ]
+    return await _batch_response(
+        graph_id,
+        initial_states,
+        request.concurrency,
+        request.deadline_seconds,
+        _log_verbosity(request)
+    )
+
+@app.post("/prism/repo", tags=["agents"])
+async def review_repo(request: PrismRepoRequest):
+    """Review every Python file under a local directory, streaming NDJSON."""
+    try:
+        sources = directory_sources(
+            request.path, settings.repo_root, settings.repo_max_file_bytes
+        )
+    except RepoReviewError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await _repo_response(sources, request.worst)
+
+@app.post("/prism/repo/upload", tags=["agents"])
+async def review_repo_archive(
+    archive: UploadFile = File(..., description="zip or tar(.gz/.bz2/.xz) archive"),
+    worst: int = Form(10)
+):
+    """Review every Python file in an uploaded archive, streaming NDJSON."""
+    if archive.size is not None and archive.size > settings.max_archive_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Archive exceeds {settings.max_archive_bytes} bytes"
+        )
+    
+    # Own a copy of the upload; it is read while the response streams
+    spool = tempfile.TemporaryFile()
+    await run_in_threadpool(shutil.copyfileobj, archive.file, spool)
+    try:
+        sources = await run_in_threadpool(
+            archive_sources, spool, settings.repo_max_file_bytes
+        )
+    except RepoReviewError as e:
+        spool.close()
+        raise HTTPException(status_code=400, detail=str(e))
+    return await _repo_response(sources, worst, spool)
\ No newline at end of file
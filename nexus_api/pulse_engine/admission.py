@@ -0,0 +1,193 @@
+"""
+Admission - Concurrency and in-flight state limits for synchronous runs.
+"""
+from typing import Dict, Any, Optional, Tuple
+from collections import deque
+import asyncio
+import math
+import time
+
+from nexus_api.pulse_engine import telemetry
+
+class AdmissionRejected(RuntimeError):
+    """Raised when a run is refused; carries the HTTP status and retry hint."""
+    
+    def __init__(self, message: str, reason: str, status_code: int = 429, retry_after: int = 1):
+        super().__init__(message)
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class Ticket:
+    """An admitted run's (or batch's) share of the limits."""
+    __slots__ = ("graph_id", "size", "runs", "admitted_at", "released")
+    
+    def __init__(self, graph_id: str, size: int, runs: int = 1):
+        self.graph_id = graph_id
+        self.size = size
+        self.runs = runs
+        self.admitted_at = time.perf_counter()
+        self.released = False
+
+class AdmissionController:
+    """
+    Caps concurrent runs (globally and per graph) and the summed state
+    bytes of admitted runs.
+    
+    A run that does not fit waits up to ``max_wait`` seconds in a FIFO
+    of at most ``max_waiting`` entries, then is rejected with a
+    Retry-After based on recent run durations. Waiters are admitted in
+    order as capacity frees; one blocked only by its own graph's limit
+    does not hold up waiters for other graphs. ``None`` disables a limit.
+    
+    A batch is admitted as a whole, holding one slot per run it may
+    execute at a time.
+    """
+    
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        max_per_graph: Optional[int] = None,
+        max_state_bytes: Optional[int] = None,
+        max_wait: float = 0.0,
+        max_waiting: int = 1000
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_graph = max_per_graph
+        self.max_state_bytes = max_state_bytes
+        self.max_wait = max_wait
+        self.max_waiting = max_waiting
+        self.active = 0
+        self.state_bytes = 0
+        self._per_graph: Dict[str, int] = {}
+        self._waiters: "deque[Tuple[asyncio.Future, str, int, int]]" = deque()
+        self._avg_seconds = 1.0  # moving average of admitted run time
+    
+    def _fits(self, graph_id: str, size: int, runs: int = 1) -> Optional[str]:
+        """None if the runs fit now, else the name of the limit in the way."""
+        if self.max_concurrent is not None and self.active + runs > self.max_concurrent:
+            return "concurrency"
+        if self.max_per_graph is not None \
+                and self._per_graph.get(graph_id, 0) + runs > self.max_per_graph:
+            return "graph_concurrency"
+        if self.max_state_bytes is not None and self.active \
+                and self.state_bytes + size > self.max_state_bytes:
+            return "state_bytes"
+        return None
+    
+    def _admit(self, graph_id: str, size: int, runs: int) -> Ticket:
+        self.active += runs
+        self.state_bytes += size
+        self._per_graph[graph_id] = self._per_graph.get(graph_id, 0) + runs
+        return Ticket(graph_id, size, runs)
+    
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait: about one run's duration."""
+        return max(1, math.ceil(self._avg_seconds))
+    
+    def _reject(self, reason: str, message: str) -> AdmissionRejected:
+        telemetry.admission_rejected.inc(reason)
+        return AdmissionRejected(message, reason, retry_after=self.retry_after())
+    
+    async def acquire(self, graph_id: str, size: int = 0, runs: int = 1) -> Ticket:
+        """
+        Admit ``runs`` concurrent runs (capped at the limits) with
+        ``size`` bytes of state, waiting up to ``max_wait``; raises
+        AdmissionRejected.
+        """
+        if self.max_state_bytes is not None and size > self.max_state_bytes:
+            telemetry.admission_rejected.inc("state_too_large")
+            raise AdmissionRejected(
+                f"Run state of {size} bytes exceeds the {self.max_state_bytes} byte limit",
+                "state_too_large", status_code=413
+            )
+        for limit in (self.max_concurrent, self.max_per_graph):
+            if limit is not None:
+                runs = min(runs, limit)
+        blocked = self._fits(graph_id, size, runs)
+        # Queued waiters go first unless only the per-graph limit blocks them
+        if blocked is None and all(
+            self._fits(g, s, r) == "graph_concurrency" for _, g, s, r in self._waiters
+        ):
+            return self._admit(graph_id, size, runs)
+        if blocked is None:
+            blocked = "queued"
+        if self.max_wait <= 0:
+            raise self._reject(blocked, f"Server busy ({blocked} limit reached)")
+        if len(self._waiters) >= self.max_waiting:
+            raise self._reject("queue_full", "Admission queue is full")
+        
+        future = asyncio.get_running_loop().create_future()
+        entry = (future, graph_id, size, runs)
+        self._waiters.append(entry)
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+        except asyncio.TimeoutError:
+            if future.done():  # admitted as the wait expired
+                return future.result()
+            raise self._reject("wait_timeout", f"Server busy; not admitted within {self.max_wait}s")
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(future.result())
+            raise
+        finally:
+            telemetry.admission_wait_seconds.observe(time.perf_counter() - started)
+            if not future.done():
+                future.cancel()
+                self._remove(entry)
+    
+    def _remove(self, entry) -> None:
+        try:
+            self._waiters.remove(entry)
+        except ValueError:
+            pass
+    
+    def release(self, ticket: Ticket) -> None:
+        """
+        Return an admitted ticket's share and admit waiters that now
+        fit. Releasing a ticket again does nothing.
+        """
+        if ticket.released:
+            return
+        ticket.released = True
+        self.active -= ticket.runs
+        self.state_bytes -= ticket.size
+        remaining = self._per_graph.get(ticket.graph_id, ticket.runs) - ticket.runs
+        if remaining:
+            self._per_graph[ticket.graph_id] = remaining
+        else:
+            self._per_graph.pop(ticket.graph_id, None)
+        if ticket.runs == 1:  # batches would skew the per-run estimate
+            elapsed = time.perf_counter() - ticket.admitted_at
+            self._avg_seconds += (elapsed - self._avg_seconds) * 0.1
+        self._wake()
+    
+    def _wake(self) -> None:
+        for entry in list(self._waiters):
+            future, graph_id, size, runs = entry
+            if future.done():
+                self._remove(entry)
+                continue
+            blocked = self._fits(graph_id, size, runs)
+            if blocked is None:
+                self._remove(entry)
+                future.set_result(self._admit(graph_id, size, runs))
+            elif blocked != "graph_concurrency":
+                break
+    
+    def waiting(self) -> int:
+        """Runs waiting for admission."""
+        return len(self._waiters)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Current usage against the configured limits."""
+        return {
+            "active_runs": self.active,
+            "max_concurrent": self.max_concurrent,
+            "max_per_graph": self.max_per_graph,
+            "state_bytes": self.state_bytes,
+            "max_state_bytes": self.max_state_bytes,
+            "waiting": self.waiting(),
+            "max_wait_seconds": self.max_wait
+        }
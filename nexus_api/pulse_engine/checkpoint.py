@@ -0,0 +1,167 @@
+"""
+Checkpoint - Step-level run checkpoints and their batched writer.
+"""
+from typing import Dict, Any, Optional, List
+import copy
+import pickle
+import threading
+
+from nexus_api.pulse_engine.storage import StorageBackend
+
+class ResumeError(ValueError):
+    """Raised when a run cannot be resumed or replayed."""
+
+_IMMUTABLE = (str, bytes, int, float, bool, type(None))
+
+def snapshot_delta(delta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Point-in-time copy of a state delta. Tools may mutate the values
+    they were handed in place, so containers are copied (a pickle round
+    trip, falling back to deepcopy) while immutable scalars are shared.
+    """
+    snapshot = {}
+    for key, value in delta.items():
+        if not isinstance(value, _IMMUTABLE):
+            try:
+                value = pickle.loads(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+            except Exception:
+                value = copy.deepcopy(value)
+        snapshot[key] = value
+    return snapshot
+
+class Checkpoint:
+    """
+    Progress of a run after ``step`` steps: the next node index to
+    execute and the state delta since the previous checkpoint. A
+    ``full`` checkpoint carries the whole state instead of a delta.
+    """
+    __slots__ = ("run_id", "step", "node", "delta", "full")
+    
+    def __init__(
+        self,
+        run_id: str,
+        step: int,
+        node: int,
+        delta: Dict[str, Any],
+        full: bool = False
+    ):
+        self.run_id = run_id
+        self.step = step
+        self.node = node
+        self.delta = delta
+        self.full = full
+
+def rebuild_state(checkpoints: List[Checkpoint], step: Optional[int] = None) -> Checkpoint:
+    """
+    Fold checkpoints (ordered by step) into one full checkpoint at the
+    latest step not after ``step`` (default: the last checkpoint).
+    """
+    target = None
+    for i, checkpoint in enumerate(checkpoints):
+        if step is not None and checkpoint.step > step:
+            break
+        target = i
+    if target is None:
+        raise ResumeError(
+            "No checkpoint recorded" if step is None
+            else f"No checkpoint at or before step {step}"
+        )
+    
+    first = target
+    while first > 0 and not checkpoints[first].full:
+        first -= 1
+    if not checkpoints[first].full:
+        raise ResumeError("Checkpoint history is incomplete")
+    
+    state: Dict[str, Any] = {}
+    for checkpoint in checkpoints[first:target + 1]:
+        state.update(checkpoint.delta)
+    last = checkpoints[target]
+    return Checkpoint(last.run_id, last.step, last.node, state, full=True)
+
+class CheckpointWriter:
+    """
+    Buffers checkpoints and hands them to the storage backend in
+    batches from a background thread, so recording one costs the
+    executor a list append.
+    
+    ``every`` sets how many steps pass between checkpoints.
+    """
+    
+    def __init__(
+        self,
+        storage: StorageBackend,
+        every: int = 10,
+        flush_interval: float = 0.05,
+        batch_size: int = 256
+    ):
+        self.storage = storage
+        self.every = every
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: List[Checkpoint] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self.metrics: Dict[str, int] = {"recorded": 0, "batches_written": 0, "errors": 0}
+    
+    def record(self, checkpoint: Checkpoint) -> None:
+        """Queue a checkpoint for the next batch."""
+        with self._lock:
+            self._pending.append(checkpoint)
+            pending = len(self._pending)
+            if self._writer is None and not self._stop.is_set():
+                self._writer = threading.Thread(
+                    target=self._write_loop, name="qflow-checkpoint-writer", daemon=True
+                )
+                self._writer.start()
+        self.metrics["recorded"] += 1
+        if pending >= self.batch_size:
+            self._wake.set()
+    
+    def load(self, run_id: str) -> List[Checkpoint]:
+        """A run's checkpoints ordered by step, including buffered ones."""
+        self.flush()
+        return self.storage.get_checkpoints(run_id)
+    
+    def flush(self) -> None:
+        """Write all buffered checkpoints now."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                self.storage.save_checkpoints(batch)
+            except Exception:
+                with self._lock:
+                    self._pending[:0] = batch
+                raise
+            self.metrics["batches_written"] += 1
+    
+    def _write_loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                self.metrics["errors"] += 1
+                print(f"✗ Checkpoint writer error: {e}")
+        self.flush()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Buffered checkpoints and writer counters."""
+        with self._lock:
+            pending = len(self._pending)
+        return {"every": self.every, "pending": pending, **self.metrics}
+    
+    def close(self) -> None:
+        """Flush buffered checkpoints and stop the writer thread."""
+        self._stop.set()
+        self._wake.set()
+        if self._writer is not None:
+            self._writer.join(timeout=5)
+        self.flush()
@@ -0,0 +1,290 @@
+"""
+Cluster - API-side dispatch of runs to worker processes via the work queue.
+"""
+from typing import Dict, Any, Optional, List, Set, Tuple, AsyncIterator
+from datetime import datetime
+import asyncio
+import time
+
+from nexus_api.schemas.flow_models import WorkflowRun
+from nexus_api.pulse_engine.work_queue import WorkQueue
+from nexus_api.pulse_engine.checkpoint import ResumeError
+from nexus_api.pulse_engine.run_log import LogEvent
+
+Outcome = Tuple[Optional[str], Optional[str]]
+
+def _run_args(deadline_seconds: Optional[float], profile: Optional[str]) -> Dict[str, Any]:
+    # Deadlines count from submission, as with the local scheduler
+    return {
+        "deadline_at": time.time() + deadline_seconds if deadline_seconds else None,
+        "profile": profile
+    }
+
+class ClusterDispatcher:
+    """
+    Stands in for both the RunScheduler and the executor's run methods
+    when runs execute in ``nexus_api.worker`` processes.
+    
+    Runs are created and stored here, then queued as jobs; synchronous
+    callers wait for their job's outcome and read the finished run back
+    from the shared store. One poller checks every awaited job per tick.
+    
+    Queue and store reads run in worker threads, never on the event
+    loop. Queue depth is refreshed by the poller and, with the other
+    queue stats, every ``stats_interval`` seconds, so metrics scrapes
+    and /health read cached values.
+    """
+    
+    def __init__(
+        self,
+        executor: Any,
+        queue: WorkQueue,
+        poll_interval: float = 0.02,
+        stats_interval: float = 1.0
+    ):
+        self.executor = executor
+        self.storage = executor.state_manager
+        self.queue = queue
+        self.poll_interval = poll_interval
+        self.stats_interval = stats_interval
+        self._waiters: Dict[int, asyncio.Future] = {}
+        self._poller: Optional[asyncio.Task] = None
+        self._monitor: Optional[asyncio.Task] = None
+        self._abandoned: Set[asyncio.Task] = set()
+        self._depth = 0
+        self._queue_stats: Dict[str, Any] = {}
+        self.metrics: Dict[str, int] = {"submitted": 0, "cancelled": 0}
+    
+    async def start(self) -> None:
+        """Start refreshing queue stats; workers run in their own processes."""
+        await self._refresh_stats()
+        self._monitor = asyncio.create_task(self._watch_queue(), name="qflow-cluster-stats")
+    
+    async def stop(self) -> None:
+        """Stop polling; queued jobs stay queued for the workers."""
+        for task in (self._poller, self._monitor):
+            if task is not None:
+                task.cancel()
+        self._poller = self._monitor = None
+        for future in self._waiters.values():
+            future.cancel()
+        self._waiters.clear()
+    
+    async def _refresh_stats(self) -> None:
+        def read() -> Tuple[int, Dict[str, Any]]:
+            return self.queue.depth(), self.queue.stats()
+        
+        self._depth, self._queue_stats = await asyncio.to_thread(read)
+    
+    async def _watch_queue(self) -> None:
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            try:
+                await self._refresh_stats()
+            except Exception as e:
+                print(f"✗ Work queue stats error: {e}")
+    
+    async def _enqueue(
+        self,
+        kind: str,
+        run_ids: List[str],
+        args: Dict[str, Any],
+        priority: int = 0,
+        awaited: bool = False
+    ) -> List[int]:
+        """Queue one job per run with a single flush and transaction."""
+        def enqueue() -> List[int]:
+            # Workers read the runs and graph from the store, so commit them first
+            self.storage.flush()
+            return self.queue.enqueue_many(kind, run_ids, args, priority, awaited)
+        
+        job_ids = await asyncio.to_thread(enqueue)
+        for run_id in run_ids:
+            self.storage.release_run(run_id)
+        self._depth += len(job_ids)  # until the next refresh
+        self.metrics["submitted"] += len(run_ids)
+        return job_ids
+    
+    async def _run_job(
+        self,
+        graph_id: str,
+        initial_state: Dict[str, Any],
+        priority: int,
+        deadline_seconds: Optional[float],
+        profile: Optional[str],
+        log_verbosity: Optional[str],
+        awaited: bool
+    ) -> Tuple[WorkflowRun, int]:
+        run = self.executor.create_run(graph_id, initial_state, "queued", log_verbosity)
+        job_ids = await self._enqueue(
+            "run", [run.run_id], _run_args(deadline_seconds, profile), priority, awaited
+        )
+        return run, job_ids[0]
+    
+    async def submit(
+        self,
+        graph_id: str,
+        initial_state: Dict[str, Any],
+        priority: int = 0,
+        deadline_seconds: Optional[float] = None,
+        profile: Optional[str] = None,
+        log_verbosity: Optional[str] = None
+    ) -> WorkflowRun:
+        """Queue a run for the workers and return its (queued) record."""
+        run, _ = await self._run_job(
+            graph_id, initial_state, priority, deadline_seconds, profile, log_verbosity, False
+        )
+        return run
+    
+    async def _wait(self, job_id: int, run_id: str) -> Outcome:
+        """Wait for a job's outcome; cancelling the caller cancels the run."""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[job_id] = future
+        if self._poller is None:
+            self._poller = asyncio.create_task(self._poll(), name="qflow-cluster-poller")
+        try:
+            return await future
+        except asyncio.CancelledError:
+            self._waiters.pop(job_id, None)
+            # The caller is gone; clean up in a task of our own
+            task = asyncio.create_task(self._abandon(job_id, run_id))
+            self._abandoned.add(task)
+            task.add_done_callback(self._abandoned.discard)
+            raise
+    
+    async def _abandon(self, job_id: int, run_id: str) -> None:
+        """Stop awaiting a job and cancel its run."""
+        await asyncio.to_thread(self.queue.discard, job_id)
+        await self.cancel(run_id)
+    
+    async def _poll(self) -> None:
+        def check(job_ids: List[int]) -> Dict[int, Outcome]:
+            finished = self.queue.outcomes(job_ids)
+            self._depth = self.queue.depth()
+            return finished
+        
+        try:
+            delay = self.poll_interval / 8
+            while self._waiters:
+                await asyncio.sleep(delay)
+                finished = await asyncio.to_thread(check, list(self._waiters))
+                for job_id, outcome in finished.items():
+                    future = self._waiters.pop(job_id, None)
+                    if future is not None and not future.done():
+                        future.set_result(outcome)
+                # Poll quickly while jobs are finishing, back off when idle
+                delay = self.poll_interval / 8 if finished else min(delay * 2, self.poll_interval)
+        finally:
+            self._poller = None
+    
+    async def execute(
+        self,
+        graph_id: str,
+        initial_state: Dict[str, Any],
+        deadline_seconds: Optional[float] = None,
+        profile: Optional[str] = None,
+        log_verbosity: Optional[str] = None
+    ) -> WorkflowRun:
+        """Run a graph on a worker and return the finished run."""
+        run, job_id = await self._run_job(
+            graph_id, initial_state, 0, deadline_seconds, profile, log_verbosity, True
+        )
+        await self._wait(job_id, run.run_id)
+        return await asyncio.to_thread(self.storage.get_run, run.run_id) or run
+    
+    async def execute_batch(
+        self,
+        graph_id: str,
+        initial_states: List[Dict[str, Any]],
+        concurrency: int,
+        deadline_seconds: Optional[float] = None,
+        log_verbosity: Optional[str] = None
+    ) -> AsyncIterator[Tuple[int, WorkflowRun]]:
+        """
+        Queue every state at once and yield ``(index, run)`` pairs in
+        completion order. Concurrency is bounded by the workers, so
+        ``concurrency`` is not used.
+        """
+        if not self.executor.get_plan(graph_id):
+            raise ValueError(f"Graph '{graph_id}' not found")
+        # Store every run first so the whole batch is committed at once
+        runs = [
+            self.executor.create_run(graph_id, state, "queued", log_verbosity)
+            for state in initial_states
+        ]
+        job_ids = await self._enqueue(
+            "run", [run.run_id for run in runs],
+            _run_args(deadline_seconds, None), awaited=True
+        )
+        jobs = list(zip(runs, job_ids))
+        
+        async def wait(index: int, run: WorkflowRun, job_id: int):
+            await self._wait(job_id, run.run_id)
+            return index, await asyncio.to_thread(self.storage.get_run, run.run_id) or run
+        
+        waits = [asyncio.ensure_future(wait(i, run, job_id)) for i, (run, job_id) in enumerate(jobs)]
+        try:
+            for finished in asyncio.as_completed(waits):
+                yield await finished
+        finally:
+            for task in waits:
+                task.cancel()
+    
+    async def resume(
+        self,
+        run_id: str,
+        from_step: Optional[int] = None,
+        deadline_seconds: Optional[float] = None,
+        profile: Optional[str] = None,
+        log_verbosity: Optional[str] = None
+    ) -> WorkflowRun:
+        """Resume or replay a run on a worker; see GraphExecutor.resume."""
+        if await asyncio.to_thread(self.queue.is_pending, run_id):
+            raise ResumeError(f"Run '{run_id}' is still queued or running")
+        job_ids = await self._enqueue("resume", [run_id], {
+            "from_step": from_step,
+            "deadline_seconds": deadline_seconds,
+            "profile": profile,
+            "log_verbosity": log_verbosity
+        }, awaited=True)
+        result, error = await self._wait(job_ids[0], run_id)
+        if error is not None:
+            raise ResumeError(error)
+        return await asyncio.to_thread(self.storage.get_run, result)
+    
+    async def cancel(self, run_id: str) -> bool:
+        """Cancel a queued or running run. Returns False if it has no pending job."""
+        def cancel_job() -> Optional[str]:
+            state = self.queue.cancel_run(run_id)
+            if state != "queued":
+                return state
+            run = self.storage.get_run(run_id)
+            if run is not None and run.status == "queued":
+                run.status = "cancelled"
+                run.error = "Run was cancelled before starting"
+                run.completed_at = datetime.utcnow()
+                self.executor._log(run, LogEvent.CANCELLED, payload=run.error)
+                self.storage.save_run(run_id, run)
+            return state
+        
+        state = await asyncio.to_thread(cancel_job)
+        if state is None:
+            return False
+        if state == "queued":
+            self._depth = max(0, self._depth - 1)
+        self.metrics["cancelled"] += 1
+        return True
+    
+    def queue_depth(self) -> int:
+        """Jobs waiting for a worker, as of the last refresh."""
+        return self._depth
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue state (as of the last refresh) and dispatch counters."""
+        return {
+            "mode": "cluster",
+            "queue_depth": self._depth,
+            "awaiting": len(self._waiters),
+            **self._queue_stats,
+            **self.metrics
+        }
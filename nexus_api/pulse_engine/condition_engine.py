@@ -0,0 +1,161 @@
+"""
+Condition Engine - Parses edge conditions once into restricted predicates.
+"""
+from typing import Dict, Any, Callable
+import ast
+import operator
+
+Evaluator = Callable[[Dict[str, Any]], Any]
+
+class ConditionError(ValueError):
+    """Raised for invalid conditions, or failed evaluation in strict mode."""
+
+_COMPARE_OPS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+}
+
+_UNARY_OPS = {
+    ast.Not: operator.not_,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+def _build(node: ast.AST, source: str) -> Evaluator:
+    """Turn a restricted AST node into a closure over the state."""
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return lambda state: value
+
+    if isinstance(node, ast.Name):
+        key = node.id
+
+        def lookup(state):
+            try:
+                return state[key]
+            except KeyError:
+                raise ConditionError(f"State key '{key}' not found")
+        return lookup
+
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        items = [_build(item, source) for item in node.elts]
+        factory = {ast.List: list, ast.Tuple: tuple, ast.Set: frozenset}[type(node)]
+        return lambda state: factory(item(state) for item in items)
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        op = _UNARY_OPS[type(node.op)]
+        operand = _build(node.operand, source)
+        return lambda state: op(operand(state))
+
+    if isinstance(node, ast.BoolOp):
+        values = [_build(value, source) for value in node.values]
+        if isinstance(node.op, ast.And):
+            def all_of(state):
+                result = True
+                for value in values:
+                    result = value(state)
+                    if not result:
+                        return result
+                return result
+            return all_of
+
+        def any_of(state):
+            result = False
+            for value in values:
+                result = value(state)
+                if result:
+                    return result
+            return result
+        return any_of
+
+    if isinstance(node, ast.Compare):
+        left = _build(node.left, source)
+        pairs = []
+        for op, comparator in zip(node.ops, node.comparators):
+            if type(op) not in _COMPARE_OPS:
+                break
+            pairs.append((_COMPARE_OPS[type(op)], _build(comparator, source)))
+        else:
+            if len(pairs) == 1:
+                op, right = pairs[0]
+                return lambda state: op(left(state), right(state))
+
+            def chained(state):
+                current = left(state)
+                for op, right in pairs:
+                    value = right(state)
+                    if not op(current, value):
+                        return False
+                    current = value
+                return True
+            return chained
+
+    raise ConditionError(
+        f"Unsupported {type(node).__name__} expression in condition '{source}'"
+    )
+
+def parse_condition(source: str) -> Evaluator:
+    """Parse a condition string into an evaluator."""
+    try:
+        tree = ast.parse(source.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ConditionError(f"Invalid condition '{source}': {e.msg}")
+    return _build(tree.body, source)
+
+class ConditionEngine:
+    """
+    Compiles the conditions of one graph into predicates.
+
+    Each graph gets its own engine while it is compiled: an expression
+    used on several edges is parsed once, and the evaluators live in
+    the plan's predicates, so they are freed with the plan.
+    """
+
+    def __init__(self):
+        self._evaluators: Dict[str, Evaluator] = {}
+
+    def _evaluator(self, source: str) -> Evaluator:
+        evaluator = self._evaluators.get(source)
+        if evaluator is None:
+            evaluator = self._evaluators[source] = parse_condition(source)
+        return evaluator
+
+    def compile(
+        self,
+        source: str,
+        strict: bool = False
+    ) -> Callable[[Dict[str, Any]], bool]:
+        """
+        Compile a condition into a boolean predicate.
+
+        In strict mode evaluation errors raise ConditionError; otherwise
+        they evaluate to False and the edge takes its false branch.
+        """
+        evaluator = self._evaluator(source)
+
+        if strict:
+            def strict_predicate(state: Dict[str, Any]) -> bool:
+                try:
+                    return bool(evaluator(state))
+                except ConditionError:
+                    raise
+                except Exception as e:
+                    raise ConditionError(
+                        f"Condition '{source}' failed: {e}"
+                    ) from e
+            return strict_predicate
+
+        def predicate(state: Dict[str, Any]) -> bool:
+            try:
+                return bool(evaluator(state))
+            except Exception:
+                return False
+        return predicate
@@ -0,0 +1,79 @@
+"""
+Event Bus - Per-run pub/sub for streaming execution events.
+"""
+from typing import Dict, Any, List
+import asyncio
+
+from nexus_api.settings import settings
+
+END_EVENT = "end"
+
+class Subscription:
+    """A subscriber's bounded event buffer."""
+    __slots__ = ("queue", "dropped")
+    
+    def __init__(self, buffer_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = 0
+    
+    def offer(self, event: Dict[str, Any]) -> None:
+        """Enqueue without blocking; drop the oldest event when full."""
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(event)
+
+class RunEventBus:
+    """
+    Fan-out of run events to subscribers.
+    
+    Publishing never blocks the executor: each subscriber has a bounded
+    buffer and a slow consumer loses its oldest events instead. Runs
+    without subscribers cost a single dict lookup per event.
+    """
+    
+    def __init__(self, buffer_size: int = 256):
+        self.buffer_size = buffer_size
+        self._subscribers: Dict[str, List[Subscription]] = {}
+    
+    def subscribe(self, run_id: str) -> Subscription:
+        """Subscribe to a run's events."""
+        subscription = Subscription(self.buffer_size)
+        self._subscribers.setdefault(run_id, []).append(subscription)
+        return subscription
+    
+    def unsubscribe(self, run_id: str, subscription: Subscription) -> None:
+        """Remove a subscriber."""
+        subscribers = self._subscribers.get(run_id)
+        if not subscribers:
+            return
+        if subscription in subscribers:
+            subscribers.remove(subscription)
+        if not subscribers:
+            del self._subscribers[run_id]
+    
+    def has_subscribers(self, run_id: str) -> bool:
+        """True if anyone is listening to this run."""
+        return run_id in self._subscribers
+    
+    def publish(self, run_id: str, event: Dict[str, Any]) -> None:
+        """Deliver an event to every subscriber of the run."""
+        subscribers = self._subscribers.get(run_id)
+        if not subscribers:
+            return
+        for subscription in subscribers:
+            subscription.offer(event)
+    
+    def close(self, run_id: str, status: str) -> None:
+        """Send the end-of-run event and drop the run's subscribers."""
+        subscribers = self._subscribers.pop(run_id, None)
+        if not subscribers:
+            return
+        for subscription in subscribers:
+            subscription.offer({"type": END_EVENT, "status": status})
+
+# Global event bus instance
+event_bus = RunEventBus(buffer_size=settings.stream_buffer_size)
@@ -1,174 +1,504 @@
 """
 Graph Executor - Core workflow execution engine.
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator
+import asyncio
+import time
 import uuid
 from datetime import datetime
 
-from nexus_api.schemas.flow_models import (
-    Graph, NodeConfig, WorkflowRun, ExecutionLog, LogLevel
-)
+from nexus_api.schemas.flow_models import Graph, WorkflowRun
 from nexus_api.pulse_engine.tool_hub import ToolRegistry
-from nexus_api.pulse_engine.memory_core import StateManager
+from nexus_api.pulse_engine.storage import StorageBackend
+from nexus_api.pulse_engine.flow_plan import (
+    ExecutionPlan, PlanNode, END, compile_graph, graph_fingerprint
+)
+from nexus_api.pulse_engine.flow_state import FlowState
+from nexus_api.pulse_engine.event_bus import RunEventBus
+from nexus_api.pulse_engine.run_log import RunLog, LogEvent
+from nexus_api.pulse_engine.checkpoint import (
+    Checkpoint, CheckpointWriter, ResumeError, rebuild_state, snapshot_delta
+)
+from nexus_api.pulse_engine import telemetry
+from nexus_api.pulse_engine.profiler import (
+    Profiler, RunProfile, active_profile, active_node
+)
 
 class GraphExecutor:
     """
     Executes workflow graphs with state management and control flow.
+    
+    Graphs are compiled into an ExecutionPlan once, at registration;
+    execution walks the plan by node index.
     """
     
-    def __init__(self, tool_registry: ToolRegistry, state_manager: StateManager):
+    max_steps = 100
+    
+    def __init__(
+        self,
+        tool_registry: ToolRegistry,
+        state_manager: StorageBackend,
+        event_bus: Optional[RunEventBus] = None,
+        profiler: Optional[Profiler] = None,
+        log_verbosity: str = "steps",
+        log_cap: int = 1000,
+        checkpoints: Optional[CheckpointWriter] = None
+    ):
         self.tool_registry = tool_registry
         self.state_manager = state_manager
+        self.event_bus = event_bus
+        self.profiler = profiler
+        self.log_verbosity = log_verbosity
+        self.log_cap = log_cap
+        self.checkpoints = checkpoints
+        self._plans: Dict[str, ExecutionPlan] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._labels: Dict[str, Tuple[str, Tuple[str, ...]]] = {}
+        self._running: set = set()
+        state_manager.on_graph_evicted(self._forget_graph)
     
     def register_graph(self, graph: Graph) -> str:
-        """Register a new graph and return its ID."""
-        graph_id = f"g-{uuid.uuid4().hex[:12]}"
+        """
+        Compile and register a graph and return its ID.
+        
+        Graph IDs are content-addressed: registering an identical
+        definition again reuses the stored graph and compiled plan.
+        """
+        graph_id = graph_fingerprint(graph)
+        if self.state_manager.get_graph(graph_id) is not None:
+            if graph_id not in self._plans:
+                self._plans[graph_id] = compile_graph(graph_id, graph, self.tool_registry)
+            return graph_id
+        
+        plan = compile_graph(graph_id, graph, self.tool_registry)
         self.state_manager.save_graph(graph_id, graph)
+        self._plans[graph_id] = plan
         return graph_id
     
+    def _forget_graph(self, graph_id: str) -> None:
+        """Drop cached plan data for a graph evicted from the store."""
+        self._plans.pop(graph_id, None)
+        self._semaphores.pop(graph_id, None)
+        self._labels.pop(graph_id, None)
+    
+    def _metric_labels(self, plan: ExecutionPlan) -> Tuple[str, Tuple[str, ...]]:
+        """
+        The plan's graph label and per-node labels for metrics, with
+        names beyond the telemetry label limits reported as "other".
+        """
+        labels = self._labels.get(plan.graph_id)
+        if labels is None:
+            other = telemetry.OTHER
+            graph = plan.name if telemetry.graph_labels.admit(plan.name) else other
+            nodes = tuple(
+                name if graph != other and telemetry.node_labels.admit((graph, name)) else other
+                for name in plan.node_names
+            )
+            labels = self._labels[plan.graph_id] = (graph, nodes)
+        return labels
+    
+    def get_plan(self, graph_id: str) -> Optional[ExecutionPlan]:
+        """Return the compiled plan for a graph, compiling it on first use."""
+        plan = self._plans.get(graph_id)
+        if plan is None:
+            graph = self.state_manager.get_graph(graph_id)
+            if not graph:
+                return None
+            plan = compile_graph(graph_id, graph, self.tool_registry)
+            self._plans[graph_id] = plan
+        return plan
+    
+    def create_run(
+        self,
+        graph_id: str,
+        initial_state: Dict[str, Any],
+        status: str = "queued",
+        log_verbosity: Optional[str] = None
+    ) -> WorkflowRun:
+        """Create and store a run record without executing it."""
+        plan = self.get_plan(graph_id)
+        if not plan:
+            raise ValueError(f"Graph '{graph_id}' not found")
+        return self._new_run(plan, initial_state, status, log_verbosity)
+    
+    def _new_run(
+        self,
+        plan: ExecutionPlan,
+        initial_state: Dict[str, Any],
+        status: str,
+        log_verbosity: Optional[str] = None
+    ) -> WorkflowRun:
+        run_id = f"r-{uuid.uuid4().hex[:12]}"
+        started_at = datetime.utcnow()
+        run = WorkflowRun(
+            run_id=run_id,
+            graph_id=plan.graph_id,
+            state=FlowState(initial_state),
+            log=RunLog(
+                plan.node_names, log_verbosity or self.log_verbosity,
+                cap=self.log_cap, started_at=started_at
+            ),
+            status=status,
+            started_at=started_at
+        )
+        self.state_manager.save_run(run_id, run)
+        return run
+    
     async def execute(
         self, 
         graph_id: str, 
-        initial_state: Dict[str, Any]
+        initial_state: Dict[str, Any],
+        deadline_seconds: Optional[float] = None,
+        profile: Optional[str] = None,
+        log_verbosity: Optional[str] = None
     ) -> WorkflowRun:
         """
         Execute a workflow graph with the given initial state.
         """
-        graph = self.state_manager.get_graph(graph_id)
-        if not graph:
+        run = self.create_run(graph_id, initial_state, "running", log_verbosity)
+        return await self.execute_run(run, deadline_seconds, profile=profile)
+    
+    async def execute_batch(
+        self,
+        graph_id: str,
+        initial_states: List[Dict[str, Any]],
+        concurrency: int,
+        deadline_seconds: Optional[float] = None,
+        log_verbosity: Optional[str] = None
+    ) -> AsyncIterator[Tuple[int, WorkflowRun]]:
+        """
+        Execute many initial states against one graph.
+        
+        The plan is resolved once for the whole batch and at most
+        ``concurrency`` runs execute at a time. Yields ``(index, run)``
+        pairs in completion order.
+        """
+        plan = self.get_plan(graph_id)
+        if not plan:
             raise ValueError(f"Graph '{graph_id}' not found")
+        if not initial_states:
+            return
         
-        run_id = f"r-{uuid.uuid4().hex[:12]}"
-        state = initial_state.copy()
-        logs = []
+        finished: asyncio.Queue = asyncio.Queue()
+        pending = iter(enumerate(initial_states))
         
-        run = WorkflowRun(
-            run_id=run_id,
-            graph_id=graph_id,
-            state=state,
-            status="running",
-            logs=logs,
-            started_at=datetime.utcnow()
-        )
+        async def worker():
+            # Workers share one iterator, so each state is taken once
+            for index, initial_state in pending:
+                run = self._new_run(plan, initial_state, "running", log_verbosity)
+                await self.execute_run(run, deadline_seconds, plan=plan)
+                finished.put_nowait((index, run))
         
-        self.state_manager.save_run(run_id, run)
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(max(1, min(concurrency, len(initial_states))))
+        ]
+        try:
+            for _ in range(len(initial_states)):
+                yield await finished.get()
+        finally:
+            for task in workers:
+                task.cancel()
+    
+    async def execute_run(
+        self,
+        run: WorkflowRun,
+        deadline_seconds: Optional[float] = None,
+        plan: Optional[ExecutionPlan] = None,
+        profile: Optional[str] = None,
+        start: Optional[Checkpoint] = None
+    ) -> WorkflowRun:
+        """
+        Execute a previously created run.
         
+        With ``deadline_seconds`` the run is stopped and marked
+        ``timed_out`` once the deadline passes. Cancelling the calling
+        task marks the run ``cancelled``. ``profile`` names a profiler
+        mode to force; otherwise the profiler's sample rate applies.
+        ``start`` continues from a checkpoint instead of the start node.
+        """
+        if run.status == "queued":
+            run.status = "running"
+            run.started_at = datetime.utcnow()
+            self.state_manager.save_run(run.run_id, run)
+        
+        started = time.perf_counter()
+        graph_label = telemetry.OTHER
+        telemetry.active_runs.inc()
+        self._running.add(run.run_id)
+        run_profile = None
+        if self.profiler is not None:
+            run_profile = self.profiler.start(run.run_id, profile)
+        token = active_profile.set(run_profile) if run_profile else None
         try:
-            current_node = graph.start_node
-            max_steps = 100
-            step = 0
+            plan = plan or self.get_plan(run.graph_id)
+            if not plan:
+                raise ValueError(f"Graph '{run.graph_id}' not found")
             
-            while current_node and current_node != "end" and step < max_steps:
-                step += 1
-                
-                # Log step
-                self._log(run, LogLevel.INFO, 
-                         f"Step {step}: Executing '{current_node}'")
-                
-                # Execute node
-                node_config = graph.nodes.get(current_node)
-                if not node_config:
-                    raise ValueError(f"Node '{current_node}' not found")
-                
-                state = await self._execute_node(node_config, state, run)
-                run.state = state
-                
-                # Determine next node
-                current_node = self._get_next_node(
-                    current_node, 
-                    graph.edges, 
-                    state
+            graph_label = self._metric_labels(plan)[0]
+            if deadline_seconds is None:
+                step = await self._drive(plan, run, start)
+            else:
+                step = await asyncio.wait_for(
+                    self._drive(plan, run, start), deadline_seconds
                 )
-                
-                # Log transition
-                if current_node and current_node != "end":
-                    self._log(run, LogLevel.INFO, 
-                             f"→ Transitioning to '{current_node}'")
-            
-            if step >= max_steps:
-                raise RuntimeError("Maximum steps reached - possible infinite loop")
+            telemetry.run_steps.observe(step, graph_label)
             
             run.status = "completed"
             run.completed_at = datetime.utcnow()
-            self._log(run, LogLevel.INFO, 
-                     f"✓ Workflow completed in {step} steps")
-            
+            self._log(run, LogEvent.COMPLETED, payload=step)
+        
+        except asyncio.TimeoutError:
+            run.status = "timed_out"
+            run.completed_at = datetime.utcnow()
+            run.error = "Run deadline exceeded"
+            self._log(run, LogEvent.TIMED_OUT, payload=run.error)
+        
+        except asyncio.CancelledError:
+            run.status = "cancelled"
+            run.completed_at = datetime.utcnow()
+            run.error = "Run was cancelled"
+            self._log(run, LogEvent.CANCELLED)
+            self._record_run(run, graph_label, started)
+            self._end_profile(run_profile, token)
+            self.state_manager.save_run(run.run_id, run)
+            self.close_stream(run)
+            raise
+        
         except Exception as e:
             run.status = "failed"
             run.completed_at = datetime.utcnow()
             run.error = str(e)
-            self._log(run, LogLevel.ERROR, f"✗ Workflow failed: {str(e)}")
+            self._log(run, LogEvent.FAILED, payload=str(e))
         
-        self.state_manager.save_run(run_id, run)
+        self._record_run(run, graph_label, started)
+        self._end_profile(run_profile, token)
+        self.state_manager.save_run(run.run_id, run)
+        self.close_stream(run)
         return run
     
-    async def _execute_node(
-        self, 
-        node_config: NodeConfig, 
-        state: Dict[str, Any],
-        run: WorkflowRun
-    ) -> Dict[str, Any]:
-        """Execute a single node."""
-        if node_config.type == "function":
-            func_name = node_config.function
-            if not func_name:
-                raise ValueError("Function name not specified")
+    def _end_profile(self, run_profile: Optional[RunProfile], token) -> None:
+        """Detach a run's profile from the task and store its report."""
+        if run_profile is not None:
+            active_profile.reset(token)
+            self.profiler.finish(run_profile)
+    
+    def _record_run(self, run: WorkflowRun, graph_label: str, started: float) -> None:
+        """Update run metrics once a run reaches its final status."""
+        telemetry.active_runs.dec()
+        self._running.discard(run.run_id)
+        telemetry.runs_total.inc(graph_label, run.status)
+        telemetry.run_seconds.observe(time.perf_counter() - started, graph_label)
+        telemetry.run_state_keys.observe(len(run.flow_state), graph_label)
+    
+    async def resume(
+        self,
+        run_id: str,
+        from_step: Optional[int] = None,
+        deadline_seconds: Optional[float] = None,
+        profile: Optional[str] = None,
+        log_verbosity: Optional[str] = None
+    ) -> WorkflowRun:
+        """
+        Continue a stopped run from its last checkpoint.
+        
+        With ``from_step`` the run is instead replayed from the latest
+        checkpoint at or before that step into a new run, leaving the
+        original untouched; any finished run can be replayed.
+        """
+        run = self.state_manager.get_run(run_id)
+        if run is None:
+            raise ResumeError(f"Run '{run_id}' not found")
+        # A "running" run not executing here was orphaned by a restart
+        if run_id in self._running:
+            raise ResumeError(f"Run '{run_id}' is still running")
+        if from_step is None and run.status == "completed":
+            raise ResumeError(f"Run '{run_id}' already completed; pass from_step to replay")
+        if self.checkpoints is None:
+            raise ResumeError("Checkpointing is disabled")
+        plan = self.get_plan(run.graph_id)
+        if not plan:
+            raise ResumeError(f"Graph '{run.graph_id}' not found")
+        
+        # Loading flushes buffered checkpoints to storage
+        checkpoints = await asyncio.to_thread(self.checkpoints.load, run_id)
+        start = rebuild_state(checkpoints, from_step)
+        if start.node == END:
+            raise ResumeError(f"Run '{run_id}' had finished by step {start.step}")
+        # The stored checkpoints must not see the resumed run's mutations
+        start.delta = snapshot_delta(start.delta)
+        
+        if from_step is None:
+            # Checked again: another resume may have started it meanwhile
+            if run_id in self._running:
+                raise ResumeError(f"Run '{run_id}' is still running")
+            run.status = "running"
+            run.error = None
+            run.started_at = datetime.utcnow()
+            run.completed_at = None
+            run.state = FlowState(start.delta)
+        else:
+            run = self._new_run(plan, start.delta, "running", log_verbosity)
+        self._log(run, LogEvent.RESUMED, start.node, start.step)
+        self.state_manager.save_run(run.run_id, run)
+        return await self.execute_run(
+            run, deadline_seconds, plan=plan, profile=profile, start=start
+        )
+    
+    async def _drive(
+        self,
+        plan: ExecutionPlan,
+        run: WorkflowRun,
+        start: Optional[Checkpoint] = None
+    ) -> int:
+        """
+        Walk the plan from its start node (or a checkpoint); returns the
+        step count. Every ``checkpoints.every`` steps the next node and
+        the state delta since the previous checkpoint are recorded,
+        copied so later in-place mutations cannot rewrite history.
+        """
+        state = run.flow_state
+        nodes = plan.nodes
+        graph_label, node_labels = self._metric_labels(plan)
+        max_steps = self.max_steps
+        verbose = run.run_log.steps
+        step = start.step if start else 0
+        index = start.node if start else plan.start
+        
+        writer = self.checkpoints
+        every = writer.every if writer is not None else None
+        if every:
+            # The first checkpoint holds the whole state it starts from
+            writer.record(Checkpoint(
+                run.run_id, step, index, snapshot_delta(state.materialize()), full=True
+            ))
+            state.track_changes()
+            checkpoint_step = step
+        
+        while index != END:
+            if step >= max_steps:
+                raise RuntimeError("Maximum steps reached - possible infinite loop")
+            step += 1
+            node = nodes[index]
+            
+            # Log step
+            if verbose:
+                self._log(run, LogEvent.STEP, index, step)
             
-            tool = self.tool_registry.get_tool(func_name)
-            if not tool:
-                available = self.tool_registry.list_tools()
-                raise ValueError(
-                    f"Tool '{func_name}' not found. "
-                    f"Available: {available}"
+            # Execute node and record its result as a state delta
+            started = time.perf_counter()
+            result = await self._call_tool(node, state)
+            state.apply(result)
+            self._publish_delta(run, node.name, result)
+            telemetry.node_seconds.observe(
+                time.perf_counter() - started, graph_label, node_labels[index]
+            )
+            
+            # Fan out to parallel branches and merge at the join
+            if node.branches:
+                step += len(node.branches) + 1
+                join = nodes[node.join]
+                if verbose:
+                    self._log(run, LogEvent.FAN_OUT, index, node.branches)
+                partials = await self._fan_out(plan, node.branches, state)
+                merged = join.merge(partials)
+                state.apply(merged)
+                self._publish_delta(run, join.name, merged)
+                if verbose:
+                    self._log(run, LogEvent.JOIN, node.join, len(partials))
+                node = join
+            
+            # Determine next node
+            if node.predicate is None:
+                index = node.target
+            else:
+                started = time.perf_counter()
+                index = node.next_index(state)
+                telemetry.condition_seconds.observe(
+                    time.perf_counter() - started, graph_label, node_labels[node.index]
                 )
             
-            # Execute tool
-            result = await tool(state)
+            # Log transition
+            if verbose and index != END:
+                self._log(run, LogEvent.TRANSITION, index)
             
-            # Merge result into state
-            return {**state, **result}
+            if every and (step - checkpoint_step >= every or index == END):
+                writer.record(Checkpoint(
+                    run.run_id, step, index, snapshot_delta(state.take_changes())
+                ))
+                checkpoint_step = step
         
-        raise ValueError(f"Unknown node type: {node_config.type}")
+        return step
     
-    def _get_next_node(
-        self, 
-        current_node: str, 
-        edges: Dict[str, Any], 
-        state: Dict[str, Any]
-    ) -> Optional[str]:
-        """Determine next node based on edges and state."""
-        edge = edges.get(current_node)
-        
-        if not edge:
-            return "end"
-        
-        # Simple edge
-        if isinstance(edge, str):
-            return edge
-        
-        # Conditional edge
-        if isinstance(edge, dict):
-            condition = edge.get("condition", "")
-            if_true = edge.get("if_true", "end")
-            if_false = edge.get("if_false", "end")
-            
-            try:
-                # Safe eval with state context
-                result = eval(condition, {"__builtins__": {}}, state)
-                return if_true if result else if_false
-            except Exception:
-                return if_false
-        
-        return "end"
-    
-    def _log(self, run: WorkflowRun, level: LogLevel, message: str):
-        """Add a log entry."""
-        log = ExecutionLog(
-            timestamp=datetime.utcnow(),
-            level=level,
-            message=message
-        )
-        run.logs.append(log)
+    async def _fan_out(
+        self,
+        plan: ExecutionPlan,
+        branches: Tuple[int, ...],
+        state: FlowState
+    ) -> List[Dict[str, Any]]:
+        """Run branch nodes concurrently, bounded by the graph's limit."""
+        nodes = plan.nodes
+        graph_label, node_labels = self._metric_labels(plan)
+        
+        async def timed(node: PlanNode):
+            started = time.perf_counter()
+            result = await self._call_tool(node, state)
+            telemetry.node_seconds.observe(
+                time.perf_counter() - started, graph_label, node_labels[node.index]
+            )
+            return result
+        
+        if not plan.max_concurrency:
+            return await asyncio.gather(*(timed(nodes[b]) for b in branches))
+        
+        semaphore = self._semaphores.get(plan.graph_id)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(plan.max_concurrency)
+            self._semaphores[plan.graph_id] = semaphore
+        
+        async def run_branch(node: PlanNode):
+            async with semaphore:
+                return await timed(node)
+        
+        return await asyncio.gather(*(run_branch(nodes[b]) for b in branches))
+    
+    async def _call_tool(self, node: PlanNode, state: FlowState) -> Dict[str, Any]:
+        """Call a node's tool, recording its latency and errors."""
+        profile = active_profile.get()
+        if profile is not None:
+            token = active_node.set(node.name)
+        started = time.perf_counter()
+        try:
+            # Tools get their own dict; the run's state only changes via deltas
+            return await node.tool(state.copy())
+        except Exception:
+            telemetry.tool_errors.inc(node.tool_name)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            telemetry.tool_seconds.observe(elapsed, node.tool_name)
+            if profile is not None:
+                profile.record_node(node.name, elapsed)
+                active_node.reset(token)
+    
+    def _log(self, run: WorkflowRun, event: LogEvent, node: int = END, payload: Any = None):
+        """Record a log event; it is rendered to text only for stream subscribers."""
+        log = run.run_log
+        record = log.add(event, node, payload)
+        bus = self.event_bus
+        if record is not None and bus is not None and bus.has_subscribers(run.run_id):
+            bus.publish(run.run_id, {"type": "log", **log.render(record)})
+    
+    def _publish_delta(self, run: WorkflowRun, node: str, delta: Dict[str, Any]):
+        """Stream a node's state delta to any subscribers."""
+        bus = self.event_bus
+        if bus is not None and bus.has_subscribers(run.run_id):
+            bus.publish(run.run_id, {"type": "state", "node": node, "delta": delta})
+    
+    def close_stream(self, run: WorkflowRun):
+        """Signal the end of a run to stream subscribers."""
+        if self.event_bus is not None:
+            self.event_bus.close(run.run_id, run.status)
 
 # Global executor instance (will be initialized in main.py)
 executor = None
\ No newline at end of file
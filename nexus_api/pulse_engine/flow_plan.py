@@ -0,0 +1,254 @@
+"""
+Flow Plan - Compiles graph definitions into immutable executable plans.
+"""
+from typing import Dict, Any, Optional, Callable, List, Tuple
+import hashlib
+import json
+
+from nexus_api.schemas.flow_models import Graph
+from nexus_api.pulse_engine.tool_hub import ToolRegistry
+from nexus_api.pulse_engine.condition_engine import ConditionEngine, ConditionError
+from nexus_api.pulse_engine.state_merge import MergeFn, build_merge
+
+END_NODE = "end"
+END = -1
+
+class GraphCompileError(ValueError):
+    """Raised when a graph definition cannot be compiled."""
+
+class PlanNode:
+    """
+    A single compiled node: resolved tool plus its outgoing transition.
+    
+    Simple edges only set ``target``; conditional edges set ``predicate``
+    and route to ``if_true`` / ``if_false``. Parallel edges set
+    ``branches`` and the ``join`` node whose ``merge`` combines them.
+    """
+    __slots__ = (
+        "index", "name", "kind", "tool", "tool_name", "target",
+        "predicate", "condition", "if_true", "if_false",
+        "branches", "join", "merge"
+    )
+    
+    def __init__(
+        self,
+        index: int,
+        name: str,
+        kind: str = "function",
+        tool: Optional[Callable] = None,
+        tool_name: Optional[str] = None,
+        target: int = END,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        condition: Optional[str] = None,
+        if_true: int = END,
+        if_false: int = END,
+        branches: Tuple[int, ...] = (),
+        join: int = END,
+        merge: Optional[MergeFn] = None
+    ):
+        self.index = index
+        self.name = name
+        self.kind = kind
+        self.tool = tool
+        self.tool_name = tool_name
+        self.target = target
+        self.predicate = predicate
+        self.condition = condition
+        self.if_true = if_true
+        self.if_false = if_false
+        self.branches = branches
+        self.join = join
+        self.merge = merge
+    
+    def next_index(self, state: Dict[str, Any]) -> int:
+        """Resolve the index of the next node for the given state."""
+        if self.predicate is None:
+            return self.target
+        return self.if_true if self.predicate(state) else self.if_false
+
+class ExecutionPlan:
+    """Immutable, validated execution plan for a registered graph."""
+    __slots__ = (
+        "graph_id", "name", "nodes", "node_names", "index", "start", "max_concurrency"
+    )
+    
+    def __init__(
+        self,
+        graph_id: str,
+        name: str,
+        nodes: Tuple[PlanNode, ...],
+        index: Dict[str, int],
+        start: int,
+        max_concurrency: Optional[int] = None
+    ):
+        self.graph_id = graph_id
+        self.name = name
+        self.nodes = nodes
+        self.node_names = tuple(node.name for node in nodes)
+        self.index = index
+        self.start = start
+        self.max_concurrency = max_concurrency
+    
+    def node_name(self, index: int) -> str:
+        """Map a node index back to its name."""
+        return END_NODE if index == END else self.nodes[index].name
+
+def graph_fingerprint(graph: Graph) -> str:
+    """
+    Content address of a graph: a hash of its canonical JSON definition.
+    Identical definitions always map to the same graph ID.
+    """
+    canonical = json.dumps(
+        graph.model_dump(mode="json"),
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return f"g-{hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]}"
+
+def compile_graph(
+    graph_id: str,
+    graph: Graph,
+    tool_registry: ToolRegistry
+) -> ExecutionPlan:
+    """
+    Compile a graph into an execution plan.
+    
+    Validates tools, edge targets and reachability so broken graphs
+    fail at registration rather than mid-run. Edge conditions are
+    compiled into the plan's nodes, so evaluating one is a call.
+    """
+    names = list(graph.nodes.keys())
+    if END_NODE in graph.nodes:
+        raise GraphCompileError(f"'{END_NODE}' is a reserved node name")
+    index = {name: i for i, name in enumerate(names)}
+    
+    if graph.start_node not in index:
+        raise GraphCompileError(f"Start node '{graph.start_node}' not found")
+    
+    def resolve_target(source: str, target: Any) -> int:
+        if target == END_NODE:
+            return END
+        if not isinstance(target, str) or target not in index:
+            raise GraphCompileError(
+                f"Edge from '{source}' points to unknown node '{target}'"
+            )
+        return index[target]
+    
+    for source in graph.edges:
+        if source not in index:
+            raise GraphCompileError(f"Edge source '{source}' is not a node")
+    
+    nodes: List[PlanNode] = []
+    for i, name in enumerate(names):
+        node_config = graph.nodes[name]
+        if node_config.type == "join":
+            try:
+                merge = build_merge(node_config.config)
+            except ValueError as e:
+                raise GraphCompileError(f"Join node '{name}': {e}")
+            nodes.append(PlanNode(i, name, kind="join", merge=merge))
+            continue
+        if node_config.type != "function":
+            raise GraphCompileError(
+                f"Unknown node type '{node_config.type}' for node '{name}'"
+            )
+        if not node_config.function:
+            raise GraphCompileError(f"Function name not specified for node '{name}'")
+        
+        tool = tool_registry.get_tool(node_config.function)
+        if not tool:
+            raise GraphCompileError(
+                f"Tool '{node_config.function}' not found for node '{name}'. "
+                f"Available: {tool_registry.list_tools()}"
+            )
+        nodes.append(PlanNode(i, name, tool=tool, tool_name=node_config.function))
+    
+    if nodes[index[graph.start_node]].kind == "join":
+        raise GraphCompileError("Start node cannot be a join node")
+    
+    conditions = ConditionEngine()
+    branch_nodes = set()
+    for plan_node in nodes:
+        name = plan_node.name
+        edge = graph.edges.get(name)
+        if not edge:
+            plan_node.target = END
+        elif isinstance(edge, str):
+            plan_node.target = resolve_target(name, edge)
+        elif isinstance(edge, dict) and edge.get("type") == "parallel":
+            branches = edge.get("branches") or []
+            if len(branches) < 2 or len(set(branches)) != len(branches):
+                raise GraphCompileError(
+                    f"Parallel edge from '{name}' needs two or more distinct branches"
+                )
+            plan_node.branches = tuple(resolve_target(name, b) for b in branches)
+            plan_node.join = resolve_target(name, edge.get("join"))
+            if nodes[plan_node.join].kind != "join":
+                raise GraphCompileError(
+                    f"Parallel edge from '{name}' must join on a 'join' node"
+                )
+            branch_nodes.update(plan_node.branches)
+        elif isinstance(edge, dict):
+            condition = edge.get("condition")
+            if not condition or not isinstance(condition, str):
+                raise GraphCompileError(f"Conditional edge from '{name}' has no condition")
+            plan_node.condition = condition
+            try:
+                plan_node.predicate = conditions.compile(
+                    condition, strict=graph.strict_conditions
+                )
+            except ConditionError as e:
+                raise GraphCompileError(f"Edge from '{name}': {e}")
+            plan_node.if_true = resolve_target(name, edge.get("if_true", END_NODE))
+            plan_node.if_false = resolve_target(name, edge.get("if_false", END_NODE))
+        else:
+            raise GraphCompileError(f"Unsupported edge definition for '{name}'")
+    
+    for branch in branch_nodes:
+        branch_node = nodes[branch]
+        if branch_node.kind != "function":
+            raise GraphCompileError(f"Branch '{branch_node.name}' must be a function node")
+        if branch_node.name in graph.edges:
+            raise GraphCompileError(
+                f"Branch '{branch_node.name}' cannot have its own outgoing edge"
+            )
+    
+    # Reachability from the start node; join nodes may only be entered
+    # through a parallel edge.
+    seen = {index[graph.start_node]}
+    frontier = [index[graph.start_node]]
+    while frontier:
+        node = nodes[frontier.pop()]
+        if node.branches:
+            targets = node.branches + (node.join,)
+        elif node.predicate is None:
+            targets = (node.target,)
+        else:
+            targets = (node.if_true, node.if_false)
+        if not node.branches and any(
+            t != END and nodes[t].kind == "join" for t in targets
+        ):
+            raise GraphCompileError(
+                f"Join node can only follow a parallel edge (from '{node.name}')"
+            )
+        for target in targets:
+            if target != END and target not in seen:
+                seen.add(target)
+                frontier.append(target)
+    
+    unreachable = [name for name in names if index[name] not in seen]
+    if unreachable:
+        raise GraphCompileError(f"Unreachable nodes: {unreachable}")
+    
+    max_concurrency = graph.max_concurrency
+    if max_concurrency is not None and max_concurrency < 1:
+        raise GraphCompileError("max_concurrency must be at least 1")
+    
+    return ExecutionPlan(
+        graph_id=graph_id,
+        name=graph.name,
+        nodes=tuple(nodes),
+        index=index,
+        start=index[graph.start_node],
+        max_concurrency=max_concurrency
+    )
@@ -0,0 +1,105 @@
+"""
+Flow State - Copy-on-write workflow state built from per-step deltas.
+"""
+from typing import Dict, Any, Iterator, Optional, Set
+from collections.abc import Mapping
+
+_MISSING = object()
+
+class FlowState(Mapping):
+    """
+    Read-only mapping over a shared base dict plus the deltas applied
+    by each step.
+    
+    Tool results are folded into a small overlay of changed keys rather
+    than merged into a new dict per step. The full dict is only
+    materialized on demand, and cached until the next delta. Tools are
+    handed a plain ``copy()``, which they may mutate and return.
+    """
+    __slots__ = ("_base", "_overlay", "_changed", "_materialized")
+    
+    def __init__(
+        self,
+        base: Optional[Dict[str, Any]] = None,
+        overlay: Optional[Dict[str, Any]] = None
+    ):
+        self._base = base if base is not None else {}
+        self._overlay: Dict[str, Any] = overlay if overlay is not None else {}
+        self._changed: Optional[Set[str]] = None
+        self._materialized: Optional[Dict[str, Any]] = None
+    
+    def apply(self, delta: Dict[str, Any]) -> None:
+        """Record a step's delta."""
+        if not delta:
+            return
+        self._overlay.update(delta)
+        if self._changed is not None:
+            self._changed.update(delta)
+        self._materialized = None
+    
+    def __getitem__(self, key: str) -> Any:
+        value = self._overlay.get(key, _MISSING)
+        if value is _MISSING:
+            return self._base[key]
+        return value
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._overlay.get(key, _MISSING)
+        if value is _MISSING:
+            return self._base.get(key, default)
+        return value
+    
+    def __contains__(self, key: object) -> bool:
+        return key in self._overlay or key in self._base
+    
+    def __iter__(self) -> Iterator[str]:
+        yield from self._base
+        for key in self._overlay:
+            if key not in self._base:
+                yield key
+    
+    def __len__(self) -> int:
+        return len(self._base) + sum(1 for k in self._overlay if k not in self._base)
+    
+    def __reduce__(self):
+        # Cross-process tools receive a plain dict, not the delta history
+        return (dict, (self.materialize(),))
+    
+    def __repr__(self) -> str:
+        return f"FlowState({self.materialize()!r})"
+    
+    def track_changes(self) -> None:
+        """Start collecting the keys changed by later deltas."""
+        self._changed = set()
+    
+    def take_changes(self) -> Dict[str, Any]:
+        """
+        The keys changed since the last call (or ``track_changes``) with
+        their current values, i.e. all deltas since then merged.
+        """
+        changed = self._changed or ()
+        delta = {key: self._overlay[key] for key in changed}
+        self._changed = set()
+        return delta
+    
+    def copy(self) -> Dict[str, Any]:
+        """A plain dict of the current state that the caller may mutate."""
+        if self._materialized is not None:
+            return dict(self._materialized)
+        return {**self._base, **self._overlay}
+    
+    def snapshot(self) -> "FlowState":
+        """
+        Cheap point-in-time view: shares the base and copies only the
+        overlay of changed keys.
+        """
+        return FlowState(self._base, dict(self._overlay))
+    
+    def materialize(self) -> Dict[str, Any]:
+        """Build (and cache) the full state dict."""
+        if self._materialized is None:
+            if not self._overlay:
+                self._materialized = dict(self._base)
+            else:
+                self._materialized = {**self._base, **self._overlay}
+        return self._materialized
@@ -1,30 +1,190 @@
 """
 Memory Core - In-memory storage for graphs and execution runs.
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable, List, Tuple
+from collections import OrderedDict
+import sys
+import threading
+import time
 
-class StateManager:
-    """Manages in-memory storage of graphs and workflow runs."""
+from nexus_api.settings import settings
+from nexus_api.pulse_engine.storage import StorageBackend
+
+ACTIVE_STATUSES = ("queued", "running")
+
+def estimate_size(obj: Any, _depth: int = 0) -> int:
+    """Rough recursive size estimate in bytes for run payloads."""
+    size = sys.getsizeof(obj)
+    if _depth > 8:
+        return size
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += estimate_size(key, _depth + 1) + estimate_size(value, _depth + 1)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += estimate_size(item, _depth + 1)
+    elif hasattr(type(obj), "model_fields"):
+        # Pydantic models: fields plus the (computed) run state and log
+        for value in vars(obj).values():
+            size += estimate_size(value, _depth + 1)
+        state = getattr(obj, "state", None)
+        if isinstance(state, dict):
+            size += estimate_size(state, _depth + 1)
+        run_log = getattr(obj, "run_log", None)
+        if run_log is not None:
+            size += run_log.estimated_size()
+    return size
+
+class _RunEntry:
+    """Stored run plus its accounting data."""
+    __slots__ = ("run", "size", "saved_at")
+    
+    def __init__(self, run: Any, size: int, saved_at: float):
+        self.run = run
+        self.size = size
+        self.saved_at = saved_at
+
+class StateManager(StorageBackend):
+    """
+    Manages in-memory storage of graphs and workflow runs.
+    
+    Runs are bounded by count, estimated bytes and TTL (oldest finished
+    runs go first; active and pinned runs are never evicted). A run's
+    checkpoints count towards its bytes and go with it. Graphs are
+    kept in an LRU. Expired run IDs are remembered so lookups can report
+    "expired" rather than "not found".
+    """
     
-    def __init__(self):
-        self.graphs: Dict[str, Any] = {}
-        self.runs: Dict[str, Any] = {}
+    def __init__(
+        self,
+        max_runs: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        run_ttl_seconds: Optional[float] = None,
+        max_graphs: Optional[int] = None,
+        max_tombstones: int = 10000
+    ):
+        self.max_runs = max_runs
+        self.max_bytes = max_bytes
+        self.run_ttl_seconds = run_ttl_seconds
+        self.max_graphs = max_graphs
+        self.max_tombstones = max_tombstones
+        self.graphs: "OrderedDict[str, Any]" = OrderedDict()
+        self.runs: "OrderedDict[str, _RunEntry]" = OrderedDict()
+        self._tombstones: "OrderedDict[str, str]" = OrderedDict()
+        self._pinned: set = set()
+        # run_id -> [(checkpoint, estimated bytes)], ordered by step
+        self._checkpoints: Dict[str, List[Tuple[Any, int]]] = {}
+        self._checkpoint_bytes: Dict[str, int] = {}
+        self._bytes = 0
+        self._graph_listeners: List[Callable[[str], None]] = []
+        self._lock = threading.RLock()
+        self.metrics: Dict[str, int] = {
+            "runs_evicted_count": 0,
+            "runs_evicted_bytes": 0,
+            "runs_expired": 0,
+            "graphs_evicted": 0,
+        }
     
     def save_graph(self, graph_id: str, graph_data: Any) -> None:
         """Store a graph definition."""
-        self.graphs[graph_id] = graph_data
+        with self._lock:
+            self.graphs[graph_id] = graph_data
+            self.graphs.move_to_end(graph_id)
+            evicted = []
+            while self.max_graphs and len(self.graphs) > self.max_graphs:
+                evicted.append(self.graphs.popitem(last=False)[0])
+                self.metrics["graphs_evicted"] += 1
+        for evicted_id in evicted:
+            for listener in self._graph_listeners:
+                listener(evicted_id)
     
     def get_graph(self, graph_id: str) -> Optional[Any]:
         """Retrieve a graph definition."""
-        return self.graphs.get(graph_id)
+        with self._lock:
+            graph = self.graphs.get(graph_id)
+            if graph is not None:
+                self.graphs.move_to_end(graph_id)
+            return graph
+    
+    def on_graph_evicted(self, listener: Callable[[str], None]) -> None:
+        """Register a callback invoked with the ID of each evicted graph."""
+        self._graph_listeners.append(listener)
     
     def save_run(self, run_id: str, run_data: Any) -> None:
         """Store a workflow run."""
-        self.runs[run_id] = run_data
+        active = getattr(run_data, "status", None) in ACTIVE_STATUSES
+        size = 0 if active else estimate_size(run_data)
+        with self._lock:
+            previous = self.runs.pop(run_id, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self.runs[run_id] = _RunEntry(run_data, size, time.monotonic())
+            self._bytes += size
+            self._evict_runs()
     
     def get_run(self, run_id: str) -> Optional[Any]:
         """Retrieve a workflow run."""
-        return self.runs.get(run_id)
+        with self._lock:
+            entry = self.runs.get(run_id)
+            if entry is None:
+                return None
+            if self._is_expired(run_id, entry, time.monotonic()):
+                self._drop_run(run_id, "expired")
+                self.metrics["runs_expired"] += 1
+                return None
+            return entry.run
+    
+    def run_status(self, run_id: str) -> Optional[str]:
+        """
+        Return "expired" or "evicted" for runs that existed but are gone,
+        otherwise None.
+        """
+        if self.get_run(run_id) is not None:
+            return None
+        with self._lock:
+            return self._tombstones.get(run_id)
+    
+    def pin_run(self, run_id: str) -> bool:
+        """Exempt a run from eviction."""
+        with self._lock:
+            if run_id not in self.runs:
+                return False
+            self._pinned.add(run_id)
+            return True
+    
+    def unpin_run(self, run_id: str) -> None:
+        """Make a pinned run evictable again."""
+        with self._lock:
+            self._pinned.discard(run_id)
+    
+    def save_checkpoints(self, checkpoints: List[Any]) -> None:
+        """
+        Store a batch of run checkpoints. A checkpoint replaces any the
+        run already has at the same or a later step.
+        """
+        sized = [
+            (checkpoint, sys.getsizeof(checkpoint) + estimate_size(checkpoint.delta))
+            for checkpoint in checkpoints
+        ]
+        with self._lock:
+            for checkpoint, size in sized:
+                run_id = checkpoint.run_id
+                if run_id not in self.runs:
+                    continue
+                history = self._checkpoints.setdefault(run_id, [])
+                total = self._checkpoint_bytes.get(run_id, 0)
+                while history and history[-1][0].step >= checkpoint.step:
+                    total -= history.pop()[1]
+                history.append((checkpoint, size))
+                total += size
+                self._bytes += total - self._checkpoint_bytes.get(run_id, 0)
+                self._checkpoint_bytes[run_id] = total
+            self._evict_runs()
+    
+    def get_checkpoints(self, run_id: str) -> List[Any]:
+        """A run's checkpoints, ordered by step."""
+        with self._lock:
+            return [checkpoint for checkpoint, _ in self._checkpoints.get(run_id, ())]
     
     def list_graphs(self) -> list:
         """List all graph IDs."""
@@ -33,6 +193,70 @@ class StateManager:
     def list_runs(self) -> list:
         """List all run IDs."""
         return list(self.runs.keys())
+    
+    def stats(self) -> Dict[str, Any]:
+        """Store occupancy and eviction counters."""
+        with self._lock:
+            return {
+                "graphs": len(self.graphs),
+                "runs": len(self.runs),
+                "pinned_runs": len(self._pinned),
+                "estimated_bytes": self._bytes,
+                **self.metrics
+            }
+    
+    def _is_expired(self, run_id: str, entry: _RunEntry, now: float) -> bool:
+        return (
+            self.run_ttl_seconds is not None
+            and run_id not in self._pinned
+            and getattr(entry.run, "status", None) not in ACTIVE_STATUSES
+            and now - entry.saved_at > self.run_ttl_seconds
+        )
+    
+    def _evict_runs(self) -> None:
+        """Apply TTL, count and byte limits, oldest finished runs first."""
+        victims = []
+        if self.run_ttl_seconds is not None:
+            now = time.monotonic()
+            # Runs are ordered by last save, so stop at the first live one
+            for run_id, entry in self.runs.items():
+                if now - entry.saved_at <= self.run_ttl_seconds:
+                    break
+                if self._is_expired(run_id, entry, now):
+                    victims.append(run_id)
+            for run_id in victims:
+                self._drop_run(run_id, "expired")
+            self.metrics["runs_expired"] += len(victims)
+        
+        count, size = len(self.runs), self._bytes
+        victims = []
+        for run_id, entry in self.runs.items():
+            over_count = self.max_runs is not None and count > self.max_runs
+            over_bytes = self.max_bytes is not None and size > self.max_bytes
+            if not (over_count or over_bytes):
+                break
+            if run_id in self._pinned or getattr(entry.run, "status", None) in ACTIVE_STATUSES:
+                continue
+            victims.append(run_id)
+            count -= 1
+            size -= entry.size + self._checkpoint_bytes.get(run_id, 0)
+            self.metrics["runs_evicted_count" if over_count else "runs_evicted_bytes"] += 1
+        for run_id in victims:
+            self._drop_run(run_id, "evicted")
+    
+    def _drop_run(self, run_id: str, reason: str) -> None:
+        entry = self.runs.pop(run_id)
+        self._bytes -= entry.size + self._checkpoint_bytes.pop(run_id, 0)
+        self._pinned.discard(run_id)
+        self._checkpoints.pop(run_id, None)
+        self._tombstones[run_id] = reason
+        while len(self._tombstones) > self.max_tombstones:
+            self._tombstones.popitem(last=False)
 
 # Global state manager instance
-state_manager = StateManager()
\ No newline at end of file
+state_manager = StateManager(
+    max_runs=settings.max_runs,
+    max_bytes=settings.max_run_bytes,
+    run_ttl_seconds=settings.run_ttl_seconds,
+    max_graphs=settings.max_graphs
+)
\ No newline at end of file
@@ -0,0 +1,270 @@
+"""
+Profiler - Opt-in per-run profiling of tool execution.
+"""
+from typing import Dict, Any, Optional, Callable, List
+from collections import OrderedDict
+from contextvars import ContextVar
+from functools import partial
+import cProfile
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+
+from nexus_api.settings import settings
+
+PROFILE_MODES = ("sampling", "cprofile")
+MAX_STACK_DEPTH = 64
+TOP_FUNCTIONS = 20
+
+# Profile of the run executing in the current task, and the node whose
+# tool is being called (set by the executor, read by the tool hub)
+active_profile: ContextVar[Optional["RunProfile"]] = ContextVar("active_profile", default=None)
+active_node: ContextVar[str] = ContextVar("active_node", default="?")
+
+def _frame_label(code) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{os.path.basename(code.co_filename)}:{name}"
+
+class RunProfile:
+    """
+    Profiling data for one run.
+    
+    Sync tools run through ``bind``: in sampling mode the calling thread
+    is registered for the sampler; in cProfile mode the call runs under
+    its own ``cProfile.Profile`` whose stats are merged per node. Only
+    one profiler can be active per process (``sys.monitoring`` allows a
+    single one from Python 3.12), so a call overlapping another of the
+    run's profiled calls, e.g. a fan-out branch, is only timed.
+    """
+    __slots__ = (
+        "run_id", "mode", "started", "duration", "nodes", "threads",
+        "stacks", "samples", "_stats", "_lock", "_calls"
+    )
+    
+    def __init__(self, run_id: str, mode: str):
+        self.run_id = run_id
+        self.mode = mode
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.nodes: Dict[str, List[float]] = {}   # node -> [calls, wall seconds]
+        self.threads: Dict[int, str] = {}         # thread ident -> node
+        self.stacks: Dict[str, int] = {}          # collapsed stack -> samples
+        self.samples = 0
+        self._stats: Dict[str, pstats.Stats] = {}
+        self._lock = threading.Lock()
+        self._calls = threading.Lock()
+    
+    def bind(self, call: Callable[[], Any]) -> Callable[[], Any]:
+        """Wrap a sync tool call so it is profiled in whatever thread runs it."""
+        node = active_node.get()
+        if self.mode == "cprofile":
+            def profiled():
+                if not self._calls.acquire(blocking=False):
+                    return call()
+                profiler = cProfile.Profile()
+                try:
+                    return profiler.runcall(call)
+                finally:
+                    self._calls.release()
+                    self._merge(node, profiler)
+            return profiled
+        
+        return partial(_run_sampled, self, node, call)
+    
+    def _merge(self, node: str, profiler: cProfile.Profile) -> None:
+        with self._lock:
+            stats = self._stats.get(node)
+            if stats is None:
+                self._stats[node] = pstats.Stats(profiler)
+            else:
+                stats.add(profiler)
+    
+    def record_node(self, node: str, seconds: float) -> None:
+        """Add one tool call's wall time to a node's totals."""
+        totals = self.nodes.get(node)
+        if totals is None:
+            self.nodes[node] = [1, seconds]
+        else:
+            totals[0] += 1
+            totals[1] += seconds
+    
+    def sample(self, frames: Dict[int, Any]) -> None:
+        """Record the stacks of this run's registered threads."""
+        for ident, node in list(self.threads.items()):
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                if frame.f_code is _SAMPLED_CODE:
+                    break
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(node)
+            key = ";".join(reversed(stack))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+    
+    def collapsed(self) -> str:
+        """Stacks in collapsed format (input for flamegraph tools)."""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+    
+    def report(self) -> Dict[str, Any]:
+        """Per-node breakdown plus the mode-specific detail."""
+        node_samples: Dict[str, int] = {}
+        for stack, count in self.stacks.items():
+            node = stack.split(";", 1)[0]
+            node_samples[node] = node_samples.get(node, 0) + count
+        
+        nodes = {}
+        for node, (calls, seconds) in self.nodes.items():
+            entry = {"calls": calls, "wall_seconds": seconds}
+            if self.mode == "sampling":
+                entry["samples"] = node_samples.get(node, 0)
+            else:
+                stats = self._stats.get(node)
+                entry["top_functions"] = _top_functions(stats) if stats else []
+            nodes[node] = entry
+        
+        return {
+            "run_id": self.run_id,
+            "mode": self.mode,
+            "duration_seconds": self.duration,
+            "samples": self.samples,
+            "nodes": nodes,
+            "collapsed": self.collapsed() if self.mode == "sampling" else None
+        }
+
+def _top_functions(stats: pstats.Stats) -> List[Dict[str, Any]]:
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+    return [
+        {
+            "function": f"{os.path.basename(filename)}:{line}({name})",
+            "calls": calls,
+            "tottime": round(tottime, 6),
+            "cumtime": round(cumtime, 6)
+        }
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in rows[:TOP_FUNCTIONS]
+    ]
+
+def _run_sampled(profile: RunProfile, node: str, call: Callable[[], Any]) -> Any:
+    """Run a call with the current thread registered for sampling."""
+    ident = threading.get_ident()
+    profile.threads[ident] = node
+    try:
+        return call()
+    finally:
+        profile.threads.pop(ident, None)
+
+# Stack walks stop at the sampling wrapper
+_SAMPLED_CODE = _run_sampled.__code__
+
+class Profiler:
+    """
+    Starts run profiles, drives the shared sampler thread and keeps
+    finished reports in a bounded LRU keyed by run_id.
+    
+    Runs are profiled when requested or, with ``sample_rate``, for a
+    random fraction of all runs. Tools in ``process`` mode only get
+    wall-clock timings; their stacks live in another process.
+    
+    cProfile sessions are exclusive: while one run is profiled with
+    cProfile, another run forcing that mode falls back to sampling and
+    sampled runs are skipped. Callers can check ``cprofile_busy`` first.
+    """
+    
+    def __init__(
+        self,
+        mode: str = "sampling",
+        sample_rate: Optional[float] = None,
+        interval: float = 0.005,
+        max_profiles: int = 100
+    ):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}'. Available: {list(PROFILE_MODES)}")
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_profiles = max_profiles
+        self._reports: "OrderedDict[str, RunProfile]" = OrderedDict()
+        self._sampling: set = set()
+        self._sampler: Optional[threading.Thread] = None
+        self._cprofile_run: Optional[str] = None
+        self._lock = threading.Lock()
+    
+    def cprofile_busy(self) -> bool:
+        """Whether a run is being profiled with cProfile."""
+        return self._cprofile_run is not None
+    
+    def start(self, run_id: str, mode: Optional[str] = None) -> Optional[RunProfile]:
+        """
+        Begin profiling a run. ``mode`` forces profiling in that mode;
+        otherwise the run is profiled only if it falls in the sample.
+        """
+        sampled = mode is None
+        if sampled:
+            if not self.sample_rate or random.random() >= self.sample_rate:
+                return None
+            mode = self.mode
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}'. Available: {list(PROFILE_MODES)}")
+        if mode == "cprofile":
+            with self._lock:
+                if self._cprofile_run is None:
+                    self._cprofile_run = run_id
+                elif sampled:
+                    return None
+                else:
+                    mode = "sampling"
+        
+        profile = RunProfile(run_id, mode)
+        if mode == "sampling":
+            with self._lock:
+                self._sampling.add(profile)
+                if self._sampler is None:
+                    self._sampler = threading.Thread(
+                        target=self._sample_loop, name="qflow-profiler", daemon=True
+                    )
+                    self._sampler.start()
+        return profile
+    
+    def finish(self, profile: RunProfile) -> None:
+        """Stop sampling a run and store its report."""
+        profile.duration = time.perf_counter() - profile.started
+        with self._lock:
+            self._sampling.discard(profile)
+            if profile.mode == "cprofile" and self._cprofile_run == profile.run_id:
+                self._cprofile_run = None
+            self._reports[profile.run_id] = profile
+            self._reports.move_to_end(profile.run_id)
+            while len(self._reports) > self.max_profiles:
+                self._reports.popitem(last=False)
+    
+    def get(self, run_id: str) -> Optional[RunProfile]:
+        """Return a finished run's profile."""
+        with self._lock:
+            return self._reports.get(run_id)
+    
+    def _sample_loop(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                profiles = list(self._sampling)
+                if not profiles:
+                    self._sampler = None
+                    return
+            frames = sys._current_frames()
+            for profile in profiles:
+                profile.sample(frames)
+            del frames
+
+# Global profiler instance
+profiler = Profiler(
+    mode=settings.profile_mode,
+    sample_rate=settings.profile_sample_rate,
+    interval=settings.profile_interval_ms / 1000,
+    max_profiles=settings.max_profiles
+)
\ No newline at end of file
@@ -0,0 +1,218 @@
+"""
+Result Cache - Content-hash memoization of pure tool results.
+"""
+from typing import Dict, Any, Optional, Sequence
+from collections import OrderedDict
+from collections.abc import Mapping
+import hashlib
+import json
+import os
+import pickle
+import threading
+
+_MISS = object()
+
+def _canonical(value: Any) -> bytes:
+    """Stable byte representation of a state value for hashing."""
+    if isinstance(value, str):
+        return b"s" + value.encode("utf-8")
+    if isinstance(value, bytes):
+        return b"b" + value
+    return b"j" + json.dumps(
+        value, sort_keys=True, separators=(",", ":"), default=repr
+    ).encode("utf-8")
+
+def input_key(tool_name: str, state: Mapping, reads: Sequence[str]) -> str:
+    """Hash a tool name and the state keys it reads."""
+    digest = hashlib.blake2b(tool_name.encode("utf-8"), digest_size=20)
+    for key in reads:
+        digest.update(b"\x00" + key.encode("utf-8") + b"\x00")
+        if key in state:
+            digest.update(_canonical(state[key]))
+        else:
+            digest.update(b"-")
+    return digest.hexdigest()
+
+class ResultCache:
+    """
+    Bounded LRU of tool results keyed by input hash.
+    
+    When ``spill_dir`` is set, entries evicted from memory are pickled
+    to disk and promoted back (and the file deleted) on the next hit.
+    Spilled files are capped at ``max_spill_bytes``, oldest deleted
+    first; files already in the directory count towards the cap.
+    """
+    
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        spill_dir: Optional[str] = None,
+        max_spill_bytes: int = 256 * 1024 * 1024
+    ):
+        self.maxsize = maxsize
+        self.spill_dir = None
+        self.max_spill_bytes = max_spill_bytes
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        # Spilled key -> file size, oldest first
+        self._spilled: "OrderedDict[str, int]" = OrderedDict()
+        self._spill_bytes = 0
+        self._lock = threading.Lock()
+        self.metrics: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "disk_hits": 0,
+            "evictions": 0,
+            "spills": 0,
+            "spills_deleted": 0,
+        }
+        if spill_dir:
+            self._open_spill_dir(spill_dir)
+    
+    def configure(self, maxsize: Optional[int] = None,
+                  spill_dir: Optional[str] = None,
+                  max_spill_bytes: Optional[int] = None) -> None:
+        """Adjust size, spill directory and spill cap."""
+        if maxsize is not None:
+            self.maxsize = maxsize
+        if max_spill_bytes is not None:
+            self.max_spill_bytes = max_spill_bytes
+        if spill_dir:
+            self._open_spill_dir(spill_dir)
+        elif max_spill_bytes is not None and self.spill_dir:
+            self._trim_spilled()
+    
+    def _open_spill_dir(self, spill_dir: str) -> None:
+        """Use ``spill_dir``, adopting the files already in it."""
+        os.makedirs(spill_dir, exist_ok=True)
+        found = []
+        with os.scandir(spill_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".pkl") and entry.is_file():
+                    stat = entry.stat()
+                    found.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        with self._lock:
+            self.spill_dir = spill_dir
+            self._spilled.clear()
+            self._spill_bytes = 0
+            for _, key, size in sorted(found):
+                self._spilled[key] = size
+                self._spill_bytes += size
+        self._trim_spilled()
+    
+    def _spill_path(self, key: str) -> str:
+        return os.path.join(self.spill_dir, f"{key}.pkl")
+    
+    def _unspill(self, key: str) -> None:
+        """Delete a key's spill file."""
+        with self._lock:
+            self._spill_bytes -= self._spilled.pop(key, 0)
+        try:
+            os.unlink(self._spill_path(key))
+        except OSError:
+            pass  # already gone, e.g. taken by another process sharing the directory
+    
+    def _trim_spilled(self) -> None:
+        """Delete the oldest spill files until they fit the cap."""
+        while True:
+            with self._lock:
+                if self._spill_bytes <= self.max_spill_bytes or not self._spilled:
+                    return
+                key = next(iter(self._spilled))
+                self.metrics["spills_deleted"] += 1
+            self._unspill(key)
+    
+    def get(self, key: str) -> Any:
+        """Return the cached value, or the module-level miss sentinel."""
+        with self._lock:
+            value = self._entries.get(key, _MISS)
+            if value is not _MISS:
+                self._entries.move_to_end(key)
+                self.metrics["hits"] += 1
+                return value
+        
+        if self.spill_dir:
+            try:
+                with open(self._spill_path(key), "rb") as f:
+                    value = pickle.load(f)
+            except FileNotFoundError:
+                value = _MISS
+            except Exception:
+                # Truncated, corrupt or no longer importable: recompute
+                value = _MISS
+                self._unspill(key)
+            else:
+                # Promoted back to memory; spilled again if evicted
+                self._unspill(key)
+            if value is not _MISS:
+                with self._lock:
+                    self.metrics["hits"] += 1
+                    self.metrics["disk_hits"] += 1
+                self.put(key, value)
+                return value
+        
+        with self._lock:
+            self.metrics["misses"] += 1
+        return _MISS
+    
+    def put(self, key: str, value: Any) -> None:
+        """Store a value, evicting (and possibly spilling) the oldest."""
+        evicted = []
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                evicted.append(self._entries.popitem(last=False))
+                self.metrics["evictions"] += 1
+        
+        if self.spill_dir and evicted:
+            for old_key, old_value in evicted:
+                self._spill(old_key, old_value)
+            self._trim_spilled()
+    
+    def _spill(self, key: str, value: Any) -> None:
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return  # not picklable; simply dropped
+        if len(data) > self.max_spill_bytes:
+            return
+        path = self._spill_path(key)
+        # Write then rename, so readers never see a partial file
+        temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp, "wb") as f:
+                f.write(data)
+            os.replace(temp, path)
+        except OSError:
+            try:
+                os.unlink(temp)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._spill_bytes += len(data) - self._spilled.pop(key, 0)
+            self._spilled[key] = len(data)
+            self.metrics["spills"] += 1
+    
+    def clear(self) -> None:
+        """Drop all in-memory entries."""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and occupancy."""
+        with self._lock:
+            lookups = self.metrics["hits"] + self.metrics["misses"]
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "spill_dir": self.spill_dir,
+                "spilled": len(self._spilled),
+                "spilled_bytes": self._spill_bytes,
+                "hit_rate": self.metrics["hits"] / lookups if lookups else 0.0,
+                **self.metrics
+            }
+
+def is_miss(value: Any) -> bool:
+    """True if ``value`` is the cache-miss sentinel."""
+    return value is _MISS
@@ -0,0 +1,202 @@
+"""
+Run Log - Compact structured execution logs rendered on demand.
+"""
+from typing import Dict, Any, Optional, List, Sequence
+from collections import deque
+from datetime import datetime, timedelta
+from enum import IntEnum
+from itertools import islice
+import sys
+import time
+
+class LogEvent(IntEnum):
+    """Execution log event codes."""
+    STEP = 1         # node: executing node, payload: step number
+    TRANSITION = 2   # node: next node
+    FAN_OUT = 3      # payload: branch node indices
+    JOIN = 4         # node: join node, payload: branch count
+    COMPLETED = 5    # payload: step count
+    FAILED = 6       # payload: error message
+    TIMED_OUT = 7    # payload: reason
+    CANCELLED = 8    # payload: optional reason
+    RESUMED = 9      # node: resume node, payload: checkpoint step
+
+# Verbosity levels: "off" records nothing, "summary" only the outcome,
+# "steps" every step and transition
+LOG_VERBOSITY = {"off": 0, "summary": 1, "steps": 2}
+
+_EVENT_VERBOSITY = {
+    LogEvent.STEP: 2,
+    LogEvent.TRANSITION: 2,
+    LogEvent.FAN_OUT: 2,
+    LogEvent.JOIN: 2,
+    LogEvent.COMPLETED: 1,
+    LogEvent.FAILED: 1,
+    LogEvent.TIMED_OUT: 1,
+    LogEvent.CANCELLED: 1,
+    LogEvent.RESUMED: 1,
+}
+
+_EVENT_LEVEL = {
+    LogEvent.FAILED: "error",
+    LogEvent.TIMED_OUT: "error",
+    LogEvent.CANCELLED: "warning",
+}
+
+class LogRecord:
+    """One log event: code, node index, ns offset from run start, payload."""
+    __slots__ = ("event", "node", "offset_ns", "payload")
+    
+    def __init__(self, event: int, node: int, offset_ns: int, payload: Any = None):
+        self.event = event
+        self.node = node
+        self.offset_ns = offset_ns
+        self.payload = payload
+
+class RunLog:
+    """
+    Bounded ring buffer of LogRecords for one run.
+    
+    Records hold node indices into ``node_names`` (shared with the
+    compiled plan) and monotonic offsets; timestamps and messages are
+    only built by ``render``. Once ``cap`` records are held the oldest
+    are dropped.
+    """
+    __slots__ = ("node_names", "verbosity", "steps", "started_at", "_start_ns",
+                 "_records", "_added")
+    
+    def __init__(
+        self,
+        node_names: Sequence[str] = (),
+        verbosity: str = "steps",
+        cap: int = 1000,
+        started_at: Optional[datetime] = None
+    ):
+        if verbosity not in LOG_VERBOSITY:
+            raise ValueError(
+                f"Unknown log verbosity '{verbosity}'. Available: {list(LOG_VERBOSITY)}"
+            )
+        self.node_names = node_names
+        self.verbosity = LOG_VERBOSITY[verbosity]
+        self.steps = self.verbosity >= LOG_VERBOSITY["steps"]
+        self.started_at = started_at or datetime.utcnow()
+        self._start_ns = time.monotonic_ns()
+        self._records: deque = deque(maxlen=cap)
+        self._added = 0
+    
+    def add(self, event: LogEvent, node: int = -1, payload: Any = None) -> Optional[LogRecord]:
+        """Append a record unless the run's verbosity filters it out."""
+        if _EVENT_VERBOSITY[event] > self.verbosity:
+            return None
+        record = LogRecord(event, node, time.monotonic_ns() - self._start_ns, payload)
+        self._records.append(record)
+        self._added += 1
+        return record
+    
+    @property
+    def dropped(self) -> int:
+        """Records evicted by the cap."""
+        return self._added - len(self._records)
+    
+    def __len__(self) -> int:
+        return len(self._records)
+    
+    def records(self) -> List[LogRecord]:
+        return list(self._records)
+    
+    def _name(self, index: int) -> str:
+        if 0 <= index < len(self.node_names):
+            return self.node_names[index]
+        return "end" if index == -1 else f"#{index}"
+    
+    def message(self, record: LogRecord) -> str:
+        """Human-readable message for a record."""
+        event, payload = record.event, record.payload
+        if event == LogEvent.STEP:
+            return f"Step {payload}: Executing '{self._name(record.node)}'"
+        if event == LogEvent.TRANSITION:
+            return f"→ Transitioning to '{self._name(record.node)}'"
+        if event == LogEvent.FAN_OUT:
+            return f"⇉ Running {[self._name(b) for b in payload]} in parallel"
+        if event == LogEvent.JOIN:
+            return f"⇇ Joined {payload} branches at '{self._name(record.node)}'"
+        if event == LogEvent.COMPLETED:
+            return f"✓ Workflow completed in {payload} steps"
+        if event == LogEvent.FAILED:
+            return f"✗ Workflow failed: {payload}"
+        if event == LogEvent.TIMED_OUT:
+            return f"✗ Workflow timed out: {payload}"
+        if event == LogEvent.CANCELLED:
+            return f"✗ Workflow cancelled: {payload}" if payload else "✗ Workflow cancelled"
+        if event == LogEvent.RESUMED:
+            return f"↻ Resumed from step {payload} at '{self._name(record.node)}'"
+        return f"event {int(event)}"
+    
+    def render(self, record: LogRecord) -> Dict[str, Any]:
+        """Render a record as ``{"timestamp", "level", "message"}``."""
+        timestamp = self.started_at + timedelta(microseconds=record.offset_ns // 1000)
+        return {
+            "timestamp": timestamp.isoformat(),
+            "level": _EVENT_LEVEL.get(record.event, "info"),
+            "message": self.message(record)
+        }
+    
+    def render_all(self) -> List[Dict[str, Any]]:
+        """Render every held record, oldest first."""
+        return [self.render(record) for record in list(self._records)]
+    
+    def render_range(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Render a page of held records; only that page is rendered."""
+        offset = max(offset, 0)
+        end = None if limit is None else offset + max(limit, 0)
+        return [self.render(record) for record in islice(list(self._records), offset, end)]
+    
+    def summary(self) -> Dict[str, Any]:
+        """Record counts by level plus the final rendered entry."""
+        levels: Dict[str, int] = {}
+        for record in list(self._records):
+            level = _EVENT_LEVEL.get(record.event, "info")
+            levels[level] = levels.get(level, 0) + 1
+        return {
+            "count": len(self._records),
+            "dropped": self.dropped,
+            "levels": levels,
+            "last": self.render(self._records[-1]) if self._records else None
+        }
+    
+    def estimated_size(self) -> int:
+        """Rough size in bytes of the held records."""
+        if not self._records:
+            return sys.getsizeof(self._records)
+        return sys.getsizeof(self._records) + len(self._records) * sys.getsizeof(self._records[0])
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact JSON-friendly form: records as ``[event, node, ns, payload]``."""
+        return {
+            "node_names": list(self.node_names),
+            "verbosity": next(k for k, v in LOG_VERBOSITY.items() if v == self.verbosity),
+            "cap": self._records.maxlen,
+            "started_at": self.started_at.isoformat(),
+            "dropped": self.dropped,
+            "records": [
+                [int(r.event), r.node, r.offset_ns, r.payload] for r in list(self._records)
+            ]
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunLog":
+        """Inverse of to_dict()."""
+        log = cls(
+            tuple(data.get("node_names", ())),
+            verbosity=data.get("verbosity", "steps"),
+            cap=data.get("cap") or 1000,
+            started_at=datetime.fromisoformat(data["started_at"])
+            if data.get("started_at") else None
+        )
+        # Keep new offsets on the original wall-clock timeline
+        elapsed = datetime.utcnow() - log.started_at
+        log._start_ns = time.monotonic_ns() - int(elapsed.total_seconds() * 1e9)
+        for event, node, offset_ns, payload in data.get("records", ()):
+            log._records.append(LogRecord(LogEvent(event), node, offset_ns, payload))
+        log._added = len(log._records) + data.get("dropped", 0)
+        return log
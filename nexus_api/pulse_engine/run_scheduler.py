@@ -0,0 +1,172 @@
+"""
+Run Scheduler - Background execution of submitted runs.
+"""
+from typing import Dict, Any, Optional, List
+from datetime import datetime
+import asyncio
+import heapq
+import itertools
+import time
+
+from nexus_api.schemas.flow_models import WorkflowRun
+from nexus_api.pulse_engine.run_log import LogEvent
+
+class QueueFullError(RuntimeError):
+    """Raised when the submission queue is at capacity."""
+
+class RunScheduler:
+    """
+    Bounded in-process worker pool draining a priority queue of runs.
+    
+    Higher ``priority`` runs are dequeued first (FIFO within a priority).
+    Deadlines are measured from submission, so time spent queued counts.
+    
+    Cancelling a queued run leaves its heap entry behind; workers skip
+    it when popped, and the heap is compacted once such entries
+    outnumber the live ones. Capacity and depth count live runs only.
+    """
+    
+    def __init__(self, executor: Any, workers: int = 4, max_queue: int = 1000):
+        self.executor = executor
+        self.workers = workers
+        self.max_queue = max_queue
+        self._heap: List[tuple] = []
+        self._ready: Optional[asyncio.Condition] = None
+        self._workers: List[asyncio.Task] = []
+        self._active: Dict[str, asyncio.Task] = {}
+        self._queued: Dict[str, WorkflowRun] = {}
+        self._seq = itertools.count()
+        self.metrics: Dict[str, int] = {
+            "submitted": 0,
+            "finished": 0,
+            "cancelled": 0,
+            "timed_out": 0,
+            "rejected": 0,
+        }
+    
+    async def start(self) -> None:
+        """Start the worker tasks."""
+        self._ready = asyncio.Condition()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"qflow-run-worker-{i}")
+            for i in range(self.workers)
+        ]
+    
+    async def stop(self) -> None:
+        """Cancel workers and in-flight runs."""
+        for task in list(self._active.values()) + self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+    
+    async def submit(
+        self,
+        graph_id: str,
+        initial_state: Dict[str, Any],
+        priority: int = 0,
+        deadline_seconds: Optional[float] = None,
+        profile: Optional[str] = None,
+        log_verbosity: Optional[str] = None
+    ) -> WorkflowRun:
+        """Queue a run and return its (queued) record immediately."""
+        if self._ready is None:
+            raise RuntimeError("Scheduler is not running")
+        if len(self._queued) >= self.max_queue:
+            self.metrics["rejected"] += 1
+            raise QueueFullError("Run queue is full")
+        
+        run = self.executor.create_run(graph_id, initial_state, "queued", log_verbosity)
+        deadline_at = (
+            time.monotonic() + deadline_seconds if deadline_seconds else None
+        )
+        self._queued[run.run_id] = run
+        heapq.heappush(
+            self._heap, (-priority, next(self._seq), run, deadline_at, profile)
+        )
+        async with self._ready:
+            self._ready.notify()
+        self.metrics["submitted"] += 1
+        return run
+    
+    async def cancel(self, run_id: str) -> bool:
+        """Cancel a queued or running run. Returns False if not active here."""
+        run = self._queued.pop(run_id, None)
+        if run is not None:
+            self._finish(run, "cancelled", "Run was cancelled before starting")
+            self._compact()
+            return True
+        task = self._active.get(run_id)
+        if task is not None:
+            task.cancel()
+            return True
+        return False
+    
+    def queue_depth(self) -> int:
+        """Runs waiting to start."""
+        return len(self._queued)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, active runs and counters."""
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth(),
+            "queue_capacity": self.max_queue,
+            "active_runs": len(self._active),
+            **self.metrics
+        }
+    
+    def _compact(self) -> None:
+        """Drop cancelled entries once they outnumber the queued runs."""
+        if len(self._heap) <= 2 * len(self._queued) + 16:
+            return
+        self._heap = [
+            entry for entry in self._heap if entry[2].run_id in self._queued
+        ]
+        heapq.heapify(self._heap)
+    
+    async def _next(self) -> tuple:
+        """Wait for and pop the highest-priority entry."""
+        async with self._ready:
+            await self._ready.wait_for(lambda: self._heap)
+            return heapq.heappop(self._heap)
+    
+    def _finish(self, run: WorkflowRun, status: str, error: str) -> None:
+        run.status = status
+        run.error = error
+        run.completed_at = datetime.utcnow()
+        event = LogEvent.CANCELLED if status == "cancelled" else LogEvent.TIMED_OUT
+        self.executor._log(run, event, payload=error)
+        self.executor.state_manager.save_run(run.run_id, run)
+        self.executor.close_stream(run)
+        self.metrics[status] += 1
+    
+    async def _worker(self) -> None:
+        while True:
+            _, _, run, deadline_at, profile = await self._next()
+            if self._queued.pop(run.run_id, None) is None:
+                continue  # cancelled while queued
+            
+            remaining = None
+            if deadline_at is not None:
+                remaining = deadline_at - time.monotonic()
+                if remaining <= 0:
+                    self._finish(run, "timed_out", "Deadline passed while queued")
+                    continue
+            
+            task = asyncio.create_task(
+                self.executor.execute_run(
+                    run, deadline_seconds=remaining, profile=profile
+                )
+            )
+            self._active[run.run_id] = task
+            try:
+                await asyncio.wait({task})
+            finally:
+                self._active.pop(run.run_id, None)
+            
+            if task.cancelled():
+                self.metrics["cancelled"] += 1
+            elif run.status == "timed_out":
+                self.metrics["timed_out"] += 1
+            else:
+                self.metrics["finished"] += 1
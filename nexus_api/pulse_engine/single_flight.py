@@ -0,0 +1,164 @@
+"""
+Single Flight - Coalescing of identical runs of deterministic graphs.
+"""
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple
+from collections import OrderedDict
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+
+from nexus_api.schemas.flow_models import WorkflowRun
+from nexus_api.pulse_engine.storage import StorageBackend
+from nexus_api.pulse_engine import telemetry
+
+def state_key(graph_id: str, initial_state: Dict[str, Any], *options: Any) -> Optional[str]:
+    """
+    Coalescing key: the (content-addressed) graph ID, a hash of the
+    canonical JSON of ``initial_state`` and any run options that change
+    the outcome. None when the state is not JSON-serializable.
+    """
+    try:
+        canonical = json.dumps(
+            [initial_state, options], sort_keys=True, separators=(",", ":")
+        )
+    except (TypeError, ValueError):
+        return None
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+    return f"{graph_id}:{digest}"
+
+def _resolved(alias: WorkflowRun, leader: WorkflowRun) -> WorkflowRun:
+    """Unstored view of an alias over a snapshot of its leader's result."""
+    return WorkflowRun(
+        run_id=alias.run_id,
+        graph_id=leader.graph_id,
+        state=leader.flow_state.snapshot(),
+        log=leader.run_log,
+        status=leader.status,
+        started_at=leader.started_at,
+        completed_at=leader.completed_at,
+        error=leader.error,
+        alias_of=leader.run_id
+    )
+
+class SingleFlight:
+    """
+    Runs each distinct (graph, initial state) once at a time.
+    
+    Concurrent callers with the same key await the leader's execution
+    and each get an alias run (own run_id, ``alias_of`` the leader).
+    Aliases are stored as pointers without state or log of their own
+    and ``resolve`` to the leader's when read. With a ``ttl``, completed
+    runs also answer identical requests for that many seconds; only
+    their run IDs are kept, so the run store's limits still apply and
+    an evicted leader is simply run again.
+    
+    Only safe for graphs whose tools are deterministic; callers opt in.
+    The shared execution runs in its own task, so it finishes even if
+    the caller that started it goes away.
+    """
+    
+    def __init__(
+        self,
+        storage: StorageBackend,
+        ttl: Optional[float] = None,
+        max_entries: int = 1024
+    ):
+        self.storage = storage
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # key -> (completed run ID, expiry), least recently used first
+        self._results: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+    
+    def _cached(self, key: str) -> Optional[WorkflowRun]:
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        run_id, expires_at = entry
+        run = None
+        if time.monotonic() < expires_at:
+            run = self.storage.get_run(run_id)
+        if run is None or run.status != "completed":
+            del self._results[key]
+            return None
+        self._results.move_to_end(key)
+        return run
+    
+    def _remember(self, key: str, run: WorkflowRun) -> None:
+        if not self.ttl or run.status != "completed":
+            return
+        self._results[key] = (run.run_id, time.monotonic() + self.ttl)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+    
+    def _alias(self, leader: WorkflowRun) -> WorkflowRun:
+        """Store a pointer record for a coalesced caller; returns it resolved."""
+        alias = WorkflowRun(
+            run_id=f"r-{uuid.uuid4().hex[:12]}",
+            graph_id=leader.graph_id,
+            status=leader.status,
+            started_at=leader.started_at,
+            completed_at=leader.completed_at,
+            error=leader.error,
+            alias_of=leader.run_id
+        )
+        self.storage.save_run(alias.run_id, alias)
+        return _resolved(alias, leader)
+    
+    def resolve(self, run: Optional[WorkflowRun]) -> Optional[WorkflowRun]:
+        """
+        A stored run as callers see it: aliases carry their leader's
+        state, log and outcome. None if the leader is gone.
+        """
+        if run is None or not run.alias_of:
+            return run
+        leader = self.storage.get_run(run.alias_of)
+        if leader is None:
+            return None
+        return _resolved(run, leader)
+    
+    async def run(
+        self,
+        key: Optional[str],
+        execute: Callable[[], Awaitable[WorkflowRun]]
+    ) -> WorkflowRun:
+        """
+        Return ``execute()``'s run, or an alias of an identical run in
+        flight or cached under ``key``. A None key never coalesces.
+        """
+        if key is None:
+            return await execute()
+        
+        cached = self._cached(key)
+        if cached is not None:
+            telemetry.single_flight_runs.inc("cached")
+            return self._alias(cached)
+        
+        task = self._inflight.get(key)
+        if task is not None:
+            telemetry.single_flight_runs.inc("joined")
+            return self._alias(await asyncio.shield(task))
+        
+        telemetry.single_flight_runs.inc("leader")
+        task = asyncio.ensure_future(execute())
+        self._inflight[key] = task
+        
+        def done(finished: asyncio.Future) -> None:
+            if self._inflight.get(key) is finished:
+                del self._inflight[key]
+            if not finished.cancelled() and finished.exception() is None:
+                self._remember(key, finished.result())
+        
+        task.add_done_callback(done)
+        return await asyncio.shield(task)
+    
+    def stats(self) -> Dict[str, Any]:
+        """In-flight keys, cached results and the cache TTL."""
+        return {
+            "inflight": len(self._inflight),
+            "cached": len(self._results),
+            "ttl_seconds": self.ttl
+        }
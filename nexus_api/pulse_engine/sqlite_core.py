@@ -0,0 +1,484 @@
+"""
+SQLite Core - Durable WAL-mode storage for graphs and execution runs.
+"""
+from typing import Dict, Any, Optional, Tuple, List, Callable
+from collections import OrderedDict
+from datetime import datetime, timezone
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+from nexus_api.schemas.flow_models import Graph, WorkflowRun
+from nexus_api.pulse_engine.storage import StorageBackend
+from nexus_api.pulse_engine.memory_core import ACTIVE_STATUSES
+from nexus_api.pulse_engine.checkpoint import Checkpoint
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS graphs (
+    graph_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    definition BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    used_at REAL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    graph_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at REAL,
+    completed_at REAL,
+    updated_at REAL NOT NULL,
+    pinned INTEGER NOT NULL DEFAULT 0,
+    payload BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs(status);
+CREATE INDEX IF NOT EXISTS idx_runs_graph_id ON runs(graph_id);
+CREATE INDEX IF NOT EXISTS idx_runs_started_at ON runs(started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_updated_at ON runs(updated_at);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    run_id TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    node INTEGER NOT NULL,
+    full INTEGER NOT NULL,
+    delta BLOB NOT NULL,
+    PRIMARY KEY (run_id, step)
+);
+"""
+
+_UPSERT_RUN = """
+INSERT INTO runs (run_id, graph_id, status, started_at, completed_at, updated_at, payload)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(run_id) DO UPDATE SET
+    graph_id = excluded.graph_id,
+    status = excluded.status,
+    started_at = excluded.started_at,
+    completed_at = excluded.completed_at,
+    updated_at = excluded.updated_at,
+    payload = excluded.payload
+"""
+
+_UPSERT_CHECKPOINT = """
+INSERT OR REPLACE INTO checkpoints (run_id, step, node, full, delta)
+VALUES (?, ?, ?, ?, ?)
+"""
+
+_UPSERT_GRAPH = """
+INSERT OR REPLACE INTO graphs (graph_id, name, definition, created_at, used_at)
+VALUES (?, ?, ?, ?, ?)
+"""
+
+def encode(data: Dict[str, Any]) -> bytes:
+    """Compact encoding: compressed JSON."""
+    return zlib.compress(
+        json.dumps(data, separators=(",", ":"), default=str).encode("utf-8"), 1
+    )
+
+def decode(blob: bytes) -> Dict[str, Any]:
+    """Inverse of encode()."""
+    return json.loads(zlib.decompress(blob))
+
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    if value is None:
+        return None
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+def _snapshot(run: WorkflowRun) -> WorkflowRun:
+    """
+    Point-in-time copy of a run to encode later: its fields and state
+    overlay are copied, the shared base state and log are not.
+    """
+    copy = run.model_copy()
+    copy.state = run.flow_state.snapshot()
+    return copy
+
+def _run_row(run_id: str, run: WorkflowRun, updated_at: float) -> Tuple:
+    return (
+        run_id,
+        run.graph_id,
+        run.status,
+        _epoch(run.started_at),
+        _epoch(run.completed_at),
+        updated_at,
+        encode(run.model_dump(mode="json"))
+    )
+
+class SQLiteStateManager(StorageBackend):
+    """
+    SQLite (WAL mode) storage shared by every worker process on a host.
+    
+    Writes are buffered and committed in batches by a background writer
+    thread, which also encodes them; repeated saves of the same run
+    within a batch collapse into one encode and row write. Reads see
+    buffered writes of this process first.
+    
+    At most ``max_graphs`` decoded graphs are cached in memory, least
+    recently used evicted first. Maintenance applies the same limit to
+    the graph rows, keeping the graphs of queued and running runs.
+    """
+    
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 0.05,
+        batch_size: int = 256,
+        max_runs: Optional[int] = None,
+        run_ttl_seconds: Optional[float] = None,
+        max_graphs: Optional[int] = None,
+        maintenance_interval: float = 30.0
+    ):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_runs = max_runs
+        self.run_ttl_seconds = run_ttl_seconds
+        self.max_graphs = max_graphs
+        self.maintenance_interval = maintenance_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # run_id -> (run snapshot, updated_at), encoded when flushed
+        self._pending_runs: Dict[str, Tuple[WorkflowRun, float]] = {}
+        self._pending_graphs: Dict[str, Tuple[Graph, float]] = {}
+        self._inflight_runs: Dict[str, Tuple[WorkflowRun, float]] = {}
+        self._live: Dict[str, Any] = {}
+        self._graph_cache: "OrderedDict[str, Graph]" = OrderedDict()
+        self._graph_listeners: List[Callable[[str], None]] = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.metrics: Dict[str, int] = {
+            "batches_written": 0,
+            "rows_written": 0,
+            "runs_expired": 0,
+            "runs_evicted_count": 0,
+            "graphs_uncached": 0,
+            "graphs_evicted": 0,
+        }
+        
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(graphs)")}
+        if "used_at" not in columns:  # databases created before graph pruning
+            conn.execute("ALTER TABLE graphs ADD COLUMN used_at REAL")
+        conn.commit()
+        
+        self._writer = threading.Thread(
+            target=self._write_loop, name="qflow-sqlite-writer", daemon=True
+        )
+        self._writer.start()
+    
+    def _conn(self) -> sqlite3.Connection:
+        """Per-thread connection in WAL mode."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+    
+    # Graphs
+    
+    def save_graph(self, graph_id: str, graph_data: Any) -> None:
+        """Store a graph definition."""
+        with self._lock:
+            self._pending_graphs[graph_id] = (graph_data, time.time())
+        self._wake.set()
+        self._cache_graph(graph_id, graph_data)
+    
+    def get_graph(self, graph_id: str) -> Optional[Any]:
+        """Retrieve a graph definition."""
+        with self._lock:
+            graph = self._graph_cache.get(graph_id)
+            if graph is not None:
+                self._graph_cache.move_to_end(graph_id)
+                return graph
+        row = self._conn().execute(
+            "SELECT definition FROM graphs WHERE graph_id = ?", (graph_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        graph = Graph(**decode(row[0]))
+        self._cache_graph(graph_id, graph)
+        return graph
+    
+    def _cache_graph(self, graph_id: str, graph: Graph) -> None:
+        with self._lock:
+            self._graph_cache[graph_id] = graph
+            self._graph_cache.move_to_end(graph_id)
+            evicted = []
+            while self.max_graphs and len(self._graph_cache) > self.max_graphs:
+                evicted.append(self._graph_cache.popitem(last=False)[0])
+                self.metrics["graphs_uncached"] += 1
+        self._notify_evicted(evicted)
+    
+    def _notify_evicted(self, graph_ids: List[str]) -> None:
+        for graph_id in graph_ids:
+            for listener in self._graph_listeners:
+                listener(graph_id)
+    
+    def on_graph_evicted(self, listener: Callable[[str], None]) -> None:
+        """
+        Register a callback invoked with the ID of each graph dropped
+        from the in-memory cache (it is reloaded on next use) or from
+        the database.
+        """
+        self._graph_listeners.append(listener)
+    
+    def list_graphs(self) -> list:
+        """List all graph IDs."""
+        self.flush()
+        return [r[0] for r in self._conn().execute(
+            "SELECT graph_id FROM graphs ORDER BY created_at"
+        )]
+    
+    # Runs
+    
+    def save_run(self, run_id: str, run_data: Any) -> None:
+        """Buffer a workflow run write; the writer thread encodes it."""
+        entry = (_snapshot(run_data), time.time())
+        active = run_data.status in ACTIVE_STATUSES
+        with self._lock:
+            self._pending_runs[run_id] = entry
+            pending = len(self._pending_runs)
+            # Active runs are served live to readers in this process
+            if active:
+                self._live[run_id] = run_data
+            else:
+                self._live.pop(run_id, None)
+        if pending >= self.batch_size or not active:
+            self._wake.set()
+    
+    def get_run(self, run_id: str) -> Optional[Any]:
+        """Retrieve a workflow run."""
+        with self._lock:
+            live = self._live.get(run_id)
+            if live is not None:
+                return live
+            entry = self._pending_runs.get(run_id) or self._inflight_runs.get(run_id)
+        if entry is not None:
+            # A copy, as from the database
+            return WorkflowRun(**entry[0].model_dump(mode="json"))
+        found = self._conn().execute(
+            "SELECT payload FROM runs WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        if found is None or found[0] is None:
+            return None
+        return WorkflowRun(**decode(found[0]))
+    
+    def release_run(self, run_id: str) -> None:
+        """Serve an active run from the database rather than this process."""
+        with self._lock:
+            self._live.pop(run_id, None)
+    
+    def run_status(self, run_id: str) -> Optional[str]:
+        """Report runs whose payload was dropped by TTL or count limits."""
+        row = self._conn().execute(
+            "SELECT status FROM runs WHERE run_id = ? AND payload IS NULL",
+            (run_id,)
+        ).fetchone()
+        return row[0] if row else None
+    
+    def list_runs(self) -> list:
+        """List all run IDs."""
+        self.flush()
+        return [r[0] for r in self._conn().execute(
+            "SELECT run_id FROM runs WHERE payload IS NOT NULL ORDER BY started_at"
+        )]
+    
+    def pin_run(self, run_id: str) -> bool:
+        """Exempt a run from eviction."""
+        self.flush()
+        conn = self._conn()
+        cursor = conn.execute(
+            "UPDATE runs SET pinned = 1 WHERE run_id = ? AND payload IS NOT NULL",
+            (run_id,)
+        )
+        conn.commit()
+        return cursor.rowcount > 0
+    
+    def unpin_run(self, run_id: str) -> None:
+        """Make a pinned run evictable again."""
+        self.flush()
+        conn = self._conn()
+        conn.execute("UPDATE runs SET pinned = 0 WHERE run_id = ?", (run_id,))
+        conn.commit()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Row counts by status plus writer counters."""
+        by_status = dict(self._conn().execute(
+            "SELECT status, COUNT(*) FROM runs GROUP BY status"
+        ).fetchall())
+        graphs = self._conn().execute("SELECT COUNT(*) FROM graphs").fetchone()[0]
+        with self._lock:
+            pending = len(self._pending_runs) + len(self._pending_graphs)
+            cached = len(self._graph_cache)
+        return {
+            "backend": "sqlite",
+            "graphs": graphs,
+            "graphs_cached": cached,
+            "runs_by_status": by_status,
+            "pending_writes": pending,
+            **self.metrics
+        }
+    
+    # Checkpoints
+    
+    def save_checkpoints(self, checkpoints: List[Any]) -> None:
+        """
+        Store a batch of run checkpoints in one transaction. A full
+        checkpoint replaces any the run has at the same or a later step.
+        """
+        conn = self._conn()
+        with conn:
+            for checkpoint in checkpoints:
+                if checkpoint.full:
+                    conn.execute(
+                        "DELETE FROM checkpoints WHERE run_id = ? AND step >= ?",
+                        (checkpoint.run_id, checkpoint.step)
+                    )
+            conn.executemany(_UPSERT_CHECKPOINT, [
+                (c.run_id, c.step, c.node, int(c.full), encode(c.delta))
+                for c in checkpoints
+            ])
+    
+    def get_checkpoints(self, run_id: str) -> List[Any]:
+        """A run's checkpoints, ordered by step."""
+        return [
+            Checkpoint(run_id, step, node, decode(delta), bool(full))
+            for step, node, full, delta in self._conn().execute(
+                "SELECT step, node, full, delta FROM checkpoints "
+                "WHERE run_id = ? ORDER BY step", (run_id,)
+            )
+        ]
+    
+    # Writer
+    
+    def flush(self) -> None:
+        """Commit all buffered writes now."""
+        self._flush(self._conn())
+    
+    def _flush(self, conn: sqlite3.Connection) -> None:
+        with self._flush_lock:
+            with self._lock:
+                runs, self._pending_runs = self._pending_runs, {}
+                graphs, self._pending_graphs = self._pending_graphs, {}
+                self._inflight_runs = runs
+            if not runs and not graphs:
+                return
+            try:
+                graph_rows = [
+                    (graph_id, graph.name, encode(graph.model_dump(mode="json")), saved, saved)
+                    for graph_id, (graph, saved) in graphs.items()
+                ]
+                run_rows = [
+                    _run_row(run_id, run, updated_at)
+                    for run_id, (run, updated_at) in runs.items()
+                ]
+                with conn:
+                    if graph_rows:
+                        conn.executemany(_UPSERT_GRAPH, graph_rows)
+                    if run_rows:
+                        conn.executemany(_UPSERT_RUN, run_rows)
+            except sqlite3.Error:
+                # Requeue the batch unless a newer write superseded it
+                with self._lock:
+                    for run_id, row in runs.items():
+                        self._pending_runs.setdefault(run_id, row)
+                    for graph_id, row in graphs.items():
+                        self._pending_graphs.setdefault(graph_id, row)
+                raise
+            finally:
+                with self._lock:
+                    self._inflight_runs = {}
+            self.metrics["batches_written"] += 1
+            self.metrics["rows_written"] += len(runs) + len(graphs)
+    
+    def _maintain(self, conn: sqlite3.Connection) -> None:
+        """
+        Drop payloads of runs past their TTL or beyond the count limit,
+        and graphs beyond the graph limit.
+        """
+        active = tuple(ACTIVE_STATUSES)
+        marks = ", ".join("?" for _ in active)
+        evicted: List[str] = []
+        with conn:
+            if self.run_ttl_seconds is not None:
+                cursor = conn.execute(
+                    "UPDATE runs SET status = 'expired', payload = NULL "
+                    "WHERE payload IS NOT NULL AND pinned = 0 "
+                    f"AND status NOT IN ({marks}) AND updated_at < ?",
+                    (*active, time.time() - self.run_ttl_seconds)
+                )
+                self.metrics["runs_expired"] += cursor.rowcount
+            if self.max_runs is not None:
+                cursor = conn.execute(
+                    "UPDATE runs SET status = 'evicted', payload = NULL "
+                    "WHERE run_id IN ("
+                    "  SELECT run_id FROM runs WHERE payload IS NOT NULL "
+                    f"  AND pinned = 0 AND status NOT IN ({marks}) "
+                    "  ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                    (*active, self.max_runs)
+                )
+                self.metrics["runs_evicted_count"] += cursor.rowcount
+            conn.execute(
+                "DELETE FROM checkpoints WHERE run_id IN "
+                "(SELECT run_id FROM runs WHERE payload IS NULL)"
+            )
+            if self.max_graphs is not None:
+                evicted = self._prune_graphs(conn, active, marks)
+        if evicted:
+            with self._lock:
+                for graph_id in evicted:
+                    self._graph_cache.pop(graph_id, None)
+            self._notify_evicted(evicted)
+    
+    def _prune_graphs(self, conn: sqlite3.Connection, active: Tuple, marks: str) -> List[str]:
+        """
+        Delete the least recently used graph rows beyond ``max_graphs``;
+        graphs of queued and running runs are kept. Returns their IDs.
+        """
+        # Graphs cached in memory are the ones in use here
+        with self._lock:
+            cached = list(self._graph_cache)
+        now = time.time()
+        conn.executemany(
+            "UPDATE graphs SET used_at = ? WHERE graph_id = ?",
+            [(now, graph_id) for graph_id in cached]
+        )
+        evicted = [row[0] for row in conn.execute(
+            "SELECT graph_id FROM graphs WHERE graph_id NOT IN ("
+            f"  SELECT graph_id FROM runs WHERE status IN ({marks})) "
+            "ORDER BY COALESCE(used_at, created_at) DESC LIMIT -1 OFFSET ?",
+            (*active, self.max_graphs)
+        )]
+        for i in range(0, len(evicted), 500):
+            chunk = evicted[i:i + 500]
+            conn.execute(
+                f"DELETE FROM graphs WHERE graph_id IN ({', '.join('?' for _ in chunk)})", chunk
+            )
+        self.metrics["graphs_evicted"] += len(evicted)
+        return evicted
+    
+    def _write_loop(self) -> None:
+        conn = self._conn()
+        last_maintenance = time.monotonic()
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self._flush(conn)
+                if time.monotonic() - last_maintenance > self.maintenance_interval:
+                    self._maintain(conn)
+                    last_maintenance = time.monotonic()
+            except sqlite3.Error as e:
+                print(f"✗ SQLite writer error: {e}")
+        self._flush(conn)
+    
+    def close(self) -> None:
+        """Flush buffered writes and stop the writer thread."""
+        self._stop.set()
+        self._wake.set()
+        self._writer.join(timeout=5)
@@ -0,0 +1,116 @@
+"""
+State Merge - Merge policies for joining parallel branch results.
+"""
+from typing import Dict, Any, Callable, List, Optional
+
+Reducer = Callable[[List[Any]], Any]
+MergeFn = Callable[[List[Dict[str, Any]]], Dict[str, Any]]
+
+MERGE_POLICIES = ("last_writer", "reduce", "error")
+
+class StateMergeError(ValueError):
+    """Raised when parallel branches write conflicting values."""
+
+def _extend(values: List[Any]) -> List[Any]:
+    merged: List[Any] = []
+    for value in values:
+        merged.extend(value if isinstance(value, (list, tuple)) else [value])
+    return merged
+
+def _union(values: List[Any]) -> Dict[str, Any]:
+    merged: Dict[str, Any] = {}
+    for value in values:
+        merged.update(value)
+    return merged
+
+REDUCERS: Dict[str, Reducer] = {
+    "sum": sum,
+    "max": max,
+    "min": min,
+    "extend": _extend,
+    "union": _union,
+    "all": all,
+    "any": any,
+}
+
+def register_reducer(name: str, reducer: Reducer) -> None:
+    """Register a named reducer usable from join node configs."""
+    if name in REDUCERS:
+        raise ValueError(f"Reducer '{name}' is already registered")
+    REDUCERS[name] = reducer
+
+def _get_reducer(name: str) -> Reducer:
+    reducer = REDUCERS.get(name)
+    if reducer is None:
+        raise ValueError(
+            f"Unknown reducer '{name}'. Available: {list(REDUCERS)}"
+        )
+    return reducer
+
+def _collect(partials: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """Group written values by key, in branch order."""
+    written: Dict[str, List[Any]] = {}
+    for partial in partials:
+        for key, value in partial.items():
+            written.setdefault(key, []).append(value)
+    return written
+
+def build_merge(config: Optional[Dict[str, Any]]) -> MergeFn:
+    """
+    Build a merge function from a join node config. The merge function
+    folds the branch results into a single state delta.
+    
+    ``merge`` selects the policy:
+    
+    * ``last_writer`` - later branches (in declared order) win
+    * ``reduce`` - keys written by several branches are combined with
+      ``reducers[key]`` or the default ``reducer``; others last-writer
+    * ``error`` - keys written by several branches with different
+      values raise StateMergeError
+    """
+    config = config or {}
+    policy = config.get("merge", "last_writer")
+    if policy not in MERGE_POLICIES:
+        raise ValueError(
+            f"Unknown merge policy '{policy}'. Available: {list(MERGE_POLICIES)}"
+        )
+    
+    if policy == "last_writer":
+        def merge_last_writer(partials):
+            merged: Dict[str, Any] = {}
+            for partial in partials:
+                merged.update(partial)
+            return merged
+        return merge_last_writer
+    
+    if policy == "error":
+        def merge_or_fail(partials):
+            merged: Dict[str, Any] = {}
+            for key, values in _collect(partials).items():
+                first = values[0]
+                if any(value != first for value in values[1:]):
+                    raise StateMergeError(
+                        f"Conflicting writes to state key '{key}' "
+                        f"from parallel branches"
+                    )
+                merged[key] = first
+            return merged
+        return merge_or_fail
+    
+    default_name = config.get("reducer")
+    default = _get_reducer(default_name) if default_name else None
+    per_key = {
+        key: _get_reducer(name)
+        for key, name in (config.get("reducers") or {}).items()
+    }
+    
+    def merge_reduce(partials):
+        merged: Dict[str, Any] = {}
+        for key, values in _collect(partials).items():
+            reducer = per_key.get(key, default)
+            if len(values) == 1 or reducer is None:
+                merged[key] = values[-1]
+            else:
+                merged[key] = reducer(values)
+        return merged
+    return merge_reduce
@@ -0,0 +1,92 @@
+"""
+Storage - Pluggable storage interface for graphs and workflow runs.
+"""
+from typing import Dict, Any, Optional, Callable, List
+from abc import ABC, abstractmethod
+
+class StorageBackend(ABC):
+    """
+    Interface shared by run/graph stores.
+    
+    Implementations: the in-memory StateManager (memory_core) and the
+    SQLite WAL-mode SQLiteStateManager (sqlite_core).
+    """
+    
+    @abstractmethod
+    def save_graph(self, graph_id: str, graph_data: Any) -> None:
+        """Store a graph definition."""
+    
+    @abstractmethod
+    def get_graph(self, graph_id: str) -> Optional[Any]:
+        """Retrieve a graph definition."""
+    
+    @abstractmethod
+    def save_run(self, run_id: str, run_data: Any) -> None:
+        """Store a workflow run."""
+    
+    @abstractmethod
+    def get_run(self, run_id: str) -> Optional[Any]:
+        """Retrieve a workflow run."""
+    
+    @abstractmethod
+    def list_graphs(self) -> list:
+        """List all graph IDs."""
+    
+    @abstractmethod
+    def list_runs(self) -> list:
+        """List all run IDs."""
+    
+    def release_run(self, run_id: str) -> None:
+        """
+        Stop serving an active run from this process's memory, so reads
+        see writes by the process now executing it.
+        """
+    
+    def run_status(self, run_id: str) -> Optional[str]:
+        """Return why a known run is gone ("expired"/"evicted"), or None."""
+        return None
+    
+    def pin_run(self, run_id: str) -> bool:
+        """Exempt a run from eviction."""
+        return False
+    
+    def unpin_run(self, run_id: str) -> None:
+        """Make a pinned run evictable again."""
+    
+    def on_graph_evicted(self, listener: Callable[[str], None]) -> None:
+        """Register a callback invoked with the ID of each evicted graph."""
+    
+    def save_checkpoints(self, checkpoints: List[Any]) -> None:
+        """Store a batch of run checkpoints."""
+    
+    def get_checkpoints(self, run_id: str) -> List[Any]:
+        """A run's checkpoints, ordered by step."""
+        return []
+    
+    def stats(self) -> Dict[str, Any]:
+        """Backend occupancy and eviction counters."""
+        return {}
+    
+    def flush(self) -> None:
+        """Persist any buffered writes."""
+    
+    def close(self) -> None:
+        """Flush and release resources."""
+        self.flush()
+
+def create_storage(settings: Any) -> StorageBackend:
+    """Build the storage backend selected by ``settings.storage``."""
+    if settings.storage == "memory":
+        from nexus_api.pulse_engine.memory_core import state_manager
+        return state_manager
+    if settings.storage == "sqlite":
+        from nexus_api.pulse_engine.sqlite_core import SQLiteStateManager
+        return SQLiteStateManager(
+            settings.sqlite_path,
+            flush_interval=settings.sqlite_flush_ms / 1000,
+            batch_size=settings.sqlite_batch_size,
+            max_runs=settings.max_runs,
+            run_ttl_seconds=settings.run_ttl_seconds,
+            max_graphs=settings.max_graphs
+        )
+    raise ValueError(f"Unknown storage backend '{settings.storage}'")
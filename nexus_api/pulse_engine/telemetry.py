@@ -0,0 +1,289 @@
+"""
+Telemetry - Preaggregated counters, gauges and histograms for /metrics.
+"""
+from typing import Dict, Any, Optional, Callable, List, Tuple, Sequence
+from bisect import bisect_left
+import math
+
+from nexus_api.settings import settings
+
+# Seconds; tuned for tool calls from sub-millisecond to tens of seconds
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+# Seconds; condition predicates are expected to run in microseconds
+CONDITION_BUCKETS = (
+    0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005,
+    0.0001, 0.00025, 0.001, 0.01
+)
+RUN_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+SIZE_BUCKETS = (1, 4, 16, 64, 256, 1024, 4096, 16384)
+
+LabelValues = Tuple[str, ...]
+
+# Label value shared by series beyond a LabelLimit
+OTHER = "other"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class Counter:
+    """Monotonic counter, one series per label tuple."""
+    __slots__ = ("name", "help", "labels", "_values")
+    kind = "counter"
+    
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+    
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        """Increment the series for ``label_values``."""
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+    
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+    
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_labels(self.labels, lv)} {_number(v)}"
+            for lv, v in list(self._values.items())
+        ]
+
+class Gauge:
+    """
+    Point-in-time value. With ``collect`` the value is read at scrape
+    time; the callable returns a number or a ``{label_tuple: value}`` map.
+    """
+    __slots__ = ("name", "help", "labels", "_values", "collect")
+    kind = "gauge"
+    
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        collect: Optional[Callable[[], Any]] = None
+    ):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self.collect = collect
+    
+    def set(self, value: float, *label_values: str) -> None:
+        self._values[label_values] = value
+    
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+    
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) - amount
+    
+    def samples(self) -> List[str]:
+        values = self._values
+        if self.collect is not None:
+            collected = self.collect()
+            if collected is None:
+                return []
+            values = collected if isinstance(collected, dict) else {(): collected}
+        return [
+            f"{self.name}{_labels(self.labels, lv)} {_number(v)}"
+            for lv, v in list(values.items())
+        ]
+
+class Histogram:
+    """
+    Fixed-bucket histogram. Observations increment a single bucket
+    (found by bisection); cumulative counts are built at scrape time.
+    """
+    __slots__ = ("name", "help", "labels", "buckets", "_series")
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label tuple -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[LabelValues, list] = {}
+    
+    def observe(self, value: float, *label_values: str) -> None:
+        """Record one observation for ``label_values``."""
+        series = self._series.get(label_values)
+        if series is None:
+            series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            self._series[label_values] = series
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+    
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return series[2] if series else 0
+    
+    def samples(self) -> List[str]:
+        lines = []
+        bounds = self.buckets + (math.inf,)
+        for lv, (counts, total, count) in list(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labels, lv, le)} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_labels(self.labels, lv)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, lv)} {count}")
+        return lines
+
+class LabelLimit:
+    """
+    Caps the distinct values of a client-controlled label: the first
+    ``limit`` values seen get their own series, later ones should be
+    reported as ``OTHER``. ``None`` disables the cap.
+    """
+    __slots__ = ("limit", "_seen")
+    
+    def __init__(self, limit: Optional[int]):
+        self.limit = limit
+        self._seen: set = set()
+    
+    def admit(self, value: Any) -> bool:
+        """Whether ``value`` may have its own series."""
+        if value in self._seen:
+            return True
+        if self.limit is not None and len(self._seen) >= self.limit:
+            return False
+        self._seen.add(value)
+        return True
+
+class MetricsRegistry:
+    """Named metrics rendered together in Prometheus text format."""
+    
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+    
+    def _add(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' already registered")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+    
+    def gauge(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        collect: Optional[Callable[[], Any]] = None
+    ) -> Gauge:
+        return self._add(Gauge(name, help, labels, collect))
+    
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+    
+    def get(self, name: str) -> Optional[Any]:
+        return self._metrics.get(name)
+    
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                samples = metric.samples()
+            except Exception:
+                continue  # a failing collector must not break the scrape
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+# Global metrics registry and the engine's core metrics
+metrics = MetricsRegistry()
+
+# Graph and node names come from clients, so their series are capped
+graph_labels = LabelLimit(settings.metrics_max_graphs)
+node_labels = LabelLimit(settings.metrics_max_nodes)
+
+node_seconds = metrics.histogram(
+    "qflow_node_duration_seconds",
+    "Node execution time", ("graph", "node")
+)
+tool_seconds = metrics.histogram(
+    "qflow_tool_duration_seconds",
+    "Tool call time, including result-cache hits", ("tool",)
+)
+tool_errors = metrics.counter(
+    "qflow_tool_errors_total",
+    "Tool calls that raised", ("tool",)
+)
+condition_seconds = metrics.histogram(
+    "qflow_condition_duration_seconds",
+    "Conditional edge evaluation time", ("graph", "node"),
+    buckets=CONDITION_BUCKETS
+)
+runs_total = metrics.counter(
+    "qflow_runs_total",
+    "Finished runs by final status", ("graph", "status")
+)
+run_seconds = metrics.histogram(
+    "qflow_run_duration_seconds",
+    "Run execution time", ("graph",),
+    buckets=RUN_BUCKETS
+)
+run_steps = metrics.histogram(
+    "qflow_run_steps",
+    "Steps taken per finished run", ("graph",),
+    buckets=SIZE_BUCKETS
+)
+run_state_keys = metrics.histogram(
+    "qflow_run_state_keys",
+    "Keys in the final state of a run", ("graph",),
+    buckets=SIZE_BUCKETS
+)
+active_runs = metrics.gauge(
+    "qflow_active_runs",
+    "Runs currently executing"
+)
+admission_rejected = metrics.counter(
+    "qflow_admission_rejected_total",
+    "Runs refused by admission control, by limit", ("reason",)
+)
+admission_wait_seconds = metrics.histogram(
+    "qflow_admission_wait_seconds",
+    "Time runs spent queued for admission"
+)
+single_flight_runs = metrics.counter(
+    "qflow_single_flight_runs_total",
+    "Coalescable runs: executed (leader), joined in flight or served cached", ("outcome",)
+)
\ No newline at end of file
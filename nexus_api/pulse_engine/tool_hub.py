@@ -1,49 +1,243 @@
 """
 Tool Hub - Registry for managing executable functions.
 """
-from typing import Dict, Callable, Optional
+from typing import Dict, Any, Callable, Optional, Sequence, Tuple
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
 import asyncio
-from functools import wraps
+import importlib
+import multiprocessing
+import pickle
+from functools import wraps, partial
+
+from nexus_api.pulse_engine.result_cache import ResultCache, input_key, is_miss
+from nexus_api.pulse_engine.profiler import active_profile
+
+EXECUTION_MODES = ("inline", "thread", "process")
+
+def _freeze(result: Any) -> Optional[bytes]:
+    """Pickled copy of a result for the cache; None if not picklable."""
+    try:
+        return pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return None
+
+def _thaw(frozen: Any) -> Any:
+    """A fresh copy of a cached result (or the miss sentinel)."""
+    return frozen if is_miss(frozen) else pickle.loads(frozen)
 
 class ToolRegistry:
     """
     Global registry for workflow tools.
     Handles both sync and async functions automatically.
+    
+    Sync tools run in one of three modes: ``inline`` on the event loop,
+    ``thread`` on a shared thread pool, or ``process`` on a shared
+    process pool. Pools are bounded and created on first use.
+    
+    Tools registered as ``pure`` with the state keys they ``reads`` are
+    memoized in a shared ResultCache keyed by a hash of those inputs.
+    Results are cached pickled and every hit gets its own copy, so runs
+    mutating a result cannot change the cache.
     """
     
-    def __init__(self):
+    def __init__(self, thread_workers: Optional[int] = None,
+                 process_workers: Optional[int] = None):
         self._tools: Dict[str, Callable] = {}
+        self._async_tools: Dict[str, Callable] = {}
+        self._modes: Dict[str, str] = {}
+        self._reads: Dict[str, Tuple[str, ...]] = {}
+        self.result_cache = ResultCache()
+        self._thread_workers = thread_workers
+        self._process_workers = process_workers
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
     
-    def register(self, name: str, func: Callable) -> None:
-        """Register a tool function."""
+    def register(
+        self,
+        name: str,
+        func: Callable,
+        mode: str = "inline",
+        pure: bool = False,
+        reads: Optional[Sequence[str]] = None
+    ) -> None:
+        """
+        Register a tool function.
+        
+        A ``pure`` tool's result must depend only on the state keys
+        listed in ``reads``; its results are then cached across runs.
+        """
         if name in self._tools:
             raise ValueError(f"Tool '{name}' is already registered")
+        if mode not in EXECUTION_MODES:
+            raise ValueError(
+                f"Unknown execution mode '{mode}'. Available: {list(EXECUTION_MODES)}"
+            )
+        if mode != "inline" and asyncio.iscoroutinefunction(func):
+            raise ValueError(f"Async tool '{name}' must use 'inline' mode")
+        if mode == "process":
+            try:
+                pickle.dumps(func)
+            except Exception:
+                raise ValueError(
+                    f"Tool '{name}' must be a module-level function for 'process' mode"
+                )
+        if pure and not reads:
+            raise ValueError(f"Pure tool '{name}' must declare the state keys it reads")
         self._tools[name] = func
-        print(f"✓ Registered tool: {name}")
+        self._modes[name] = mode
+        if pure:
+            self._reads[name] = tuple(reads)
+            tool = self._memoize(name, func, mode, self._reads[name])
+        else:
+            tool = self._make_async(func, mode)
+        self._async_tools[name] = tool
+        print(f"✓ Registered tool: {name} ({mode}{', pure' if pure else ''})")
     
-    def decorator(self, name: str):
+    def decorator(self, name: str, mode: str = "inline",
+                  pure: bool = False, reads: Optional[Sequence[str]] = None):
         """Decorator for tool registration."""
         def wrapper(func: Callable):
-            self.register(name, func)
+            self.register(name, func, mode, pure=pure, reads=reads)
             return func
         return wrapper
     
-    def get_tool(self, name: str) -> Optional[Callable]:
-        """
-        Get a tool and wrap it to be async if needed.
-        """
-        tool = self._tools.get(name)
-        if not tool:
-            return None
+    def _make_async(self, tool: Callable, mode: str) -> Callable:
+        """Wrap sync functions to be async (done once, at registration)."""
+        if asyncio.iscoroutinefunction(tool):
+            return tool
         
-        # Wrap sync functions to be async
-        if not asyncio.iscoroutinefunction(tool):
+        # Profiled runs (see profiler.active_profile) route sync calls
+        # through the run's profile; process-mode calls are not profiled.
+        if mode == "inline":
             @wraps(tool)
             async def async_wrapper(*args, **kwargs):
+                profile = active_profile.get()
+                if profile is not None:
+                    return profile.bind(partial(tool, *args, **kwargs))()
                 return tool(*args, **kwargs)
             return async_wrapper
         
-        return tool
+        get_pool = self._get_thread_pool if mode == "thread" else self._get_process_pool
+        profiled = mode == "thread"
+        
+        @wraps(tool)
+        async def pooled_wrapper(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            call = partial(tool, *args, **kwargs) if kwargs else partial(tool, *args)
+            if profiled:
+                profile = active_profile.get()
+                if profile is not None:
+                    call = profile.bind(call)
+            return await loop.run_in_executor(get_pool(), call)
+        return pooled_wrapper
+    
+    def _memoize(
+        self,
+        name: str,
+        func: Callable,
+        mode: str,
+        reads: Tuple[str, ...]
+    ) -> Callable:
+        """
+        Serve repeat inputs of a pure tool from the result cache.
+        
+        Hashing the inputs (which may be megabytes of code), reading a
+        spilled entry and pickling results stay off the event loop:
+        thread-mode tools do it all in their pooled call, other tools
+        hop to the thread pool around the call.
+        """
+        cache = self.result_cache
+        
+        def lookup(state):
+            key = input_key(name, state, reads)
+            return key, _thaw(cache.get(key))
+        
+        def store(key, result):
+            frozen = _freeze(result)
+            if frozen is not None:
+                cache.put(key, frozen)
+        
+        if mode == "thread":
+            @wraps(func)
+            def memo_call(state):
+                key, result = lookup(state)
+                if is_miss(result):
+                    result = func(state)
+                    store(key, result)
+                return result
+            return self._make_async(memo_call, mode)
+        
+        tool = self._make_async(func, mode)
+        
+        @wraps(func)
+        async def memo_wrapper(state):
+            loop = asyncio.get_running_loop()
+            pool = self._get_thread_pool()
+            key, result = await loop.run_in_executor(pool, lookup, state)
+            if is_miss(result):
+                result = await tool(state)
+                await loop.run_in_executor(pool, store, key, result)
+            return result
+        return memo_wrapper
+    
+    def configure_cache(self, maxsize: Optional[int] = None,
+                        spill_dir: Optional[str] = None,
+                        max_spill_bytes: Optional[int] = None) -> None:
+        """Configure the shared result cache."""
+        self.result_cache.configure(
+            maxsize=maxsize, spill_dir=spill_dir, max_spill_bytes=max_spill_bytes
+        )
+    
+    def configure_pools(self, thread_workers: Optional[int] = None,
+                        process_workers: Optional[int] = None) -> None:
+        """Set pool sizes; takes effect for pools not yet started."""
+        if thread_workers is not None:
+            self._thread_workers = thread_workers
+        if process_workers is not None:
+            self._process_workers = process_workers
+    
+    def _get_thread_pool(self) -> Executor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                max_workers=self._thread_workers,
+                thread_name_prefix="qflow-tool"
+            )
+        return self._thread_pool
+    
+    def _get_process_pool(self) -> Executor:
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self._process_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._process_pool
+    
+    def get_pool(self, mode: str) -> Executor:
+        """Return the shared thread or process pool, creating it if needed."""
+        if mode == "thread":
+            return self._get_thread_pool()
+        if mode == "process":
+            return self._get_process_pool()
+        raise ValueError(f"No pool for execution mode '{mode}'")
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down the shared pools."""
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=wait)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=wait)
+            self._process_pool = None
+    
+    def get_tool(self, name: str) -> Optional[Callable]:
+        """
+        Get the async callable for a tool.
+        """
+        return self._async_tools.get(name)
+    
+    def get_mode(self, name: str) -> Optional[str]:
+        """Get the execution mode of a tool."""
+        return self._modes.get(name)
     
     def list_tools(self) -> list:
         """List all registered tool names."""
@@ -54,4 +248,9 @@ class ToolRegistry:
         return len(self._tools)
 
 # Global tool registry instance
-tool_hub = ToolRegistry()
\ No newline at end of file
+tool_hub = ToolRegistry()
+
+def load_tool_modules(modules: Sequence[str]) -> None:
+    """Import modules that register their tools on ``tool_hub`` when imported."""
+    for module in modules:
+        importlib.import_module(module)
\ No newline at end of file
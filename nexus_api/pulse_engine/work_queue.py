@@ -0,0 +1,285 @@
+"""
+Work Queue - SQLite-backed run queue shared by API and worker processes.
+"""
+from typing import Dict, Any, Optional, List, Set, Tuple, Iterator
+from contextlib import contextmanager
+import json
+import sqlite3
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    args TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'queued',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    cancel INTEGER NOT NULL DEFAULT 0,
+    awaited INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    enqueued_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(state, priority DESC, job_id);
+CREATE INDEX IF NOT EXISTS idx_jobs_run_id ON jobs(run_id);
+"""
+
+# Finished jobs nobody collected (their waiter went away) are purged after this
+_DONE_RETENTION_SECONDS = 3600.0
+
+@contextmanager
+def _immediate(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """Write transaction taken up front, so concurrent leasers serialize."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+class Job:
+    """A leased unit of work: execute or resume one run."""
+    __slots__ = ("job_id", "kind", "run_id", "args", "attempts")
+    
+    def __init__(self, job_id: int, kind: str, run_id: str, args: Dict[str, Any], attempts: int):
+        self.job_id = job_id
+        self.kind = kind
+        self.run_id = run_id
+        self.args = args
+        self.attempts = attempts
+
+class WorkQueue:
+    """
+    Durable priority queue of run jobs in a SQLite (WAL mode) file,
+    shared by every process on a host.
+    
+    Workers lease jobs for ``visibility_timeout`` seconds and extend the
+    lease while they work; a job whose lease lapses (its worker died) is
+    handed to the next worker. Jobs enqueued with ``awaited`` keep their
+    outcome until the waiter collects it; others are deleted when done.
+    """
+    
+    def __init__(
+        self,
+        path: str,
+        visibility_timeout: float = 30.0,
+        max_attempts: int = 3
+    ):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+    
+    def _conn(self) -> sqlite3.Connection:
+        """Per-thread autocommit connection in WAL mode."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+    
+    # Producers
+    
+    def enqueue(
+        self,
+        kind: str,
+        run_id: str,
+        args: Dict[str, Any],
+        priority: int = 0,
+        awaited: bool = False
+    ) -> int:
+        """Add a job and return its ID."""
+        return self.enqueue_many(kind, [run_id], args, priority, awaited)[0]
+    
+    def enqueue_many(
+        self,
+        kind: str,
+        run_ids: List[str],
+        args: Dict[str, Any],
+        priority: int = 0,
+        awaited: bool = False
+    ) -> List[int]:
+        """Add one job per run in a single transaction; returns their IDs."""
+        row = (json.dumps(args), priority, int(awaited), time.time())
+        with _immediate(self._conn()) as conn:
+            return [
+                conn.execute(
+                    "INSERT INTO jobs (kind, run_id, args, priority, awaited, enqueued_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (kind, run_id, *row)
+                ).lastrowid
+                for run_id in run_ids
+            ]
+    
+    def outcomes(self, job_ids: List[int]) -> Dict[int, Tuple[Optional[str], Optional[str]]]:
+        """
+        ``{job_id: (result, error)}`` for the awaited jobs that have
+        finished, deleting them. A job removed by cancellation reports
+        an error.
+        """
+        found: Dict[int, Tuple[str, Optional[str], Optional[str]]] = {}
+        conn = self._conn()
+        for i in range(0, len(job_ids), 500):
+            chunk = job_ids[i:i + 500]
+            marks = ", ".join("?" for _ in chunk)
+            for job_id, state, result, error in conn.execute(
+                f"SELECT job_id, state, result, error FROM jobs WHERE job_id IN ({marks})", chunk
+            ):
+                found[job_id] = (state, result, error)
+        
+        finished = {}
+        for job_id in job_ids:
+            row = found.get(job_id)
+            if row is None:
+                finished[job_id] = (None, "Job was cancelled")
+            elif row[0] == "done":
+                finished[job_id] = (row[1], row[2])
+        done = [job_id for job_id in finished if job_id in found]
+        for i in range(0, len(done), 500):
+            chunk = done[i:i + 500]
+            conn.execute(
+                f"DELETE FROM jobs WHERE job_id IN ({', '.join('?' for _ in chunk)})", chunk
+            )
+        return finished
+    
+    def discard(self, job_id: int) -> None:
+        """Stop awaiting a job; it is deleted once it finishes."""
+        conn = self._conn()
+        conn.execute("DELETE FROM jobs WHERE job_id = ? AND state = 'done'", (job_id,))
+        conn.execute("UPDATE jobs SET awaited = 0 WHERE job_id = ?", (job_id,))
+    
+    def cancel_run(self, run_id: str) -> Optional[str]:
+        """
+        Cancel a run's pending job: a queued job is removed ("queued"),
+        a leased one is flagged for its worker ("running"). None if the
+        run has no pending job.
+        """
+        with _immediate(self._conn()) as conn:
+            row = conn.execute(
+                "SELECT job_id, state FROM jobs WHERE run_id = ? AND state != 'done' "
+                "ORDER BY job_id DESC LIMIT 1", (run_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, state = row
+            if state == "queued":
+                conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+                return "queued"
+            conn.execute("UPDATE jobs SET cancel = 1 WHERE job_id = ?", (job_id,))
+            return "running"
+    
+    def is_pending(self, run_id: str) -> bool:
+        """Whether a run has a queued or leased job."""
+        return self._conn().execute(
+            "SELECT 1 FROM jobs WHERE run_id = ? AND state != 'done' LIMIT 1", (run_id,)
+        ).fetchone() is not None
+    
+    # Workers
+    
+    def lease(self, owner: str, limit: int = 1) -> List[Job]:
+        """
+        Lease up to ``limit`` jobs, highest priority first: queued jobs
+        and jobs whose previous lease lapsed.
+        """
+        now = time.time()
+        with _immediate(self._conn()) as conn:
+            rows = conn.execute(
+                "SELECT job_id, kind, run_id, args, attempts FROM jobs "
+                "WHERE state = 'queued' OR (state = 'leased' AND lease_expires < ?) "
+                "ORDER BY priority DESC, job_id LIMIT ?", (now, limit)
+            ).fetchall()
+            if rows:
+                conn.executemany(
+                    "UPDATE jobs SET state = 'leased', owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1 WHERE job_id = ?",
+                    [(owner, now + self.visibility_timeout, row[0]) for row in rows]
+                )
+        return [
+            Job(job_id, kind, run_id, json.loads(args), attempts + 1)
+            for job_id, kind, run_id, args, attempts in rows
+        ]
+    
+    def extend(self, owner: str, job_ids: List[int]) -> Set[int]:
+        """
+        Renew the leases ``owner`` holds; returns the IDs of jobs flagged
+        for cancellation.
+        """
+        if not job_ids:
+            return set()
+        marks = ", ".join("?" for _ in job_ids)
+        conn = self._conn()
+        conn.execute(
+            f"UPDATE jobs SET lease_expires = ? WHERE owner = ? AND job_id IN ({marks})",
+            (time.time() + self.visibility_timeout, owner, *job_ids)
+        )
+        return {row[0] for row in conn.execute(
+            f"SELECT job_id FROM jobs WHERE cancel = 1 AND job_id IN ({marks})", job_ids
+        )}
+    
+    def complete(
+        self,
+        job_id: int,
+        owner: str,
+        result: Optional[str] = None,
+        error: Optional[str] = None
+    ) -> None:
+        """Finish a leased job, keeping its outcome only if it is awaited."""
+        now = time.time()
+        with _immediate(self._conn()) as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE job_id = ? AND owner = ? AND awaited = 0",
+                (job_id, owner)
+            )
+            conn.execute(
+                "UPDATE jobs SET state = 'done', result = ?, error = ?, finished_at = ? "
+                "WHERE job_id = ? AND owner = ?",
+                (result, error, now, job_id, owner)
+            )
+            conn.execute(
+                "DELETE FROM jobs WHERE state = 'done' AND finished_at < ?",
+                (now - _DONE_RETENTION_SECONDS,)
+            )
+    
+    # Introspection
+    
+    def depth(self) -> int:
+        """Jobs waiting for a worker."""
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM jobs WHERE state = 'queued'"
+        ).fetchone()[0]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Jobs by state, live workers and lease settings."""
+        conn = self._conn()
+        by_state = dict(conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"))
+        workers = conn.execute(
+            "SELECT COUNT(DISTINCT owner) FROM jobs WHERE state = 'leased' AND lease_expires >= ?",
+            (time.time(),)
+        ).fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "jobs_by_state": by_state,
+            "busy_workers": workers,
+            "visibility_timeout_seconds": self.visibility_timeout,
+            "max_attempts": self.max_attempts
+        }
+    
+    def close(self) -> None:
+        """Close this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,90 @@
+"""
+Responses - Fast JSON encoding and response shaping for run results.
+"""
+from typing import Dict, Any, Optional, Mapping, Sequence
+import json
+
+from fastapi.responses import Response
+
+from nexus_api.pulse_engine.flow_state import FlowState
+from nexus_api.pulse_engine.run_log import RunLog
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode to compact JSON bytes, with orjson when available.
+    
+    Values orjson rejects (e.g. ints beyond 64 bits) fall back to the
+    stdlib encoder; unknown types are rendered with ``str``.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+        except (TypeError, orjson.JSONEncodeError):
+            pass
+    return json.dumps(
+        content, default=str, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+class FastJSONResponse(Response):
+    """
+    JSON response encoded directly with ``dumps``.
+    
+    Handlers return it explicitly so FastAPI's ``jsonable_encoder``
+    pass over the payload is skipped.
+    """
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def shape_state(
+    state: Mapping[str, Any],
+    include: Optional[Sequence[str]] = None,
+    exclude: Optional[Sequence[str]] = None
+) -> Dict[str, Any]:
+    """
+    Select state keys for a response. With ``include`` only those keys
+    are read, so a FlowState is never fully materialized.
+    """
+    if include is not None:
+        skip = set(exclude or ())
+        return {key: state[key] for key in include if key in state and key not in skip}
+    if isinstance(state, FlowState):
+        state = state.materialize()
+    if not exclude:
+        return state
+    skip = set(exclude)
+    return {key: value for key, value in state.items() if key not in skip}
+
+def shape_logs(
+    run_log: RunLog,
+    mode: str = "full",
+    offset: int = 0,
+    limit: Optional[int] = None
+) -> Optional[Any]:
+    """
+    Logs for a response: None for ``none``, counts and the final entry
+    for ``summary``, or a page of rendered entries for ``full``.
+    """
+    if mode == "none":
+        return None
+    if mode == "summary":
+        return run_log.summary()
+    return run_log.render_range(offset, limit)
+
+def log_page(run_log: RunLog, offset: int, limit: Optional[int]) -> Dict[str, Any]:
+    """Pagination details for a page of logs."""
+    total = len(run_log)
+    end = total if limit is None else min(total, offset + limit)
+    return {
+        "offset": offset,
+        "limit": limit,
+        "total": total,
+        "dropped": run_log.dropped,
+        "next_offset": end if end < total else None
+    }
@@ -4,11 +4,14 @@ Flow Models - Pydantic schemas for requests and responses.
 from typing import Dict, Any, Optional, List, Union
 from datetime import datetime
 from enum import Enum
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr, computed_field
+
+from nexus_api.pulse_engine.flow_state import FlowState
+from nexus_api.pulse_engine.run_log import RunLog
 
 class NodeConfig(BaseModel):
     """Node configuration in a graph."""
-    type: str = Field(..., description="Node type: 'function', 'condition'")
+    type: str = Field(..., description="Node type: 'function', 'join'")
     function: Optional[str] = Field(None, description="Tool function name")
     config: Optional[Dict[str, Any]] = Field(None, description="Additional config")
 
@@ -19,6 +22,12 @@ class Graph(BaseModel):
     edges: Dict[str, Any]
     start_node: str
     description: Optional[str] = None
+    strict_conditions: bool = Field(
+        False, description="Raise on condition errors instead of taking if_false"
+    )
+    max_concurrency: Optional[int] = Field(
+        None, description="Max branches of a parallel edge running at once"
+    )
 
 class LogLevel(str, Enum):
     """Log severity levels."""
@@ -33,15 +42,65 @@ class ExecutionLog(BaseModel):
     message: str
 
 class WorkflowRun(BaseModel):
-    """Represents a workflow execution."""
+    """
+    Represents a workflow execution.
+    
+    ``state`` is backed by a copy-on-write FlowState and only
+    materialized into a dict when read. Logs are compact records in a
+    RunLog, rendered to ExecutionLog entries on demand.
+    """
     run_id: str
     graph_id: str
-    state: Dict[str, Any]
     status: str
-    logs: List[ExecutionLog]
     started_at: datetime
     completed_at: Optional[datetime] = None
     error: Optional[str] = None
+    alias_of: Optional[str] = None  # run whose execution this one shared
+    
+    _flow_state: FlowState = PrivateAttr(default_factory=FlowState)
+    _run_log: RunLog = PrivateAttr(default_factory=RunLog)
+    
+    def __init__(
+        self,
+        state: Optional[Dict[str, Any]] = None,
+        log: Optional[Union[RunLog, Dict[str, Any]]] = None,
+        **data: Any
+    ):
+        super().__init__(**data)
+        if state is not None:
+            self.state = state
+        if log is not None:
+            self._run_log = log if isinstance(log, RunLog) else RunLog.from_dict(log)
+    
+    @computed_field
+    @property
+    def state(self) -> Dict[str, Any]:
+        return self._flow_state.materialize()
+    
+    @state.setter
+    def state(self, value: Dict[str, Any]) -> None:
+        self._flow_state = value if isinstance(value, FlowState) else FlowState(value)
+    
+    @property
+    def flow_state(self) -> FlowState:
+        """The underlying copy-on-write state."""
+        return self._flow_state
+    
+    @computed_field
+    @property
+    def log(self) -> Dict[str, Any]:
+        """Compact log records, as persisted by the stores."""
+        return self._run_log.to_dict()
+    
+    @property
+    def run_log(self) -> RunLog:
+        """The underlying log ring buffer."""
+        return self._run_log
+    
+    @property
+    def logs(self) -> List[ExecutionLog]:
+        """Rendered log entries."""
+        return [ExecutionLog(**entry) for entry in self._run_log.render_all()]
 
 class CreateGraphRequest(BaseModel):
     """Request to create a new graph."""
@@ -50,14 +109,123 @@ class CreateGraphRequest(BaseModel):
     edges: Dict[str, Any]
     start_node: str
     description: Optional[str] = None
+    strict_conditions: bool = False
+    max_concurrency: Optional[int] = None
+
+class LogVerbosity(str, Enum):
+    """Run log verbosity levels."""
+    OFF = "off"
+    SUMMARY = "summary"
+    STEPS = "steps"
+
+class ProfileMode(str, Enum):
+    """Run profiler modes."""
+    SAMPLING = "sampling"
+    CPROFILE = "cprofile"
+
+class LogDetail(str, Enum):
+    """How much of a run's log a response includes."""
+    NONE = "none"
+    SUMMARY = "summary"
+    FULL = "full"
+
+class ResponseOptions(BaseModel):
+    """Response shaping shared by run requests."""
+    include_state_keys: Optional[List[str]] = Field(
+        None, description="Only return these final state keys"
+    )
+    exclude_state_keys: Optional[List[str]] = Field(
+        None, description="Omit these final state keys (e.g. 'code')"
+    )
+    logs: LogDetail = Field(LogDetail.FULL, description="Log detail: none, summary or full")
+    log_offset: int = Field(0, ge=0, description="First log entry returned")
+    log_limit: Optional[int] = Field(None, ge=0, description="Max log entries returned")
+
+class RunOptions(ResponseOptions):
+    """Execution options shared by run requests."""
+    submit: bool = Field(
+        False, description="Queue the run and return its run_id immediately"
+    )
+    priority: int = Field(0, description="Higher priority runs start first")
+    deadline_seconds: Optional[float] = Field(
+        None, description="Stop the run after this many seconds"
+    )
+    profile: bool = Field(
+        False, description="Profile this run; see /graph/profile/{run_id}"
+    )
+    profile_mode: Optional[ProfileMode] = Field(
+        None, description="Profiler mode (defaults to the server setting)"
+    )
+    log_verbosity: Optional[LogVerbosity] = Field(
+        None, description="Run log detail; 'summary' skips per-step logs"
+    )
+    coalesce: Optional[bool] = Field(
+        None, description="Share the execution of identical in-flight runs (defaults to the server setting)"
+    )
 
-class RunGraphRequest(BaseModel):
+class ResumeRequest(ResponseOptions):
+    """Request to resume a stopped run or replay one from a step."""
+    from_step: Optional[int] = Field(
+        None, ge=0, description="Replay into a new run from the checkpoint at or before this step"
+    )
+    deadline_seconds: Optional[float] = Field(
+        None, description="Stop the resumed run after this many seconds"
+    )
+    profile: bool = Field(False, description="Profile the resumed run")
+    profile_mode: Optional[ProfileMode] = Field(
+        None, description="Profiler mode (defaults to the server setting)"
+    )
+    log_verbosity: Optional[LogVerbosity] = Field(
+        None, description="Log detail for a replayed run"
+    )
+
+class RunGraphRequest(RunOptions):
     """Request to run a graph."""
     graph_id: str
     initial_state: Dict[str, Any]
 
-class PrismRunRequest(BaseModel):
+class BatchRunRequest(BaseModel):
+    """Request to run many initial states against one graph."""
+    graph_id: str
+    initial_states: List[Dict[str, Any]]
+    concurrency: Optional[int] = Field(
+        None, description="Max concurrent runs (capped by the server limit)"
+    )
+    deadline_seconds: Optional[float] = Field(
+        None, description="Per-run deadline"
+    )
+    log_verbosity: Optional[LogVerbosity] = Field(
+        None, description="Run log detail; 'summary' skips per-step logs"
+    )
+
+class PrismRunRequest(RunOptions):
     """Request for Code Review workflow."""
     code: str = Field(..., description="Source code to review")
     threshold: int = Field(70, description="Quality score threshold")
-    max_iterations: int = Field(3, description="Maximum refinement loops")
\ No newline at end of file
+    max_iterations: int = Field(3, description="Maximum refinement loops")
+    base_run_id: Optional[str] = Field(
+        None, description="Earlier review run to re-analyze incrementally against"
+    )
+    base_revision: Optional[str] = Field(
+        None, description="Revision hash of earlier reviewed code"
+    )
+
+class PrismRepoRequest(BaseModel):
+    """Request to review every Python file under a local directory."""
+    path: str = Field(..., description="Directory, relative to the server's review root")
+    worst: int = Field(10, description="Number of worst functions to report")
+
+class PrismBatchRequest(BaseModel):
+    """Request to review many code blobs with the Code Review workflow."""
+    codes: List[str] = Field(..., description="Source code blobs to review")
+    threshold: int = Field(70, description="Quality score threshold")
+    max_iterations: int = Field(3, description="Maximum refinement loops")
+    concurrency: Optional[int] = Field(
+        None, description="Max concurrent runs (capped by the server limit)"
+    )
+    deadline_seconds: Optional[float] = Field(
+        None, description="Per-run deadline"
+    )
+    log_verbosity: Optional[LogVerbosity] = Field(
+        None, description="Run log detail; 'summary' skips per-step logs"
+    )
@@ -0,0 +1,134 @@
+"""
+Settings - Runtime configuration read from QFLOW_* environment variables.
+"""
+from typing import Optional, List
+import os
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+def _env_limit(name: str, default: Optional[float]) -> Optional[float]:
+    """Numeric limit where 0 disables the limit."""
+    value = os.environ.get(name)
+    if not value:
+        return default
+    return float(value) or None
+
+def _env_str(name: str, default: str) -> str:
+    return os.environ.get(name) or default
+
+def _env_list(name: str) -> List[str]:
+    """Comma-separated values."""
+    return [item.strip() for item in os.environ.get(name, "").split(",") if item.strip()]
+
+def _as_int(value: Optional[float]) -> Optional[int]:
+    return None if value is None else int(value)
+
+class Settings:
+    """Engine configuration, overridable through the environment."""
+    
+    def __init__(self):
+        cpus = os.cpu_count() or 1
+        
+        # Tool execution pools
+        self.thread_pool_workers = _env_int(
+            "QFLOW_THREAD_POOL_WORKERS", min(32, cpus + 4)
+        )
+        self.process_pool_workers = _env_int("QFLOW_PROCESS_POOL_WORKERS", cpus)
+        self.prism_tool_mode = _env_str("QFLOW_PRISM_TOOL_MODE", "thread")
+        
+        # Pure tool result cache (spill directory is optional)
+        self.result_cache_size = _env_int("QFLOW_RESULT_CACHE_SIZE", 1024)
+        self.result_cache_dir = os.environ.get("QFLOW_RESULT_CACHE_DIR")
+        self.result_cache_dir_bytes = _env_int(
+            "QFLOW_RESULT_CACHE_DIR_BYTES", 256 * 1024 * 1024
+        )
+        
+        # Modules imported at startup (API and workers) to register tools
+        self.tool_modules = _env_list("QFLOW_TOOL_MODULES")
+        
+        # Where runs execute: "local" (this process) or "cluster", where
+        # the API only queues runs for `python -m nexus_api.worker`
+        # processes sharing the SQLite store and work queue on this host
+        self.execution = _env_str("QFLOW_EXECUTION", "local")
+        self.queue_path = _env_str("QFLOW_QUEUE_PATH", "quantumflow-queue.db")
+        self.queue_visibility_seconds = _env_int("QFLOW_QUEUE_VISIBILITY_SECONDS", 30)
+        self.queue_max_attempts = _env_int("QFLOW_QUEUE_MAX_ATTEMPTS", 3)
+        self.queue_poll_ms = _env_int("QFLOW_QUEUE_POLL_MS", 20)
+        self.worker_processes = _env_int("QFLOW_WORKER_PROCESSES", cpus)
+        self.worker_concurrency = _env_int("QFLOW_WORKER_CONCURRENCY", 4)
+        
+        # Background run submission
+        self.run_workers = _env_int("QFLOW_RUN_WORKERS", 4)
+        self.run_queue_size = _env_int("QFLOW_RUN_QUEUE_SIZE", 1000)
+        
+        # Admission control for synchronous runs (0 disables a limit):
+        # concurrent runs overall and per graph, summed initial-state
+        # bytes, and how long a run may queue before a 429
+        self.max_concurrent_runs = _as_int(_env_limit("QFLOW_MAX_CONCURRENT_RUNS", 64))
+        self.max_graph_concurrency = _as_int(_env_limit("QFLOW_MAX_GRAPH_CONCURRENCY", None))
+        self.max_inflight_state_bytes = _as_int(
+            _env_limit("QFLOW_MAX_INFLIGHT_STATE_BYTES", 256 * 1024 * 1024)
+        )
+        self.admission_wait_ms = _env_int("QFLOW_ADMISSION_WAIT_MS", 250)
+        self.admission_queue_size = _env_int("QFLOW_ADMISSION_QUEUE_SIZE", 256)
+        
+        # Single-flight coalescing of identical runs: on for every
+        # synchronous run (requests can override), and how long completed
+        # results keep answering identical requests (0 disables)
+        self.single_flight = bool(_env_int("QFLOW_SINGLE_FLIGHT", 0))
+        self.single_flight_ttl_seconds = _env_limit("QFLOW_SINGLE_FLIGHT_TTL_SECONDS", None)
+        self.single_flight_cache_size = _env_int("QFLOW_SINGLE_FLIGHT_CACHE_SIZE", 1024)
+        
+        # Largest CodePrism ``code`` accepted, in bytes (0 disables)
+        self.max_code_bytes = _as_int(_env_limit("QFLOW_MAX_CODE_BYTES", 5 * 1024 * 1024))
+        
+        # Batch endpoints
+        self.batch_concurrency = _env_int("QFLOW_BATCH_CONCURRENCY", 8)
+        self.max_batch_size = _env_int("QFLOW_MAX_BATCH_SIZE", 1000)
+        
+        # Per-subscriber event buffer for streamed runs
+        self.stream_buffer_size = _env_int("QFLOW_STREAM_BUFFER_SIZE", 256)
+        
+        # /metrics series: distinct graph names and (graph, node) pairs
+        # labelled individually; the rest are reported as "other"
+        self.metrics_max_graphs = _as_int(_env_limit("QFLOW_METRICS_MAX_GRAPHS", 100))
+        self.metrics_max_nodes = _as_int(_env_limit("QFLOW_METRICS_MAX_NODES", 2000))
+        
+        # Run profiling: mode for sampled runs and the fraction sampled
+        self.profile_mode = _env_str("QFLOW_PROFILE_MODE", "sampling")
+        self.profile_sample_rate = _env_limit("QFLOW_PROFILE_SAMPLE_RATE", None)
+        self.profile_interval_ms = _env_int("QFLOW_PROFILE_INTERVAL_MS", 5)
+        self.max_profiles = _env_int("QFLOW_MAX_PROFILES", 100)
+        
+        # Run logs: "off", "summary" or "steps", and records kept per run
+        self.run_log_verbosity = _env_str("QFLOW_RUN_LOG_VERBOSITY", "steps")
+        self.run_log_cap = _env_int("QFLOW_RUN_LOG_CAP", 1000)
+        
+        # Step checkpoints for resume/replay: steps between checkpoints
+        # (0 disables) and the background writer's batching
+        self.checkpoint_every = _as_int(_env_limit("QFLOW_CHECKPOINT_EVERY", 10))
+        self.checkpoint_flush_ms = _env_int("QFLOW_CHECKPOINT_FLUSH_MS", 50)
+        self.checkpoint_batch_size = _env_int("QFLOW_CHECKPOINT_BATCH_SIZE", 256)
+        
+        # Run and graph store limits (0 disables a limit)
+        self.max_runs = _as_int(_env_limit("QFLOW_MAX_RUNS", 10000))
+        self.max_run_bytes = _as_int(_env_limit("QFLOW_MAX_RUN_BYTES", 512 * 1024 * 1024))
+        self.run_ttl_seconds = _env_limit("QFLOW_RUN_TTL_SECONDS", 3600)
+        self.max_graphs = _as_int(_env_limit("QFLOW_MAX_GRAPHS", 1000))
+        
+        # Repository reviews: local paths must live under repo_root
+        self.repo_root = _env_str("QFLOW_REPO_ROOT", ".")
+        self.repo_max_file_bytes = _env_int("QFLOW_REPO_MAX_FILE_BYTES", 5 * 1024 * 1024)
+        self.max_archive_bytes = _env_int("QFLOW_MAX_ARCHIVE_BYTES", 256 * 1024 * 1024)
+        self.repo_index_size = _env_int("QFLOW_REPO_INDEX_SIZE", 100000)
+        
+        # Storage backend: "memory" or "sqlite"
+        self.storage = _env_str("QFLOW_STORAGE", "memory")
+        self.sqlite_path = _env_str("QFLOW_SQLITE_PATH", "quantumflow.db")
+        self.sqlite_flush_ms = _env_int("QFLOW_SQLITE_FLUSH_MS", 50)
+        self.sqlite_batch_size = _env_int("QFLOW_SQLITE_BATCH_SIZE", 256)
+
+# Global settings instance
+settings = Settings()
@@ -0,0 +1,316 @@
+"""
+Worker - Cluster worker processes executing runs from the shared work queue.
+
+Start next to an API running with ``QFLOW_EXECUTION=cluster`` and
+``QFLOW_STORAGE=sqlite`` (same working directory or same paths):
+
+    python -m nexus_api.worker --processes 4
+"""
+from typing import Dict, Any, Optional, Iterable
+from multiprocessing.connection import wait
+from datetime import datetime
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import uuid
+
+from nexus_api.pulse_engine.executor import GraphExecutor
+from nexus_api.pulse_engine.tool_hub import tool_hub, load_tool_modules
+from nexus_api.pulse_engine.storage import create_storage
+from nexus_api.pulse_engine.checkpoint import CheckpointWriter, ResumeError
+from nexus_api.pulse_engine.work_queue import WorkQueue, Job
+from nexus_api.pulse_engine.run_log import LogEvent
+from nexus_api.agents.code_prism import register_prism_tools
+from nexus_api.settings import settings
+
+_FINISH_EVENTS = {
+    "failed": LogEvent.FAILED,
+    "timed_out": LogEvent.TIMED_OUT,
+}
+
+class Worker:
+    """
+    One engine process: leases jobs and executes up to ``concurrency``
+    runs at a time, renewing its leases while they run. Renewal has a
+    thread of its own, so a tool that blocks the event loop cannot let
+    the leases lapse.
+    
+    A job leased again after its lease lapsed resumes the run from its
+    last checkpoint; after ``max_attempts`` leases the run is failed.
+    """
+    
+    def __init__(
+        self,
+        executor: GraphExecutor,
+        queue: WorkQueue,
+        concurrency: int = 4,
+        poll_interval: float = 0.02
+    ):
+        self.executor = executor
+        self.storage = executor.state_manager
+        self.queue = queue
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._active: Dict[int, asyncio.Task] = {}
+        self._active_lock = threading.Lock()  # read by the renewal thread
+        self._stopping = False
+        self.metrics: Dict[str, int] = {"jobs": 0, "resumed": 0, "abandoned": 0, "errors": 0}
+    
+    def stop(self) -> None:
+        """Stop leasing; runs in progress finish first."""
+        self._stopping = True
+    
+    async def run(self) -> None:
+        """Lease and execute jobs until stopped, then drain."""
+        stopped = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat,
+            args=(asyncio.get_running_loop(), stopped),
+            name="qflow-lease-renewal",
+            daemon=True
+        )
+        heartbeat.start()
+        delay = self.poll_interval
+        try:
+            while not self._stopping:
+                free = self.concurrency - len(self._active)
+                jobs = await asyncio.to_thread(self.queue.lease, self.owner, free) if free else []
+                for job in jobs:
+                    task = asyncio.create_task(self._process(job))
+                    with self._active_lock:
+                        self._active[job.job_id] = task
+                    task.add_done_callback(lambda _, job_id=job.job_id: self._untrack(job_id))
+                # Poll quickly while there is work, back off when idle
+                delay = self.poll_interval / 8 if jobs else min(delay * 2, self.poll_interval)
+                await asyncio.sleep(delay)
+            if self._active:
+                await asyncio.wait(list(self._active.values()))
+        finally:
+            stopped.set()
+            await asyncio.to_thread(heartbeat.join)
+    
+    def _untrack(self, job_id: int) -> None:
+        with self._active_lock:
+            self._active.pop(job_id, None)
+    
+    def _heartbeat(self, loop: asyncio.AbstractEventLoop, stopped: threading.Event) -> None:
+        """Renewal thread: extend the leases, cancel jobs flagged in the queue."""
+        interval = min(self.queue.visibility_timeout / 3, 1.0)
+        while not stopped.wait(interval):
+            with self._active_lock:
+                job_ids = list(self._active)
+            try:
+                cancelled = self.queue.extend(self.owner, job_ids)
+            except Exception as e:
+                print(f"✗ Lease renewal failed: {e}")
+                continue
+            if cancelled:
+                loop.call_soon_threadsafe(self._cancel, cancelled)
+    
+    def _cancel(self, job_ids: Iterable[int]) -> None:
+        for job_id in job_ids:
+            task = self._active.get(job_id)
+            if task is not None:
+                task.cancel()
+    
+    async def _process(self, job: Job) -> None:
+        self.metrics["jobs"] += 1
+        result: Optional[str] = None
+        error: Optional[str] = None
+        try:
+            result = await self._execute(job)
+        except asyncio.CancelledError:
+            # Cancelled through the queue; the executor recorded it on the run
+            result, error = job.run_id, "Run was cancelled"
+        except Exception as e:
+            self.metrics["errors"] += 1
+            error = str(e)
+            print(f"✗ Job {job.job_id} ({job.kind} {job.run_id}) failed: {e}")
+        # The finished run must be readable before the job reports done
+        await asyncio.to_thread(self.storage.flush)
+        await asyncio.to_thread(self.queue.complete, job.job_id, self.owner, result, error)
+    
+    async def _execute(self, job: Job) -> str:
+        """Run a job; returns the ID of the run it produced."""
+        args = job.args
+        if job.kind == "resume":
+            run = await self.executor.resume(
+                job.run_id,
+                args.get("from_step"),
+                deadline_seconds=args.get("deadline_seconds"),
+                profile=args.get("profile"),
+                log_verbosity=args.get("log_verbosity")
+            )
+            return run.run_id
+        
+        run = self.storage.get_run(job.run_id)
+        if run is None:
+            raise ValueError(f"Run '{job.run_id}' not found")
+        if run.status not in ("queued", "running"):
+            return run.run_id  # finished by an earlier lease, or cancelled
+        if job.attempts > self.queue.max_attempts:
+            self.metrics["abandoned"] += 1
+            self._finish(run, "failed", f"Run abandoned after {job.attempts - 1} lost workers")
+            return run.run_id
+        
+        remaining = None
+        if args.get("deadline_at") is not None:
+            remaining = args["deadline_at"] - time.time()
+            if remaining <= 0:
+                self._finish(run, "timed_out", "Deadline passed while queued")
+                return run.run_id
+        
+        # A previous worker died mid-run: continue from its last checkpoint
+        if job.attempts > 1 and self.executor.checkpoints is not None:
+            try:
+                run = await self.executor.resume(
+                    job.run_id, deadline_seconds=remaining, profile=args.get("profile")
+                )
+                self.metrics["resumed"] += 1
+                return run.run_id
+            except ResumeError:
+                pass  # nothing checkpointed yet; start over
+        
+        await self.executor.execute_run(run, remaining, profile=args.get("profile"))
+        return run.run_id
+    
+    def _finish(self, run, status: str, error: str) -> None:
+        run.status = status
+        run.error = error
+        run.completed_at = datetime.utcnow()
+        self.executor._log(run, _FINISH_EVENTS[status], payload=error)
+        self.storage.save_run(run.run_id, run)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Active jobs and counters."""
+        return {"owner": self.owner, "active": len(self._active), **self.metrics}
+
+async def serve(processes: int, concurrency: int) -> None:
+    """Run one worker process until SIGTERM/SIGINT (a second signal exits at once)."""
+    if settings.storage != "sqlite":
+        raise SystemExit("Cluster workers need QFLOW_STORAGE=sqlite")
+    
+    tool_hub.configure_pools(
+        thread_workers=settings.thread_pool_workers,
+        process_workers=max(1, settings.process_pool_workers // processes)
+    )
+    tool_hub.configure_cache(
+        maxsize=settings.result_cache_size,
+        spill_dir=settings.result_cache_dir,
+        max_spill_bytes=settings.result_cache_dir_bytes
+    )
+    register_prism_tools(tool_hub, mode=settings.prism_tool_mode)
+    load_tool_modules(settings.tool_modules)
+    
+    storage = create_storage(settings)
+    checkpoints = None
+    if settings.checkpoint_every:
+        checkpoints = CheckpointWriter(
+            storage,
+            every=settings.checkpoint_every,
+            flush_interval=settings.checkpoint_flush_ms / 1000,
+            batch_size=settings.checkpoint_batch_size
+        )
+    executor = GraphExecutor(
+        tool_hub, storage,
+        log_verbosity=settings.run_log_verbosity,
+        log_cap=settings.run_log_cap,
+        checkpoints=checkpoints
+    )
+    worker = Worker(
+        executor,
+        WorkQueue(
+            settings.queue_path,
+            visibility_timeout=settings.queue_visibility_seconds,
+            max_attempts=settings.queue_max_attempts
+        ),
+        concurrency=concurrency,
+        poll_interval=settings.queue_poll_ms / 1000
+    )
+    
+    def on_signal():
+        if worker._stopping:
+            os._exit(1)  # leases lapse and the runs are picked up again
+        print(f"✓ Worker {worker.owner} draining")
+        worker.stop()
+    
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, on_signal)
+    
+    print(f"✓ Worker {worker.owner} started ({concurrency} concurrent runs)")
+    try:
+        await worker.run()
+    finally:
+        if checkpoints is not None:
+            checkpoints.close()
+        storage.close()
+        tool_hub.shutdown(wait=False)
+    print(f"✓ Worker {worker.owner} stopped: {worker.stats()}")
+
+def _serve_process(processes: int, concurrency: int) -> None:
+    asyncio.run(serve(processes, concurrency))
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m nexus_api.worker",
+        description="Execute queued runs for an API running with QFLOW_EXECUTION=cluster."
+    )
+    parser.add_argument(
+        "--processes", type=int, default=settings.worker_processes,
+        help="Worker processes (default: QFLOW_WORKER_PROCESSES or the CPU count)"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=settings.worker_concurrency,
+        help="Concurrent runs per process (default: QFLOW_WORKER_CONCURRENCY)"
+    )
+    args = parser.parse_args(argv)
+    processes = max(1, args.processes)
+    
+    if processes == 1:
+        _serve_process(1, args.concurrency)
+        return 0
+    
+    # Supervise the workers: forward stop signals, restart crashed ones
+    context = multiprocessing.get_context("spawn")
+    stopping = False
+    
+    def start():
+        process = context.Process(
+            target=_serve_process, args=(processes, args.concurrency), name="qflow-worker"
+        )
+        process.start()
+        return process
+    
+    workers = [start() for _ in range(processes)]
+    
+    def forward(signum, frame):
+        nonlocal stopping
+        stopping = True
+        if signum == signal.SIGINT:
+            return  # a terminal's Ctrl-C already reached the whole group
+        for process in workers:
+            if process.is_alive():
+                os.kill(process.pid, signum)
+    
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    
+    while workers:
+        wait([process.sentinel for process in workers])
+        for process in [p for p in workers if not p.is_alive()]:
+            workers.remove(process)
+            if not stopping and process.exitcode != 0:
+                print(f"✗ Worker process {process.pid} exited with {process.exitcode}; restarting")
+                workers.append(start())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
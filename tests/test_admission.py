@@ -0,0 +1,118 @@
+"""
+Tests for admission control of synchronous runs.
+"""
+import asyncio
+
+import pytest
+
+from nexus_api.pulse_engine.admission import AdmissionController, AdmissionRejected
+
+def test_rejects_with_429_and_retry_after_when_full():
+    admission = AdmissionController(max_concurrent=1)
+    
+    async def scenario():
+        ticket = await admission.acquire("g")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.acquire("g")
+        admission.release(ticket)
+        admission.release(ticket)  # a second release does nothing
+        return rejected.value, await admission.acquire("g")
+    
+    rejected, ticket = asyncio.run(scenario())
+    
+    assert rejected.status_code == 429 and rejected.reason == "concurrency"
+    assert rejected.retry_after >= 1
+    assert admission.stats()["active_runs"] == 1 and ticket.runs == 1
+
+def test_retry_after_follows_recent_run_durations():
+    admission = AdmissionController(max_concurrent=1)
+    admission._avg_seconds = 4.2
+    
+    assert admission.retry_after() == 5
+
+def test_state_that_can_never_fit_gets_413():
+    admission = AdmissionController(max_state_bytes=100)
+    
+    with pytest.raises(AdmissionRejected) as rejected:
+        asyncio.run(admission.acquire("g", size=101))
+    
+    assert rejected.value.status_code == 413
+    assert rejected.value.reason == "state_too_large"
+
+def test_waiters_are_admitted_in_order_as_capacity_frees():
+    admission = AdmissionController(max_concurrent=1, max_wait=1.0)
+    admitted = []
+    
+    async def wait_for(name):
+        ticket = await admission.acquire("g")
+        admitted.append(name)
+        return ticket
+    
+    async def scenario():
+        first = await admission.acquire("g")
+        waiters = [asyncio.create_task(wait_for(n)) for n in ("a", "b")]
+        await asyncio.sleep(0)
+        assert admission.waiting() == 2
+        admission.release(first)
+        admission.release(await waiters[0])
+        admission.release(await waiters[1])
+    
+    asyncio.run(scenario())
+    
+    assert admitted == ["a", "b"]
+    assert admission.stats()["active_runs"] == 0
+
+def test_wait_timeout_and_full_wait_queue_are_rejected():
+    admission = AdmissionController(max_concurrent=1, max_wait=0.01, max_waiting=1)
+    
+    async def scenario():
+        await admission.acquire("g")
+        waiter = asyncio.create_task(admission.acquire("g"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as queue_full:
+            await admission.acquire("g")
+        with pytest.raises(AdmissionRejected) as timed_out:
+            await waiter
+        return queue_full.value, timed_out.value
+    
+    queue_full, timed_out = asyncio.run(scenario())
+    
+    assert queue_full.reason == "queue_full" and queue_full.status_code == 429
+    assert timed_out.reason == "wait_timeout"
+    assert admission.waiting() == 0
+
+def test_per_graph_limit_does_not_block_other_graphs():
+    admission = AdmissionController(max_per_graph=1, max_wait=1.0)
+    
+    async def scenario():
+        await admission.acquire("busy")
+        blocked = asyncio.create_task(admission.acquire("busy"))
+        await asyncio.sleep(0)
+        other = await asyncio.wait_for(admission.acquire("other"), 0.5)
+        blocked.cancel()
+        return other
+    
+    assert asyncio.run(scenario()).graph_id == "other"
+
+def test_batches_are_capped_at_the_limits():
+    admission = AdmissionController(max_concurrent=4, max_per_graph=2)
+    
+    ticket = asyncio.run(admission.acquire("g", runs=10))
+    
+    assert ticket.runs == 2
+
+def test_api_answers_429_with_retry_after(monkeypatch):
+    from fastapi.testclient import TestClient
+    from nexus_api import main
+    
+    admission = AdmissionController(max_concurrent=1)
+    asyncio.run(admission.acquire("other"))
+    monkeypatch.setattr(main, "admission", admission)
+    
+    with TestClient(main.app) as client:
+        response = client.post("/graph/run", json={
+            "graph_id": main.PRISM_GRAPH_ID, "initial_state": {"code": "x = 1\n"}
+        })
+    
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
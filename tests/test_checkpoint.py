@@ -0,0 +1,120 @@
+"""
+Tests for run checkpoints, resume and replay.
+"""
+import asyncio
+
+import pytest
+
+from nexus_api.schemas.flow_models import Graph, NodeConfig
+from nexus_api.pulse_engine.checkpoint import (
+    Checkpoint, CheckpointWriter, ResumeError, rebuild_state, snapshot_delta
+)
+from nexus_api.pulse_engine.executor import GraphExecutor
+from nexus_api.pulse_engine.memory_core import StateManager
+from nexus_api.pulse_engine.tool_hub import ToolRegistry
+
+def _engine(every=1, fail_at=None):
+    """Executor over a four-node chain whose tools append to a list in place."""
+    calls = []
+    
+    def make_step(n):
+        def step(state):
+            calls.append(n)
+            if n == fail_at and calls.count(n) == 1:
+                raise RuntimeError(f"step {n} failed")
+            items = state["items"]
+            items.append(n)
+            return {"items": items, "last": n}
+        return step
+    
+    registry = ToolRegistry()
+    for n in range(4):
+        registry.register(f"s{n}", make_step(n))
+    store = StateManager()
+    writer = CheckpointWriter(store, every=every)
+    executor = GraphExecutor(registry, store, checkpoints=writer)
+    graph_id = executor.register_graph(Graph(
+        name="chain",
+        nodes={f"s{n}": NodeConfig(type="function", function=f"s{n}") for n in range(4)},
+        edges={f"s{n}": f"s{n + 1}" for n in range(3)},
+        start_node="s0"
+    ))
+    return executor, graph_id, writer, calls
+
+def test_checkpoints_are_not_changed_by_later_in_place_mutation():
+    executor, graph_id, writer, _ = _engine()
+    run = asyncio.run(executor.execute(graph_id, {"items": []}))
+    checkpoints = writer.load(run.run_id)
+    writer.close()
+    
+    assert run.state["items"] == [0, 1, 2, 3]
+    assert [c.step for c in checkpoints] == [0, 1, 2, 3, 4]
+    assert [c.delta.get("items") for c in checkpoints] == [[], [0], [0, 1], [0, 1, 2], [0, 1, 2, 3]]
+    assert rebuild_state(checkpoints, 2).delta == {"items": [0, 1], "last": 1}
+
+def test_resume_continues_a_failed_run_from_its_last_checkpoint():
+    executor, graph_id, writer, calls = _engine(fail_at=2)
+    
+    async def scenario():
+        run = await executor.execute(graph_id, {"items": []})
+        assert run.status == "failed" and run.error == "step 2 failed"
+        return await executor.resume(run.run_id)
+    
+    run = asyncio.run(scenario())
+    writer.close()
+    
+    assert run.status == "completed", run.error
+    assert run.state["items"] == [0, 1, 2, 3]
+    assert calls == [0, 1, 2, 2, 3]
+    with pytest.raises(ResumeError, match="already completed"):
+        asyncio.run(executor.resume(run.run_id))
+
+def test_coarse_interval_resumes_from_the_earlier_checkpoint():
+    executor, graph_id, writer, calls = _engine(every=2, fail_at=3)
+    
+    async def scenario():
+        run = await executor.execute(graph_id, {"items": []})
+        return await executor.resume(run.run_id)
+    
+    run = asyncio.run(scenario())
+    writer.close()
+    
+    assert run.status == "completed", run.error
+    assert run.state["items"] == [0, 1, 2, 3]
+    assert calls == [0, 1, 2, 3, 2, 3]  # steps after the step-2 checkpoint re-run
+
+def test_replay_from_step_leaves_the_original_untouched():
+    executor, graph_id, writer, calls = _engine()
+    
+    async def scenario():
+        original = await executor.execute(graph_id, {"items": []})
+        replay = await executor.resume(original.run_id, from_step=2)
+        return original, replay
+    
+    original, replay = asyncio.run(scenario())
+    checkpoints = writer.load(original.run_id)
+    writer.close()
+    
+    assert replay.run_id != original.run_id and replay.status == "completed"
+    assert replay.state["items"] == [0, 1, 2, 3]
+    assert calls == [0, 1, 2, 3, 2, 3]
+    assert original.state["items"] == [0, 1, 2, 3]
+    assert rebuild_state(checkpoints, 2).delta["items"] == [0, 1]
+    with pytest.raises(ResumeError, match="had finished"):
+        asyncio.run(executor.resume(original.run_id, from_step=4))
+
+def test_rebuild_state_needs_a_full_checkpoint():
+    deltas = [Checkpoint("r", 1, 1, {"a": 1}), Checkpoint("r", 2, 2, {"b": 2})]
+    with pytest.raises(ResumeError, match="incomplete"):
+        rebuild_state(deltas)
+    with pytest.raises(ResumeError, match="before step 0"):
+        rebuild_state([Checkpoint("r", 1, 1, {}, full=True)], 0)
+
+def test_snapshot_delta_copies_containers_and_shares_scalars():
+    blob = "x" * 1000
+    nested = {"list": [1, [2]], "lock": None}
+    snapshot = snapshot_delta({"blob": blob, "nested": nested})
+    nested["list"][1].append(3)
+    
+    assert snapshot["blob"] is blob
+    assert snapshot["nested"] == {"list": [1, [2]], "lock": None}
@@ -0,0 +1,129 @@
+"""
+Tests for incremental CodePrism function extraction.
+"""
+import asyncio
+
+import pytest
+
+from nexus_api.agents.code_prism import (
+    build_prism_graph, complexity_analyzer, function_extractor, function_nodes,
+    metrics_cache, register_prism_tools, revision_id
+)
+from nexus_api.pulse_engine.executor import GraphExecutor
+from nexus_api.pulse_engine.memory_core import StateManager
+from nexus_api.pulse_engine.tool_hub import ToolRegistry
+
+BASE = '''import os
+
+s = """
+abc
+"""
+
+def f():
+    return 1
+
+class C:
+    def m(self):
+        return 2
+
+try:
+    import json
+except ImportError:
+    def fallback():
+        return None
+
+x = 1; y = [
+    1,
+    2,
+]
+
+def g(a, b):
+    if a:
+        return b
+    return a
+'''
+
+EDITS = [
+    # Inside a multi-line string: the text must not become a function
+    ("abc", "def g():\n    pass"),
+    ('"""\n\ndef f', '"""\ndef h():\n    return 3\n\ndef f'),
+    ("return 1", "return 10"),
+    ("return 2", "return 2\n\n    def n(self):\n        return 3"),
+    ("return None", "return json"),
+    ("    2,\n", "    2,\n    '''\n    def q(): pass\n    ''',\n"),
+    ("y = [", "def z(): pass\ny = ["),
+    ("class C:", "class D:"),
+    ("    return a\n", "    return a\n\ndef tail():\n    return 0\n"),
+    ("import os\n", ""),
+]
+
+def _extract(code, base_revision=None):
+    state = {"code": code}
+    if base_revision:
+        state["base_revision"] = base_revision
+    return function_extractor(state)
+
+@pytest.mark.parametrize("old, new", EDITS)
+def test_incremental_matches_full_extraction(old, new):
+    assert old in BASE
+    code = BASE.replace(old, new, 1)
+    base = _extract(BASE)
+    
+    incremental = _extract(code, base["revision"])
+    full = _extract(code)
+    
+    assert incremental["functions"] == full["functions"]
+    assert incremental["revision"] == full["revision"] == revision_id(code)
+
+def test_edit_inside_string_reports_no_phantom_functions():
+    base = 's = """\nabc\n"""\n\ndef f():\n    return 1\n'
+    code = base.replace("abc", "def g():\n    pass")
+    revision = _extract(base)["revision"]
+    
+    result = _extract(code, revision)
+    
+    assert [func["qualname"] for func in result["functions"]] == ["f"]
+    assert result["changed_functions"] == []
+
+def test_incremental_reports_only_changed_functions():
+    revision = _extract(BASE)["revision"]
+    
+    result = _extract(BASE.replace("return 1", "return 10"), revision)
+    
+    assert result["changed_functions"] == ["f"]
+    assert result["reused_functions"] == result["function_count"] - 1
+
+def test_chained_revisions_match_full_extraction():
+    code = BASE
+    revision = _extract(code)["revision"]
+    for old, new in EDITS[2:6]:
+        code = code.replace(old, new, 1)
+        result = _extract(code, revision)
+        assert result["functions"] == _extract(code)["functions"]
+        revision = result["revision"]
+
+def test_analyzer_measures_without_extracted_nodes():
+    state = {"code": BASE, **_extract(BASE)}
+    expected = complexity_analyzer(state)
+    metrics_cache.clear()
+    function_nodes.clear()  # as in a process that did not extract the code
+    
+    result = complexity_analyzer(state)
+    
+    assert result["metrics"] == expected["metrics"]
+    assert result["reanalyzed_functions"] == state["function_count"]
+
+def test_review_below_threshold_stops_after_one_pass():
+    registry = ToolRegistry()
+    register_prism_tools(registry)
+    executor = GraphExecutor(registry, StateManager())
+    graph_id = executor.register_graph(build_prism_graph())
+    
+    run = asyncio.run(executor.execute(graph_id, {
+        "code": BASE, "threshold": 101, "max_iterations": 3, "iteration": 0
+    }))
+    
+    assert run.status == "completed", run.error
+    assert run.state["iteration"] == 1
+    assert run.state["quality_score"] < 101
+    assert run.state["converged"] is True
@@ -0,0 +1,78 @@
+"""
+Tests for the restricted edge condition grammar.
+"""
+import pytest
+
+from nexus_api.schemas.flow_models import Graph, NodeConfig
+from nexus_api.pulse_engine.condition_engine import ConditionEngine, ConditionError
+from nexus_api.pulse_engine.flow_plan import compile_graph
+from nexus_api.pulse_engine.tool_hub import ToolRegistry
+
+STATE = {"score": 80, "stop": False, "tags": ["a", "b"], "name": "x", "none": None}
+
+@pytest.mark.parametrize("condition, expected", [
+    ("score >= 70", True),
+    ("score == 80 and stop == False", True),
+    ("stop or score < 50", False),
+    ("not stop", True),
+    ("60 < score <= 80", True),
+    ("60 < score < 80", False),
+    ("'a' in tags and 'c' not in tags", True),
+    ("name in ('x', 'y')", True),
+    ("none is None", True),
+    ("-score < 0", True),
+    ("score in [1, 2, 3]", False),
+])
+def test_evaluates_restricted_expressions(condition, expected):
+    predicate = ConditionEngine().compile(condition)
+    assert predicate(STATE) is expected
+
+@pytest.mark.parametrize("condition", [
+    "__import__('os').system('true')",
+    "len(tags) > 1",
+    "name.upper() == 'X'",
+    "tags[0] == 'a'",
+    "score + 1 > 80",
+    "[t for t in tags]",
+    "lambda: True",
+])
+def test_rejects_anything_outside_the_grammar(condition):
+    with pytest.raises(ConditionError):
+        ConditionEngine().compile(condition)
+
+def test_rejects_invalid_syntax():
+    with pytest.raises(ConditionError, match="Invalid condition"):
+        ConditionEngine().compile("score >")
+
+def test_evaluation_errors_take_the_false_branch():
+    predicate = ConditionEngine().compile("missing > 1")
+    assert predicate(STATE) is False
+    assert ConditionEngine().compile("name > 1")(STATE) is False
+
+def test_strict_mode_raises_evaluation_errors():
+    with pytest.raises(ConditionError, match="'missing' not found"):
+        ConditionEngine().compile("missing > 1", strict=True)(STATE)
+    with pytest.raises(ConditionError, match="failed"):
+        ConditionEngine().compile("name > 1", strict=True)(STATE)
+
+def test_graphs_compile_their_own_predicates():
+    registry = ToolRegistry()
+    registry.register("noop", lambda state: {})
+    
+    def plan(strict):
+        graph = Graph(
+            name="branch",
+            nodes={name: NodeConfig(type="function", function="noop") for name in "abc"},
+            edges={"a": {"condition": "score > 70", "if_true": "b", "if_false": "c"}},
+            start_node="a",
+            strict_conditions=strict
+        )
+        return compile_graph(f"g-{strict}", graph, registry)
+    
+    lenient, strict = plan(False), plan(True)
+    node = lenient.nodes[lenient.index["a"]]
+    
+    assert node.next_index({"score": 90}) == lenient.index["b"]
+    assert node.next_index({}) == lenient.index["c"]
+    with pytest.raises(ConditionError):
+        strict.nodes[strict.index["a"]].next_index({})
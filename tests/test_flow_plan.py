@@ -0,0 +1,90 @@
+"""
+Tests for graph compilation into execution plans.
+"""
+import asyncio
+
+import pytest
+
+from nexus_api.schemas.flow_models import Graph, NodeConfig
+from nexus_api.pulse_engine.executor import GraphExecutor
+from nexus_api.pulse_engine.flow_plan import (
+    END, GraphCompileError, compile_graph, graph_fingerprint
+)
+from nexus_api.pulse_engine.memory_core import StateManager
+from nexus_api.pulse_engine.tool_hub import ToolRegistry
+
+def step(state):
+    return {"count": state.get("count", 0) + 1}
+
+@pytest.fixture
+def registry():
+    registry = ToolRegistry()
+    registry.register("step", step)
+    return registry
+
+def _graph(nodes, edges, start="a", **options):
+    return Graph(
+        name="test",
+        nodes={
+            name: NodeConfig(type=kind, function="step" if kind == "function" else None)
+            for name, kind in nodes.items()
+        },
+        edges=edges,
+        start_node=start,
+        **options
+    )
+
+def test_compiles_nodes_to_indices(registry):
+    graph = _graph({"a": "function", "b": "function"}, {"a": "b"})
+    
+    plan = compile_graph("g", graph, registry)
+    
+    assert plan.start == plan.index["a"]
+    assert plan.nodes[plan.index["a"]].target == plan.index["b"]
+    assert plan.nodes[plan.index["b"]].target == END
+    assert plan.node_name(END) == "end"
+
+@pytest.mark.parametrize("nodes, edges, start, message", [
+    ({"a": "function", "end": "function"}, {}, "a", "reserved"),
+    ({"a": "function"}, {}, "missing", "Start node"),
+    ({"a": "function"}, {"a": "nowhere"}, "a", "unknown node"),
+    ({"a": "function"}, {"b": "a"}, "a", "not a node"),
+    ({"a": "function", "b": "function"}, {}, "a", "Unreachable"),
+    ({"a": "function"}, {"a": {"condition": "x >"}}, "a", "Invalid condition"),
+    ({"a": "function"}, {"a": {"if_true": "end"}}, "a", "no condition"),
+    ({"a": "function"}, {"a": 42}, "a", "Unsupported edge"),
+    ({"a": "join"}, {}, "a", "cannot be a join"),
+    ({"a": "function", "j": "join"}, {"a": "j"}, "a", "only follow a parallel edge"),
+])
+def test_rejects_invalid_graphs(registry, nodes, edges, start, message):
+    with pytest.raises(GraphCompileError, match=message):
+        compile_graph("g", _graph(nodes, edges, start), registry)
+
+def test_rejects_unknown_tool(registry):
+    graph = Graph(
+        name="test",
+        nodes={"a": NodeConfig(type="function", function="missing")},
+        edges={},
+        start_node="a"
+    )
+    with pytest.raises(GraphCompileError, match="Tool 'missing' not found"):
+        compile_graph("g", graph, registry)
+
+def test_fingerprint_is_content_addressed():
+    graph = _graph({"a": "function", "b": "function"}, {"a": "b"})
+    same = _graph({"a": "function", "b": "function"}, {"a": "b"})
+    other = _graph({"a": "function", "b": "function"}, {"a": "b"}, description="x")
+    
+    assert graph_fingerprint(graph) == graph_fingerprint(same)
+    assert graph_fingerprint(graph) != graph_fingerprint(other)
+
+def test_executor_registers_identical_graphs_once(registry):
+    executor = GraphExecutor(registry, StateManager())
+    graph = _graph({"a": "function", "b": "function"}, {"a": "b"})
+    
+    graph_id = executor.register_graph(graph)
+    
+    assert executor.register_graph(graph.model_copy(deep=True)) == graph_id
+    run = asyncio.run(executor.execute(graph_id, {}))
+    assert run.status == "completed"
+    assert run.state == {"count": 2}
@@ -0,0 +1,91 @@
+"""
+Tests for copy-on-write workflow state.
+"""
+import asyncio
+import pickle
+
+from nexus_api.schemas.flow_models import Graph, NodeConfig
+from nexus_api.pulse_engine.executor import GraphExecutor
+from nexus_api.pulse_engine.flow_state import FlowState
+from nexus_api.pulse_engine.memory_core import StateManager
+from nexus_api.pulse_engine.tool_hub import ToolRegistry
+
+def test_deltas_overlay_a_shared_base():
+    base = {"a": 1, "b": 2}
+    state = FlowState(base)
+    
+    state.apply({"b": 3, "c": 4})
+    
+    assert dict(state) == {"a": 1, "b": 3, "c": 4}
+    assert len(state) == 3 and "c" in state and state.get("d") is None
+    assert base == {"a": 1, "b": 2}
+
+def test_materialized_dict_is_rebuilt_after_a_delta():
+    state = FlowState({"a": 1})
+    first = state.materialize()
+    
+    assert state.materialize() is first
+    state.apply({"a": 2})
+    assert state.materialize() == {"a": 2}
+
+def test_copy_and_snapshot_are_independent():
+    state = FlowState({"a": 1})
+    copy = state.copy()
+    snapshot = state.snapshot()
+    
+    copy["a"] = 99
+    state.apply({"a": 2})
+    
+    assert state["a"] == 2
+    assert snapshot["a"] == 1
+
+def test_take_changes_merges_deltas_since_the_last_call():
+    state = FlowState({"a": 1})
+    state.apply({"a": 2})  # before tracking
+    state.track_changes()
+    state.apply({"b": 1})
+    state.apply({"b": 2, "c": 3})
+    
+    assert state.take_changes() == {"b": 2, "c": 3}
+    assert state.take_changes() == {}
+
+def test_pickles_as_a_plain_dict():
+    state = FlowState({"a": 1})
+    state.apply({"b": 2})
+    
+    assert pickle.loads(pickle.dumps(state)) == {"a": 1, "b": 2}
+
+def test_tools_mutating_their_input_do_not_change_earlier_state():
+    seen = []
+    
+    def mutate(state):
+        state["count"] = state.get("count", 0) + 1
+        state.pop("initial", None)
+        return state
+    
+    def record(state):
+        seen.append(dict(state))
+        return {}
+    
+    registry = ToolRegistry()
+    registry.register("mutate", mutate)
+    registry.register("record", record)
+    executor = GraphExecutor(registry, StateManager())
+    graph_id = executor.register_graph(Graph(
+        name="mutating",
+        nodes={
+            "a": NodeConfig(type="function", function="mutate"),
+            "b": NodeConfig(type="function", function="record"),
+            "c": NodeConfig(type="function", function="mutate")
+        },
+        edges={"a": "b", "b": "c"},
+        start_node="a"
+    ))
+    initial = {"initial": True}
+    
+    run = asyncio.run(executor.execute(graph_id, initial))
+    
+    assert run.status == "completed", run.error
+    assert initial == {"initial": True}
+    assert seen == [{"initial": True, "count": 1}]
+    assert run.state == {"initial": True, "count": 2}
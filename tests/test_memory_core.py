@@ -0,0 +1,84 @@
+"""
+Tests for run store limits: TTL, count, bytes and the graph LRU.
+"""
+import time
+from datetime import datetime
+
+from nexus_api.schemas.flow_models import WorkflowRun
+from nexus_api.pulse_engine.memory_core import StateManager
+
+def _run(run_id, status="completed", size=0):
+    return WorkflowRun(
+        run_id=run_id,
+        graph_id="g",
+        status=status,
+        started_at=datetime.utcnow(),
+        state={"payload": "x" * size}
+    )
+
+def _save(store, *runs):
+    for run in runs:
+        store.save_run(run.run_id, run)
+
+def test_count_limit_evicts_oldest_finished_runs():
+    store = StateManager(max_runs=2)
+    _save(store, _run("a"), _run("b"), _run("c"))
+    
+    assert store.list_runs() == ["b", "c"]
+    assert store.get_run("a") is None
+    assert store.run_status("a") == "evicted"
+    assert store.run_status("missing") is None
+    assert store.metrics["runs_evicted_count"] == 1
+
+def test_active_and_pinned_runs_are_not_evicted():
+    store = StateManager(max_runs=2)
+    _save(store, _run("active", status="running"), _run("pinned"))
+    assert store.pin_run("pinned")
+    
+    _save(store, _run("new"))
+    
+    # Only the new run is evictable
+    assert store.list_runs() == ["active", "pinned"]
+    store.unpin_run("pinned")
+    _save(store, _run("newer"))
+    assert store.list_runs() == ["active", "newer"]
+
+def test_byte_limit_evicts_until_under_budget():
+    store = StateManager(max_bytes=50_000)
+    _save(store, *(_run(f"r{i}", size=20_000) for i in range(4)))
+    
+    assert store.list_runs() == ["r2", "r3"]
+    assert store.stats()["estimated_bytes"] <= 50_000
+    assert store.metrics["runs_evicted_bytes"] == 2
+
+def test_resaving_a_run_replaces_its_size():
+    store = StateManager(max_bytes=50_000)
+    for _ in range(5):
+        _save(store, _run("same", size=20_000))
+    
+    assert store.list_runs() == ["same"]
+    assert store.stats()["estimated_bytes"] < 50_000
+
+def test_ttl_expires_finished_runs():
+    store = StateManager(run_ttl_seconds=0.05)
+    _save(store, _run("old"), _run("active", status="running"))
+    time.sleep(0.1)
+    
+    assert store.get_run("old") is None
+    assert store.run_status("old") == "expired"
+    assert store.get_run("active") is not None
+    _save(store, _run("fresh"))
+    assert store.list_runs() == ["active", "fresh"]
+
+def test_graph_lru_notifies_listeners():
+    store = StateManager(max_graphs=2)
+    evicted = []
+    store.on_graph_evicted(evicted.append)
+    store.save_graph("a", {})
+    store.save_graph("b", {})
+    store.get_graph("a")  # most recently used
+    
+    store.save_graph("c", {})
+    
+    assert evicted == ["b"]
+    assert store.list_graphs() == ["a", "c"]
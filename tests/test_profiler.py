@@ -0,0 +1,53 @@
+"""
+Tests for run profiling.
+"""
+import threading
+
+from nexus_api.pulse_engine.profiler import Profiler, active_node
+
+def test_cprofile_sessions_are_exclusive():
+    profiler = Profiler(mode="cprofile", sample_rate=1.0)
+    
+    first = profiler.start("first", "cprofile")
+    assert first.mode == "cprofile" and profiler.cprofile_busy()
+    assert profiler.start("forced", "cprofile").mode == "sampling"
+    assert profiler.start("sampled") is None
+    
+    profiler.finish(first)
+    assert not profiler.cprofile_busy()
+    assert profiler.start("next").mode == "cprofile"
+
+def test_overlapping_calls_in_a_run_are_timed_not_profiled():
+    profile = Profiler().start("run", "cprofile")
+    inside = threading.Event()
+    release = threading.Event()
+    
+    def slow():
+        inside.set()
+        release.wait(5)
+        return "slow"
+    
+    token = active_node.set("slow")
+    try:
+        slow_call = profile.bind(slow)
+    finally:
+        active_node.reset(token)
+    token = active_node.set("fast")
+    try:
+        fast_call = profile.bind(lambda: sum(range(10)))
+    finally:
+        active_node.reset(token)
+    
+    results = []
+    thread = threading.Thread(target=lambda: results.append(slow_call()))
+    thread.start()
+    inside.wait(5)
+    assert fast_call() == 45
+    release.set()
+    thread.join(5)
+    
+    assert results == ["slow"]
+    profile.nodes = {"slow": [1, 0.0], "fast": [1, 0.0]}
+    nodes = profile.report()["nodes"]
+    assert nodes["slow"]["top_functions"]
+    assert nodes["fast"]["top_functions"] == []
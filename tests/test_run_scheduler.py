@@ -0,0 +1,145 @@
+"""
+Tests for the background run scheduler.
+"""
+import asyncio
+
+import pytest
+
+from nexus_api.schemas.flow_models import Graph, NodeConfig
+from nexus_api.pulse_engine.executor import GraphExecutor
+from nexus_api.pulse_engine.memory_core import StateManager
+from nexus_api.pulse_engine.run_scheduler import QueueFullError, RunScheduler
+from nexus_api.pulse_engine.tool_hub import ToolRegistry
+
+def _scheduler(max_queue=1000):
+    """One-worker scheduler whose runs block until ``gate`` is set."""
+    gate = asyncio.Event()
+    order = []
+    
+    async def step(state):
+        await gate.wait()
+        if state.get("stuck"):
+            await asyncio.Event().wait()
+        order.append(state["name"])
+        return {"done": True}
+    
+    registry = ToolRegistry()
+    registry.register("step", step)
+    executor = GraphExecutor(registry, StateManager())
+    graph_id = executor.register_graph(Graph(
+        name="gated",
+        nodes={"step": NodeConfig(type="function", function="step")},
+        edges={},
+        start_node="step"
+    ))
+    scheduler = RunScheduler(executor, workers=1, max_queue=max_queue)
+    return scheduler, graph_id, gate, order
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_higher_priority_runs_start_first():
+    async def scenario():
+        scheduler, graph_id, gate, order = _scheduler()
+        await scheduler.start()
+        await scheduler.submit(graph_id, {"name": "blocker"})
+        await _settle()
+        for name, priority in [("low", 0), ("high", 5), ("low2", 0), ("mid", 2)]:
+            await scheduler.submit(graph_id, {"name": name}, priority=priority)
+        gate.set()
+        while scheduler.metrics["finished"] < 5:
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+        return order
+    
+    assert asyncio.run(scenario()) == ["blocker", "high", "mid", "low", "low2"]
+
+def test_cancelling_queued_runs_frees_capacity():
+    async def scenario():
+        scheduler, graph_id, gate, order = _scheduler(max_queue=2)
+        await scheduler.start()
+        await scheduler.submit(graph_id, {"name": "blocker"})
+        await _settle()
+        
+        for _ in range(3):
+            runs = [await scheduler.submit(graph_id, {"name": "queued"}) for _ in range(2)]
+            with pytest.raises(QueueFullError):
+                await scheduler.submit(graph_id, {"name": "rejected"})
+            assert all([await scheduler.cancel(run.run_id) for run in runs])
+            assert scheduler.queue_depth() == 0
+        
+        kept = await scheduler.submit(graph_id, {"name": "kept"})
+        gate.set()
+        while scheduler.metrics["finished"] < 2:
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+        stored = scheduler.executor.state_manager.get_run(runs[0].run_id)
+        return scheduler, order, kept, stored
+    
+    scheduler, order, kept, stored = asyncio.run(scenario())
+    
+    assert order == ["blocker", "kept"] and kept.status == "completed"
+    assert stored.status == "cancelled"
+    assert scheduler.metrics["cancelled"] == 6
+    assert scheduler.metrics["rejected"] == 3
+
+def test_cancelled_entries_are_compacted():
+    async def scenario():
+        scheduler, graph_id, gate, order = _scheduler()
+        await scheduler.start()
+        await scheduler.submit(graph_id, {"name": "blocker"})
+        await _settle()
+        for _ in range(100):
+            run = await scheduler.submit(graph_id, {"name": "queued"})
+            await scheduler.cancel(run.run_id)
+        heap_size = len(scheduler._heap)
+        await scheduler.stop()
+        return heap_size
+    
+    assert asyncio.run(scenario()) <= 16
+
+def test_cancel_running_run_and_unknown_run():
+    async def scenario():
+        scheduler, graph_id, gate, order = _scheduler()
+        await scheduler.start()
+        run = await scheduler.submit(graph_id, {"name": "blocker"})
+        await _settle()
+        assert scheduler.stats()["active_runs"] == 1
+        cancelled = await scheduler.cancel(run.run_id)
+        await _settle()
+        await scheduler.stop()
+        return scheduler, cancelled
+    
+    scheduler, cancelled = asyncio.run(scenario())
+    
+    assert cancelled and not asyncio.run(scheduler.cancel("missing"))
+    assert scheduler.metrics["cancelled"] == 1
+
+def test_deadline_counts_time_spent_queued():
+    async def scenario():
+        scheduler, graph_id, gate, order = _scheduler()
+        await scheduler.start()
+        await scheduler.submit(graph_id, {"name": "blocker"})
+        await _settle()
+        late = await scheduler.submit(graph_id, {"name": "late"}, deadline_seconds=0.01)
+        stuck = await scheduler.submit(
+            graph_id, {"name": "stuck", "stuck": True}, deadline_seconds=0.2
+        )
+        await asyncio.sleep(0.03)
+        gate.set()
+        while scheduler.metrics["timed_out"] < 2:
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+        return scheduler, late, stuck
+    
+    scheduler, late, stuck = asyncio.run(scenario())
+    
+    assert late.status == "timed_out" and late.error == "Deadline passed while queued"
+    assert stuck.status == "timed_out"
+    assert scheduler.metrics["finished"] == 1
+
+def test_submit_requires_a_started_scheduler():
+    scheduler, graph_id, _, _ = _scheduler()
+    with pytest.raises(RuntimeError):
+        asyncio.run(scheduler.submit(graph_id, {}))
@@ -0,0 +1,119 @@
+"""
+Tests for coalescing identical runs.
+"""
+import asyncio
+
+from nexus_api.schemas.flow_models import Graph, NodeConfig
+from nexus_api.pulse_engine.executor import GraphExecutor
+from nexus_api.pulse_engine.memory_core import StateManager
+from nexus_api.pulse_engine.single_flight import SingleFlight, state_key
+from nexus_api.pulse_engine.tool_hub import ToolRegistry
+
+def _engine(ttl=None, max_runs=None):
+    """Executor over a one-node graph counting its calls, plus a SingleFlight."""
+    calls = []
+    
+    async def double(state):
+        calls.append(state["value"])
+        await asyncio.sleep(0.01)
+        if state["value"] < 0:
+            raise ValueError("negative")
+        return {"doubled": state["value"] * 2}
+    
+    registry = ToolRegistry()
+    registry.register("double", double)
+    store = StateManager(max_runs=max_runs)
+    executor = GraphExecutor(registry, store)
+    graph_id = executor.register_graph(Graph(
+        name="double",
+        nodes={"double": NodeConfig(type="function", function="double")},
+        edges={},
+        start_node="double"
+    ))
+    
+    def runner(value):
+        state = {"value": value}
+        return state_key(graph_id, state), lambda: executor.execute(graph_id, state)
+    
+    return SingleFlight(store, ttl=ttl), store, runner, calls
+
+def test_concurrent_identical_runs_execute_once():
+    flight, store, runner, calls = _engine()
+    
+    async def scenario():
+        key, execute = runner(3)
+        return await asyncio.gather(*(flight.run(key, execute) for _ in range(4)))
+    
+    runs = asyncio.run(scenario())
+    
+    assert calls == [3]
+    leader = [run for run in runs if not run.alias_of]
+    aliases = [run for run in runs if run.alias_of]
+    assert len(leader) == 1 and len(aliases) == 3
+    assert len({run.run_id for run in runs}) == 4
+    for alias in aliases:
+        assert alias.alias_of == leader[0].run_id
+        assert alias.state["doubled"] == 6
+        stored = store.get_run(alias.run_id)
+        assert stored.alias_of == leader[0].run_id and not stored.state
+        assert flight.resolve(stored).state["doubled"] == 6
+
+def test_distinct_states_and_unkeyed_runs_do_not_coalesce():
+    flight, _, runner, calls = _engine()
+    
+    async def scenario():
+        (key_a, run_a), (key_b, run_b) = runner(1), runner(2)
+        return await asyncio.gather(
+            flight.run(key_a, run_a), flight.run(key_b, run_b),
+            flight.run(None, run_a), flight.run(None, run_a)
+        )
+    
+    runs = asyncio.run(scenario())
+    
+    assert sorted(calls) == [1, 1, 1, 2]
+    assert not any(run.alias_of for run in runs)
+    assert state_key("g", {"value": object()}) is None
+
+def test_cache_keeps_run_ids_and_answers_until_the_ttl():
+    flight, _, runner, calls = _engine(ttl=60)
+    
+    async def scenario():
+        key, execute = runner(5)
+        leader = await flight.run(key, execute)
+        return leader, await flight.run(key, execute)
+    
+    leader, cached = asyncio.run(scenario())
+    
+    assert calls == [5]
+    assert cached.alias_of == leader.run_id and cached.state["doubled"] == 10
+    assert list(flight._results.values())[0][0] == leader.run_id
+    assert flight.stats()["cached"] == 1
+
+def test_evicted_leader_is_not_served_from_cache():
+    flight, store, runner, calls = _engine(ttl=60, max_runs=2)
+    
+    async def scenario():
+        key, execute = runner(7)
+        leader = await flight.run(key, execute)
+        for value in (8, 9):  # push the leader out of the run store
+            await flight.run(None, runner(value)[1])
+        return leader, await flight.run(key, execute)
+    
+    leader, again = asyncio.run(scenario())
+    
+    assert store.get_run(leader.run_id) is None
+    assert calls == [7, 8, 9, 7]
+    assert not again.alias_of and again.run_id != leader.run_id
+
+def test_failed_runs_are_not_cached():
+    flight, _, runner, calls = _engine(ttl=60)
+    
+    async def scenario():
+        key, execute = runner(-1)
+        first = await flight.run(key, execute)
+        return first, await flight.run(key, execute)
+    
+    first, second = asyncio.run(scenario())
+    
+    assert first.status == second.status == "failed"
+    assert calls == [-1, -1] and not second.alias_of
@@ -0,0 +1,128 @@
+"""
+Tests for the SQLite storage backend.
+"""
+from datetime import datetime
+
+import pytest
+
+from nexus_api.schemas.flow_models import Graph, NodeConfig, WorkflowRun
+from nexus_api.pulse_engine.checkpoint import Checkpoint
+from nexus_api.pulse_engine.run_log import LogEvent, RunLog
+from nexus_api.pulse_engine.sqlite_core import SQLiteStateManager
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "runs.db")
+
+def _open(path, **options):
+    # Flushes happen explicitly in these tests
+    return SQLiteStateManager(path, flush_interval=60, maintenance_interval=3600, **options)
+
+def _graph(name):
+    return Graph(
+        name=name,
+        nodes={"a": NodeConfig(type="function", function="step")},
+        edges={},
+        start_node="a"
+    )
+
+def _run(run_id, graph_id="g", status="completed", state=None):
+    log = RunLog(("a",), verbosity="summary")
+    log.add(LogEvent.COMPLETED, payload=1)
+    return WorkflowRun(
+        run_id=run_id,
+        graph_id=graph_id,
+        status=status,
+        started_at=datetime(2024, 1, 1),
+        completed_at=datetime(2024, 1, 1, 0, 1),
+        state=state if state is not None else {"value": run_id},
+        log=log
+    )
+
+def test_round_trip_survives_a_restart(path):
+    store = _open(path)
+    store.save_graph("g", _graph("first"))
+    store.save_run("r1", _run("r1", state={"nested": {"a": [1, 2]}}))
+    store.save_checkpoints([
+        Checkpoint("r1", 0, 0, {"nested": {}}, full=True),
+        Checkpoint("r1", 1, -1, {"x": 1})
+    ])
+    store.close()
+    
+    reopened = _open(path)
+    run = reopened.get_run("r1")
+    
+    assert reopened.get_graph("g").name == "first"
+    assert run.state == {"nested": {"a": [1, 2]}}
+    assert run.completed_at == datetime(2024, 1, 1, 0, 1)
+    assert run.logs[0].message.startswith("✓ Workflow completed")
+    assert [(c.step, c.full, c.delta) for c in reopened.get_checkpoints("r1")] == [
+        (0, True, {"nested": {}}), (1, False, {"x": 1})
+    ]
+    assert reopened.list_runs() == ["r1"]
+    reopened.close()
+
+def test_buffered_saves_collapse_and_are_readable(path):
+    store = _open(path)
+    run = _run("r1", status="running")
+    for step in range(10):
+        run.flow_state.apply({"step": step})
+        store.save_run("r1", run)
+    
+    assert store.get_run("r1") is run  # active runs are served live
+    run.status = "completed"
+    store.save_run("r1", run)
+    pending = store.get_run("r1")
+    
+    assert pending is not run and pending.state["step"] == 9
+    store.flush()
+    assert store.metrics["rows_written"] == 1
+    assert store.get_run("r1").status == "completed"
+    store.close()
+
+def test_saved_state_is_a_snapshot(path):
+    store = _open(path)
+    run = _run("r1", state={"a": 1})
+    store.save_run("r1", run)
+    
+    run.flow_state.apply({"a": 2})
+    store.flush()
+    
+    assert store.get_run("r1").state == {"a": 1}
+    store.close()
+
+def test_maintenance_applies_run_limits(path):
+    store = _open(path, max_runs=2)
+    for i in range(4):
+        run = _run(f"r{i}")
+        store.save_run(run.run_id, run)
+        store.flush()
+    store.save_run("q", _run("q", status="queued"))
+    store.flush()
+    assert store.pin_run("r0")
+    
+    store._maintain(store._conn())
+    
+    assert sorted(store.list_runs()) == ["q", "r0", "r2", "r3"]
+    assert store.get_run("r1") is None
+    assert store.run_status("r1") == "evicted"
+    store.close()
+
+def test_maintenance_prunes_graph_rows(path):
+    store = _open(path, max_graphs=2)
+    evicted = []
+    store.on_graph_evicted(evicted.append)
+    for name in ("old", "busy", "b", "c"):
+        store.save_graph(name, _graph(name))
+        store.flush()
+    store.save_run("r", _run("r", graph_id="busy", status="running"))
+    store.flush()
+    
+    store._maintain(store._conn())
+    
+    # "busy" has a running run; "b" and "c" are the cached, recent ones
+    assert sorted(store.list_graphs()) == ["b", "busy", "c"]
+    assert evicted[-1] == "old"  # after the cache evictions
+    assert store.get_graph("old") is None
+    assert store.stats()["graphs_evicted"] == 1
+    store.close()
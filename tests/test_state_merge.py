@@ -0,0 +1,97 @@
+"""
+Tests for parallel fan-out edges and join merge policies.
+"""
+import asyncio
+
+import pytest
+
+from nexus_api.schemas.flow_models import Graph, NodeConfig
+from nexus_api.pulse_engine.executor import GraphExecutor
+from nexus_api.pulse_engine.memory_core import StateManager
+from nexus_api.pulse_engine.state_merge import StateMergeError, build_merge
+from nexus_api.pulse_engine.tool_hub import ToolRegistry
+
+PARTIALS = [{"n": 1, "tags": ["a"], "x": 1}, {"n": 2, "tags": ["b"]}, {"n": 4, "x": 1}]
+
+def test_last_writer_takes_the_last_branch():
+    assert build_merge(None)(PARTIALS) == {"n": 4, "tags": ["b"], "x": 1}
+
+def test_reduce_combines_keys_written_by_several_branches():
+    merge = build_merge({"merge": "reduce", "reducer": "max", "reducers": {"tags": "extend"}})
+    assert merge(PARTIALS) == {"n": 4, "tags": ["a", "b"], "x": 1}
+    
+    merge = build_merge({"merge": "reduce", "reducers": {"n": "sum"}})
+    assert merge(PARTIALS) == {"n": 7, "tags": ["b"], "x": 1}
+
+def test_error_policy_rejects_conflicting_writes():
+    merge = build_merge({"merge": "error"})
+    assert merge([{"x": 1, "a": 1}, {"x": 1, "b": 2}]) == {"x": 1, "a": 1, "b": 2}
+    with pytest.raises(StateMergeError, match="'n'"):
+        merge(PARTIALS)
+
+@pytest.mark.parametrize("config", [
+    {"merge": "first_writer"},
+    {"merge": "reduce", "reducer": "median"},
+    {"merge": "reduce", "reducers": {"n": "median"}},
+])
+def test_rejects_unknown_policies_and_reducers(config):
+    with pytest.raises(ValueError):
+        build_merge(config)
+
+class Branches:
+    """Branch tools that record how many run at once."""
+    
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+    
+    def tool(self, value):
+        async def branch(state):
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            await asyncio.sleep(0.01)
+            self.running -= 1
+            return {"total": state["base"] + value, f"seen_{value}": True}
+        return branch
+
+def _run_fan_out(join_config, max_concurrency=None, width=4):
+    branches = Branches()
+    registry = ToolRegistry()
+    registry.register("start", lambda state: {"base": 10})
+    for i in range(width):
+        registry.register(f"b{i}", branches.tool(i))
+    executor = GraphExecutor(registry, StateManager())
+    nodes = {"start": NodeConfig(type="function", function="start"),
+             "join": NodeConfig(type="join", config=join_config)}
+    nodes.update({f"b{i}": NodeConfig(type="function", function=f"b{i}") for i in range(width)})
+    graph_id = executor.register_graph(Graph(
+        name="fan-out",
+        nodes=nodes,
+        edges={"start": {
+            "type": "parallel", "branches": [f"b{i}" for i in range(width)], "join": "join"
+        }},
+        start_node="start",
+        max_concurrency=max_concurrency
+    ))
+    return asyncio.run(executor.execute(graph_id, {})), branches
+
+def test_fan_out_runs_branches_concurrently_and_merges():
+    run, branches = _run_fan_out({"merge": "reduce", "reducers": {"total": "sum"}})
+    
+    assert run.status == "completed", run.error
+    assert run.state["total"] == 10 * 4 + 0 + 1 + 2 + 3
+    assert all(run.state[f"seen_{i}"] for i in range(4))
+    assert branches.peak == 4
+
+def test_fan_out_respects_max_concurrency():
+    run, branches = _run_fan_out(None, max_concurrency=2)
+    
+    assert run.status == "completed", run.error
+    assert run.state["total"] == 13  # last writer in declared order
+    assert branches.peak == 2
+
+def test_conflicting_branches_fail_the_run():
+    run, _ = _run_fan_out({"merge": "error"})
+    
+    assert run.status == "failed"
+    assert "Conflicting writes" in run.error
@@ -0,0 +1,105 @@
+"""
+Tests for the tool registry and memoized pure tools.
+"""
+import asyncio
+import threading
+
+import pytest
+
+from nexus_api.pulse_engine.tool_hub import ToolRegistry
+
+def _counting_tool(calls):
+    def analyze(state):
+        calls.append(threading.current_thread().name)
+        return {"findings": [len(state["code"])]}
+    return analyze
+
+@pytest.mark.parametrize("mode", ["inline", "thread"])
+def test_pure_tool_is_served_from_cache(mode):
+    registry = ToolRegistry(thread_workers=2)
+    calls = []
+    registry.register("analyze", _counting_tool(calls), mode=mode,
+                      pure=True, reads=["code"])
+    tool = registry.get_tool("analyze")
+    
+    async def scenario():
+        first = await tool({"code": "abc", "other": 1})
+        second = await tool({"code": "abc", "other": 2})
+        third = await tool({"code": "abcd"})
+        return first, second, third
+    
+    try:
+        first, second, third = asyncio.run(scenario())
+    finally:
+        registry.shutdown()
+    
+    assert first == second == {"findings": [3]}
+    assert third == {"findings": [4]}
+    assert len(calls) == 2
+    assert registry.result_cache.stats()["hits"] == 1
+
+@pytest.mark.parametrize("mode", ["inline", "thread"])
+def test_cache_hits_are_independent_copies(mode):
+    registry = ToolRegistry(thread_workers=2)
+    registry.register("analyze", _counting_tool([]), mode=mode,
+                      pure=True, reads=["code"])
+    tool = registry.get_tool("analyze")
+    
+    async def scenario():
+        first = await tool({"code": "abc"})
+        first["findings"].append("mutated")
+        second = await tool({"code": "abc"})
+        second["findings"].append("again")
+        return first, second, await tool({"code": "abc"})
+    
+    try:
+        first, second, third = asyncio.run(scenario())
+    finally:
+        registry.shutdown()
+    
+    assert first is not second
+    assert third == {"findings": [3]}
+
+def test_thread_mode_hashes_inputs_off_the_loop(monkeypatch):
+    from nexus_api.pulse_engine import tool_hub as hub_module
+    hashed_on = []
+    real_key = hub_module.input_key
+    
+    def spy_key(*args):
+        hashed_on.append(threading.current_thread().name)
+        return real_key(*args)
+    
+    monkeypatch.setattr(hub_module, "input_key", spy_key)
+    registry = ToolRegistry(thread_workers=1)
+    registry.register("analyze", _counting_tool([]), mode="thread",
+                      pure=True, reads=["code"])
+    
+    try:
+        asyncio.run(registry.get_tool("analyze")({"code": "abc"}))
+    finally:
+        registry.shutdown()
+    
+    assert hashed_on and all(name.startswith("qflow-tool") for name in hashed_on)
+
+def test_unpicklable_results_are_returned_but_not_cached():
+    registry = ToolRegistry()
+    calls = []
+    
+    def make_lock(state):
+        calls.append(1)
+        return {"lock": threading.Lock()}
+    
+    registry.register("lock", make_lock, pure=True, reads=["code"])
+    tool = registry.get_tool("lock")
+    
+    async def scenario():
+        await tool({"code": "x"})
+        return await tool({"code": "x"})
+    
+    try:
+        result = asyncio.run(scenario())
+    finally:
+        registry.shutdown()
+    
+    assert "lock" in result
+    assert len(calls) == 2
@@ -0,0 +1,143 @@
+"""
+Tests for the SQLite work queue and the cluster dispatcher.
+"""
+import asyncio
+import time
+
+import pytest
+
+from nexus_api.schemas.flow_models import Graph, NodeConfig
+from nexus_api.pulse_engine.cluster import ClusterDispatcher
+from nexus_api.pulse_engine.executor import GraphExecutor
+from nexus_api.pulse_engine.sqlite_core import SQLiteStateManager
+from nexus_api.pulse_engine.tool_hub import ToolRegistry
+from nexus_api.pulse_engine.work_queue import WorkQueue
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"), visibility_timeout=30)
+    yield queue
+    queue.close()
+
+def test_leases_highest_priority_first(queue):
+    low = queue.enqueue("run", "r-low", {})
+    high = queue.enqueue("run", "r-high", {"x": 1}, priority=5)
+    
+    jobs = queue.lease("w1", limit=2)
+    
+    assert [job.job_id for job in jobs] == [high, low]
+    assert jobs[0].args == {"x": 1} and jobs[0].attempts == 1
+    assert queue.lease("w2") == [] and queue.depth() == 0
+
+def test_lapsed_lease_is_handed_to_another_worker(queue):
+    job_id = queue.enqueue("run", "r-1", {})
+    queue.lease("w1")
+    
+    assert queue.lease("w2") == []
+    queue._conn().execute("UPDATE jobs SET lease_expires = ?", (time.time() - 1,))
+    
+    jobs = queue.lease("w2")
+    assert [job.job_id for job in jobs] == [job_id] and jobs[0].attempts == 2
+    
+    # The old owner can no longer renew or complete it
+    queue.extend("w1", [job_id])
+    queue.complete(job_id, "w1", result="stale")
+    assert queue.stats()["jobs_by_state"] == {"leased": 1}
+
+def test_extend_renews_the_lease_and_reports_cancellation(queue):
+    job_id = queue.enqueue("run", "r-1", {})
+    queue.lease("w1")
+    queue._conn().execute("UPDATE jobs SET lease_expires = ?", (time.time() + 0.5,))
+    
+    assert queue.extend("w1", [job_id]) == set()
+    assert queue.lease("w2") == []
+    assert queue.cancel_run("r-1") == "running"
+    assert queue.extend("w1", [job_id]) == {job_id}
+
+def test_cancel_removes_queued_jobs(queue):
+    job_id = queue.enqueue("run", "r-1", {}, awaited=True)
+    
+    assert queue.is_pending("r-1")
+    assert queue.cancel_run("r-1") == "queued"
+    assert queue.cancel_run("r-1") is None and not queue.is_pending("r-1")
+    assert queue.outcomes([job_id]) == {job_id: (None, "Job was cancelled")}
+
+def test_outcomes_are_kept_only_for_awaited_jobs(queue):
+    awaited = queue.enqueue("run", "r-1", {}, awaited=True)
+    fire_and_forget = queue.enqueue("run", "r-2", {})
+    queue.lease("w1", limit=2)
+    
+    assert queue.outcomes([awaited]) == {}
+    queue.complete(awaited, "w1", result="r-1")
+    queue.complete(fire_and_forget, "w1", error="boom")
+    
+    assert queue.outcomes([awaited]) == {awaited: ("r-1", None)}
+    assert queue.stats()["jobs_by_state"] == {}
+
+def test_discarded_job_is_deleted_when_it_finishes(queue):
+    job_id = queue.enqueue("run", "r-1", {}, awaited=True)
+    queue.lease("w1")
+    queue.discard(job_id)
+    queue.complete(job_id, "w1", result="r-1")
+    
+    assert queue.stats()["jobs_by_state"] == {}
+
+def _dispatcher(tmp_path, queue):
+    registry = ToolRegistry()
+    registry.register("step", lambda state: {"done": True})
+    store = SQLiteStateManager(str(tmp_path / "runs.db"))
+    executor = GraphExecutor(registry, store)
+    graph_id = executor.register_graph(Graph(
+        name="one",
+        nodes={"step": NodeConfig(type="function", function="step")},
+        edges={},
+        start_node="step"
+    ))
+    return ClusterDispatcher(executor, queue, stats_interval=0.01), store, graph_id
+
+def test_dispatcher_cancels_queued_runs_and_caches_queue_stats(tmp_path, queue):
+    dispatcher, store, graph_id = _dispatcher(tmp_path, queue)
+    
+    async def scenario():
+        await dispatcher.start()
+        runs = [await dispatcher.submit(graph_id, {"n": n}) for n in range(3)]
+        assert dispatcher.queue_depth() == 3
+        assert await dispatcher.cancel(runs[0].run_id)
+        assert not await dispatcher.cancel("r-missing")
+        await asyncio.sleep(0.05)
+        stats = dispatcher.stats()
+        await dispatcher.stop()
+        return runs, stats
+    
+    try:
+        runs, stats = asyncio.run(scenario())
+        cancelled = store.get_run(runs[0].run_id)
+    finally:
+        store.close()
+    
+    assert cancelled.status == "cancelled"
+    assert stats["queue_depth"] == 2 and stats["jobs_by_state"] == {"queued": 2}
+    assert stats["cancelled"] == 1 and stats["submitted"] == 3
+
+def test_abandoned_wait_cancels_the_run(tmp_path, queue):
+    dispatcher, store, graph_id = _dispatcher(tmp_path, queue)
+    
+    async def scenario():
+        await dispatcher.start()
+        caller = asyncio.create_task(dispatcher.execute(graph_id, {}))
+        await asyncio.sleep(0.05)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        while dispatcher._abandoned:
+            await asyncio.sleep(0.01)
+        await dispatcher.stop()
+    
+    try:
+        asyncio.run(scenario())
+        statuses = [store.get_run(run_id).status for run_id in store.list_runs()]
+    finally:
+        store.close()
+    
+    assert statuses == ["cancelled"]
+    assert queue.depth() == 0 and queue.stats()["jobs_by_state"] == {}